@@ -1,34 +1,29 @@
-import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
 import os
 
+from event_store import STAGE_CSV, save_stage
+from model_cache import FEATURES, get_kmeans
+from seismic_data import load_events
+
 # Configuración
-DATA_PATH = 'data/earthquakes_enriched.csv'
-OUTPUT_PATH = 'data/earthquakes_enriched.csv' # Sobrescribimos con los clusters
+DATA_PATH = STAGE_CSV['enriched']
+OUTPUT_PATH = STAGE_CSV['clustered'] # Etapa propia: la entrada enriquecida no se reescribe
 
 def apply_final_model(k=7):
     print(f"Aplicando modelo final con K={k}...")
-    df = pd.read_csv(DATA_PATH)
+    df = load_events('enriched')
     
     # Features finales
-    features = ['latitude', 'longitude', 'depth', 'mag']
-    X = df[features]
-    
-    # Escalado
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
+    X = df[FEATURES]
     
-    # K-Means Final
-    kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-    df['cluster'] = kmeans.fit_predict(X_scaled)
+    # Escalado + K-Means Final (desde la caché de modelos si los datos no cambiaron)
+    df['cluster'] = get_kmeans(X, k)['labels']
     
     # Renombrar clusters para que sean más legibles (opcional en esta fase, o dejar como 0-6)
     # Por ahora los dejaremos como números para la fase de perfilado
     
     # Guardar dataset con clusters
-    df.to_csv(OUTPUT_PATH, index=False)
+    save_stage(df, 'clustered')
     print(f"Dataset actualizado con clusters en: {OUTPUT_PATH}")
     
     # Mostrar distribución
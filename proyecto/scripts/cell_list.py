@@ -0,0 +1,242 @@
+import argparse
+import time
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from sklearn.cluster import DBSCAN
+from sklearn.neighbors import BallTree
+
+from dbscan_sweep import R_TIERRA_KM, dbscan_from_graph
+
+# ----------------------------------------
+# VECINOS EN RADIO FIJO CON UNA GRILLA DE CELDAS (CELL LIST)
+# ----------------------------------------
+# Con un radio fijo (eps) basta una grilla de celdas del tamaño de eps: los vecinos de un
+# evento solo pueden estar en su celda o en las 8 que la rodean (3×3). Las filas de la grilla
+# miden al menos eps en latitud; el ancho en longitud de cada fila se calcula con la latitud
+# más cercana al polo entre ella y sus filas vecinas (asin(sin eps / cos φ)), así que las
+# celdas se ensanchan hacia los polos y las columnas dan la vuelta en ±180°.
+#
+# Los eventos se ordenan por celda; un bloque de eventos consecutivos de una fila tiene como
+# candidatos, en cada fila vecina, un único tramo contiguo de ese orden. Las distancias del
+# bloque se obtienen con un producto matricial de vectores unitarios (cos d = a·b) y solo los
+# pares en el borde del radio se confirman con la fórmula haversine, como hace BallTree.
+EVENTOS_POR_BLOQUE = 1024
+PARES_POR_BLOQUE = 20_000_000
+TOLERANCIA_COSENO = 1e-12
+TAMANOS_BENCHMARK = (10_000, 100_000, 1_000_000)
+
+def _haversine_term(lat1, lon1, lat2, lon2):
+    # sin²(d/2) de la distancia angular: comparar con sin²(eps/2) equivale a comparar d con eps
+    return (np.sin((lat2 - lat1) / 2) ** 2
+            + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+
+def build_cells(lat, lon, eps_km):
+    """
+    Grilla de celdas para un radio `eps_km`: eventos ordenados por celda (`order`), sus
+    vectores unitarios y, para cada celda, el rango [inicio, fin) que ocupa en ese orden.
+    """
+    lat = np.radians(np.asarray(lat, dtype='float64'))
+    lon = np.radians(np.asarray(lon, dtype='float64'))
+    eps = eps_km / R_TIERRA_KM
+    n_rows = max(1, int(np.floor(np.pi / eps)))
+    row_height = np.pi / n_rows  # >= eps
+
+    # Ancho mínimo de cada fila: cubre la latitud más polar de las filas r-1..r+1
+    edges = -np.pi / 2 + row_height * np.arange(n_rows + 1)
+    polar = np.minimum(np.maximum(np.abs(edges[:-1] - row_height), np.abs(edges[1:] + row_height)), np.pi / 2)
+    cos_polar = np.cos(polar)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Cerca del polo (o con radios de más de un cuarto de meridiano) la fila es una sola celda
+        width = np.where((cos_polar > np.sin(eps)) & (eps < np.pi / 2),
+                         np.arcsin(np.minimum(np.sin(eps) / cos_polar, 1.0)), 2 * np.pi)
+    n_cols = np.maximum(1, np.floor(2 * np.pi / (width * (1 + 1e-9))).astype('int64'))
+    row_offset = np.concatenate([[0], np.cumsum(n_cols)])
+
+    row = np.clip(((lat + np.pi / 2) / row_height).astype('int64'), 0, n_rows - 1)
+    lon_norm = (lon + np.pi) / (2 * np.pi)
+    col = np.floor(lon_norm * n_cols[row]).astype('int64') % n_cols[row]
+    order = np.argsort(row_offset[row] + col, kind='stable')
+    bounds = np.searchsorted((row_offset[row] + col)[order], np.arange(row_offset[-1] + 1))
+
+    lat, lon = lat[order], lon[order]
+    xyz = np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+    return {
+        'eps': eps, 'order': order, 'lat': lat, 'lon': lon, 'xyz': xyz,
+        'row': row[order], 'lon_norm': lon_norm[order],
+        'n_rows': n_rows, 'n_cols': n_cols, 'row_offset': row_offset,
+        'start': bounds[:-1], 'end': bounds[1:],
+    }
+
+def _candidates(cells, a, b):
+    """Posiciones (en el orden de celdas) de los candidatos de los eventos [a, b) de una misma fila."""
+    n_cols, row_offset, start, end = cells['n_cols'], cells['row_offset'], cells['start'], cells['end']
+    lon_min, lon_max = cells['lon_norm'][a:b].min(), cells['lon_norm'][a:b].max()
+    row = cells['row'][a]
+    parts = []
+    for target in (row - 1, row, row + 1):
+        if target < 0 or target >= cells['n_rows']:
+            continue
+        cols = n_cols[target]
+        first = int(np.floor(lon_min * cols)) - 1
+        last = int(np.floor(lon_max * cols)) + 1
+        base = row_offset[target]
+        if last - first + 1 >= cols:
+            parts.append(np.arange(start[base], end[base + cols - 1]))
+        elif first < 0 or last >= cols:
+            # El tramo cruza el antimeridiano: dos pedazos de la misma fila
+            lo, hi = first % cols, last % cols
+            parts.append(np.arange(start[base], end[base + hi]))
+            parts.append(np.arange(start[base + lo], end[base + cols - 1]))
+        else:
+            parts.append(np.arange(start[base + first], end[base + last]))
+    return np.sort(np.concatenate(parts))
+
+def iter_blocks(cells, block_size=EVENTOS_POR_BLOQUE, max_pairs=PARES_POR_BLOQUE):
+    """
+    Recorre los eventos por bloques (a, b, candidatos, dentro) donde `dentro[i, j]` indica si
+    el evento a+i y el candidato j están a distancia <= eps (incluido el propio evento).
+    """
+    eps = min(cells['eps'], np.pi)
+    cos_eps = np.cos(eps)
+    limit = np.sin(eps / 2) ** 2
+    row_bounds = np.searchsorted(cells['row'], np.arange(cells['n_rows'] + 1))
+    xyz = cells['xyz']
+
+    for r in range(cells['n_rows']):
+        for a in range(row_bounds[r], row_bounds[r + 1], block_size):
+            b = min(a + block_size, row_bounds[r + 1])
+            cand = _candidates(cells, a, b)
+            # Con muchos candidatos (celdas muy densas) el bloque se parte para acotar la memoria
+            step = max(1, min(b - a, max_pairs // max(1, len(cand))))
+            for s in range(a, b, step):
+                e = min(s + step, b)
+                dot = xyz[s:e] @ xyz[cand].T
+                inside = dot > cos_eps + TOLERANCIA_COSENO
+                border = ~inside & (dot >= cos_eps - TOLERANCIA_COSENO)
+                if border.any():
+                    i, j = np.nonzero(border)
+                    h = _haversine_term(cells['lat'][s + i], cells['lon'][s + i],
+                                        cells['lat'][cand[j]], cells['lon'][cand[j]])
+                    inside[i[h <= limit], j[h <= limit]] = True
+                yield s, e, cand, inside
+
+def _sorted_counts(cells):
+    counts = np.empty(len(cells['order']), dtype='int64')
+    for a, b, _, inside in iter_blocks(cells):
+        counts[a:b] = inside.sum(axis=1)
+    return counts
+
+def neighbor_counts(lat, lon, eps_km, cells=None):
+    """Número de eventos a menos de `eps_km` de cada evento, incluido él mismo (como radius_density)."""
+    cells = cells if cells is not None else build_cells(lat, lon, eps_km)
+    counts = np.empty(len(cells['order']), dtype='int64')
+    counts[cells['order']] = _sorted_counts(cells)
+    return counts
+
+def core_graph(lat, lon, eps_km, min_samples, cells=None, counts=None):
+    """
+    Grafo de adyacencia (CSR, orden original) y máscara de núcleos para `dbscan_from_graph`.
+
+    Los vecinos entre núcleos de cada bloque se reemplazan por una estrella por componente
+    (cada punto unido al menor de su componente): se conservan las mismas componentes con
+    O(n) aristas en lugar de O(n·vecinos). Los puntos que no son núcleo guardan todas sus
+    aristas hacia núcleos (tienen menos de `min_samples` vecinos). `counts` permite reutilizar
+    un `neighbor_counts` ya calculado con la misma grilla.
+    """
+    cells = cells if cells is not None else build_cells(lat, lon, eps_km)
+    order = cells['order']
+    n = len(order)
+    core = (counts[order] if counts is not None else _sorted_counts(cells)) >= min_samples
+
+    rows, cols = [], []
+    for a, b, cand, inside in iter_blocks(cells):
+        inside &= core[cand][None, :]
+        block = np.arange(a, b)
+        block_core = core[block]
+        border = block[~block_core]
+        i, j = np.nonzero(inside[~block_core])
+        rows.append(border[i])
+        cols.append(cand[j])
+
+        core_rows = block[block_core]
+        i, j = np.nonzero(inside[block_core])
+        if len(i):
+            # Componentes del subgrafo local (nodos = candidatos) y estrella hacia el menor
+            local = np.searchsorted(cand, core_rows)
+            graph = sparse.csr_matrix((np.ones(len(i), dtype='int8'), (local[i], j)), shape=(len(cand), len(cand)))
+            _, comp = connected_components(graph, directed=False)
+            used = np.zeros(len(cand), dtype=bool)
+            used[j] = True
+            used[local] = True
+            used = np.flatnonzero(used)
+            rep = np.full(comp.max() + 1, len(cand))
+            np.minimum.at(rep, comp[used], used)
+            star = used[rep[comp[used]] != used]
+            rows.extend([cand[star], cand[rep[comp[star]]]])
+            cols.extend([cand[rep[comp[star]]], cand[star]])
+
+    rows = order[np.concatenate(rows)] if rows else np.zeros(0, dtype='int64')
+    cols = order[np.concatenate(cols)] if cols else np.zeros(0, dtype='int64')
+    graph = sparse.csr_matrix((np.ones(len(rows), dtype='int8'), (rows, cols)), shape=(n, n))
+    graph.sum_duplicates()
+    core_original = np.empty_like(core)
+    core_original[order] = core
+    return graph, core_original
+
+def dbscan_cells(lat, lon, eps_km, min_samples, cells=None, counts=None):
+    """Etiquetas DBSCAN (haversine) calculadas con la grilla de celdas; iguales a las de sklearn."""
+    graph, core = core_graph(lat, lon, eps_km, min_samples, cells, counts)
+    return dbscan_from_graph(graph, min_samples, core=core)
+
+# ----------------------------------------
+# BENCHMARK FRENTE A BALLTREE
+# ----------------------------------------
+def synthetic_catalog(n, seed=0):
+    """
+    Catálogo sintético de densidad constante: un enjambre gaussiano (σ = 1°) por cada 2000
+    eventos repartido en latitudes sísmicas, más un 20% de sismicidad dispersa.
+    """
+    rng = np.random.default_rng(seed)
+    n_swarm = int(n * 0.8)
+    n_centers = max(1, n // 2000)
+    centers = np.column_stack([rng.uniform(-60, 60, n_centers), rng.uniform(-180, 180, n_centers)])
+    pick = rng.integers(0, n_centers, n_swarm)
+    lat = np.concatenate([centers[pick, 0] + rng.normal(0, 1.0, n_swarm), rng.uniform(-60, 60, n - n_swarm)])
+    lon = np.concatenate([centers[pick, 1] + rng.normal(0, 1.0, n_swarm), rng.uniform(-180, 180, n - n_swarm)])
+    return np.clip(lat, -90, 90), (lon + 180) % 360 - 180
+
+def benchmark(sizes=TAMANOS_BENCHMARK, eps_km=50, min_samples=15, seed=0):
+    """Tiempos de conteo de vecinos y DBSCAN completo: BallTree (sklearn) frente a la grilla de celdas."""
+    print(f"{'eventos':>10} {'conteo BallTree':>16} {'conteo celdas':>14} {'DBSCAN sklearn':>15} {'DBSCAN celdas':>14}")
+    for n in sizes:
+        lat, lon = synthetic_catalog(n, seed)
+        coords = np.radians(np.column_stack([lat, lon]))
+
+        t0 = time.perf_counter()
+        ref_counts = BallTree(coords, metric='haversine').query_radius(coords, r=eps_km / R_TIERRA_KM, count_only=True)
+        t_tree = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        counts = neighbor_counts(lat, lon, eps_km)
+        t_cells = time.perf_counter() - t0
+        assert np.array_equal(ref_counts, counts), "Los conteos no coinciden con BallTree"
+
+        t0 = time.perf_counter()
+        ref = DBSCAN(eps=eps_km / R_TIERRA_KM, min_samples=min_samples, metric='haversine',
+                     algorithm='ball_tree').fit_predict(coords)
+        t_db_tree = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        labels = dbscan_cells(lat, lon, eps_km, min_samples)
+        t_db_cells = time.perf_counter() - t0
+        assert np.array_equal(ref, labels), "Las etiquetas no coinciden con sklearn"
+
+        print(f"{n:>10} {t_tree:>15.2f}s {t_cells:>13.2f}s {t_db_tree:>14.2f}s {t_db_cells:>13.2f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de la grilla de celdas frente a BallTree")
+    parser.add_argument('--sizes', type=int, nargs='+', default=TAMANOS_BENCHMARK, help="Tamaños de catálogo")
+    parser.add_argument('--eps-km', type=float, default=50, help="Radio de vecindad (km)")
+    parser.add_argument('--min-samples', type=int, default=15, help="Mínimo de sismos para un punto núcleo")
+    args = parser.parse_args()
+    benchmark(args.sizes, args.eps_km, args.min_samples)
@@ -1,24 +1,26 @@
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-import geopandas as gpd
 import os
 
+from figure_render import draw_basemap
+from seismic_data import DOC_DIR, VIS_DIR, event_columns, load_events
+
 # Configuración
-DATA_PATH = 'data/earthquakes_enriched.csv'
-WORLD_GEOJSON = 'data/world.geojson'
-OUTPUT_DIR = 'documentacion/visualizaciones'
-REPORT_STATS = 'documentacion/stats_clusters.csv'
+OUTPUT_DIR = VIS_DIR
+REPORT_STATS = os.path.join(DOC_DIR, 'stats_clusters.csv')
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 def profile_clusters():
     print("Cargando datos con clusters...")
-    df = pd.read_csv(DATA_PATH)
-    
-    if 'cluster' not in df.columns:
+    try:
+        available = event_columns('clustered')
+    except FileNotFoundError:
+        available = []
+    if 'cluster' not in available:
         print("Error: Columna 'cluster' no encontrada. Ejecute apply_k7_model.py primero.")
         return
+    df = load_events('clustered', columns=['cluster', 'mag', 'depth', 'latitude', 'longitude', 'departamento'])
 
     # 1. Estadísticas Descriptivas por Cluster
     stats = df.groupby('cluster').agg({
@@ -37,11 +39,10 @@ def profile_clusters():
 
     # 2. Visualización Geográfica (Latitud vs Longitud)
     print("\nGenerando mapa de clusters...")
-    world = gpd.read_file(WORLD_GEOJSON)
-    colombia = world[world['name'] == 'Colombia']
-    
     plt.figure(figsize=(12, 10))
-    ax = colombia.plot(color='#f5f6fa', edgecolor='#7f8c8d', linewidth=0.8)
+    ax = plt.gca()
+    draw_basemap(ax, (-82, -66, -4, 14), [('colombia', dict(color='#f5f6fa', edgecolor='#7f8c8d', linewidth=0.8))],
+                 dpi=120)
     
     # Graficar sismos por cluster
     sns.scatterplot(data=df, x='longitude', y='latitude', hue='cluster', 
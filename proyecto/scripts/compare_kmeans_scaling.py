@@ -1,22 +1,20 @@
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
 import os
 
+from model_cache import FEATURES, get_kmeans
+from seismic_data import VIS_DIR, load_events
+
 # Configuración
-DATA_PATH = 'data/earthquakes_enriched.csv'
-OUTPUT_DIR = 'documentacion/visualizaciones'
+OUTPUT_DIR = VIS_DIR
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 def run_experiment():
     print("Cargando datos...")
-    df = pd.read_csv(DATA_PATH)
-    
     # Seleccionamos las features para el modelo
-    features = ['latitude', 'longitude', 'depth', 'mag']
+    features = FEATURES
+    df = load_events('enriched', columns=features)
     X = df[features]
     
     print(f"Dataset: {len(df)} registros.")
@@ -25,15 +23,11 @@ def run_experiment():
     
     # 1. K-Means SIN ESCALAR
     print("\nEjecutando K-Means SIN ESCALAR...")
-    kmeans_no_scale = KMeans(n_clusters=15, random_state=42, n_init=10)
-    df['cluster_no_scale'] = kmeans_no_scale.fit_predict(X)
+    df['cluster_no_scale'] = get_kmeans(X, 15, scale=False)['labels']
     
     # 2. K-Means CON ESCALAR
     print("Ejecutando K-Means CON ESCALAR...")
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-    kmeans_scale = KMeans(n_clusters=15, random_state=42, n_init=10)
-    df['cluster_scale'] = kmeans_scale.fit_predict(X_scaled)
+    df['cluster_scale'] = get_kmeans(X, 15)['labels']
     
     # Visualización comparativa: Longitud vs Profundidad (donde la disparidad es mayor)
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(18, 8))
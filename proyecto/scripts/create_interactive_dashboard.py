@@ -1,47 +1,166 @@
+import argparse
 import pandas as pd
 import json
 import os
-import geopandas as gpd
 import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
+
+from dashboard_payload import build_payload, payload_script, year_buckets
+from event_store import STAGE_CSV
+from fault_cache import faults_script, load_faults_compact
+from model_cache import FEATURES, get_kmeans_range
+from seismic_data import VIS_DIR, load_events
 
 # Configuración de rutas
-DATA_DIR = 'data'
-VIS_DIR = 'documentacion/visualizaciones'
-LOCAL_DATA = os.path.join(DATA_DIR, 'earthquakes_enriched.csv')
-GEOJSON_FAULT_PATH = os.path.join(DATA_DIR, "Atlas_Geol%C3%B3gico_de_Colombia_2020%3A_Fallas_Geol%C3%B3gicas.geojson")
+LOCAL_DATA = STAGE_CSV['enriched']
 OUTPUT_HTML = os.path.join(VIS_DIR, 'dashboard_interactivo.html')
-
-def create_dashboard():
+OUTPUT_PAYLOAD = os.path.join(VIS_DIR, 'dashboard_interactivo.bin')
+K_INICIAL = 7
+
+def profile_text(count, avg_depth, avg_mag, max_mag, top_depto):
+    """Tipo de sismicidad, riesgo y textos ciudadanos de un cluster a partir de sus estadísticas."""
+    # Clasificación por profundidad
+    if avg_depth < 70:
+        seis_type = "Cortical Superficial"
+        depth_icon = "⬆️"
+    elif avg_depth < 150:
+        seis_type = "Intermedia"
+        depth_icon = "↕️"
+    else:
+        seis_type = "Profunda (Nido)"
+        depth_icon = "⬇️"
+
+    # Nivel de riesgo basado en mag y densidad
+    risk_score = (avg_mag * 0.6) + (min(count / 200, 1) * 0.4 * 7)
+    if risk_score >= 4.5 or max_mag >= 6.5:
+        risk = "Alto"
+        risk_icon = "🔴"
+    elif risk_score >= 3.5:
+        risk = "Moderado"
+        risk_icon = "🟡"
+    else:
+        risk = "Bajo"
+        risk_icon = "🟢"
+
+    # Criterios de Agrupación y Nombres de Grupo
+    if avg_depth < 70:
+        group_name = "Grupo Superficial (Más Percibidos)"
+        criteria = "Sismos cercanos a la superficie. Se agrupan aquí porque su impacto se siente con fuerza y ruido."
+        citizen_name = f"🔴 Zona de Riesgo {risk} (Superficial)"
+        impact_text = (f"Estos sismos ocurren a solo {avg_depth:.0f} km de profundidad. "
+                       f"Se agrupan en esta zona porque son los que más 'sacuden' las casas. "
+                       f"Con magnitudes de hasta {max_mag} ML, pueden dañar paredes y techos sin refuerzo.")
+    elif avg_depth < 150:
+        group_name = "Grupo Intermedio (Moderados)"
+        criteria = "Sismos a profundidad media. Se agrupan aquí porque su energía se dispersa antes de llegar arriba."
+        citizen_name = f"🟡 Zona de Profundidad Moderada"
+        impact_text = (f"Ocurren a unos {avg_depth:.0f} km de profundidad. "
+                       f"Se agrupan aquí porque se sienten más como un balanceo que como un golpe seco. "
+                       f"Tienen un impacto moderado en las estructuras.")
+    else:
+        group_name = "Grupo Profundo (Nidos Sísmicos)"
+        criteria = "Sismos a gran profundidad. Se agrupan aquí por su origen profundo, usualmente en nidos sísmicos."
+        citizen_name = f"🟢 Zona Profunda (Menor Riesgo)"
+        impact_text = (f"Son sismos muy profundos (a más de {avg_depth:.0f} km). "
+                       f"Se agrupan aquí porque rara vez causan daños, aunque se registren magnitudes de {max_mag} ML. "
+                       f"Se sienten como vibraciones largas y suaves.")
+
+    return {
+        "count": int(count),
+        "avg_depth": float(avg_depth),
+        "avg_mag": float(avg_mag),
+        "max_mag": float(max_mag),
+        "top_depto": top_depto,
+        "seis_type": seis_type,
+        "depth_icon": depth_icon,
+        "risk": risk,
+        "risk_icon": risk_icon,
+        "name": f"{risk_icon} {seis_type} — {risk} Riesgo",
+        "citizen_name": citizen_name,
+        "impact_text": impact_text,
+        "group_name": group_name,
+        "grouping_criteria": criteria
+    }
+
+def cluster_profiles(df, ks=range(2, 11)):
+    """
+    Perfiles de todos los (K, cluster) en una sola pasada: las etiquetas de cada K se apilan con
+    un desplazamiento por K y los agregados (conteo, medias, máximo y departamento más frecuente)
+    salen de bincount sobre esa clave combinada. Devuelve {K: {cluster: perfil}}.
+    """
+    ks = list(ks)
+    base = np.concatenate([[0], np.cumsum(ks)])
+    n_groups = int(base[-1])
+    keys = np.concatenate([df[f'cluster_k{k}'].to_numpy(dtype='int64') + base[i] for i, k in enumerate(ks)])
+
+    count = np.bincount(keys, minlength=n_groups)
+    stats = {}
+    for col in ('depth', 'mag'):
+        values = np.tile(df[col].to_numpy(dtype='float64'), len(ks))
+        valid = ~np.isnan(values)
+        total = np.bincount(keys[valid], weights=values[valid], minlength=n_groups)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            stats[col] = total / np.bincount(keys[valid], minlength=n_groups)
+        if col == 'mag':
+            max_mag = np.full(n_groups, np.nan)
+            np.fmax.at(max_mag, keys[valid], values[valid])
+
+    # Departamento más frecuente: códigos categóricos y una tabla (grupo x departamento)
+    codes, deptos = pd.factorize(df['departamento'])
+    n_deptos = max(len(deptos), 1)
+    codes = np.tile(codes, len(ks))
+    known = codes >= 0
+    tally = np.bincount(keys[known] * n_deptos + codes[known], minlength=n_groups * n_deptos).reshape(n_groups, n_deptos)
+    top = tally.argmax(axis=1)
+
+    all_profiles = {}
+    for i, k in enumerate(ks):
+        all_profiles[k] = {}
+        for cid in range(k):
+            g = base[i] + cid
+            top_depto = deptos[top[g]] if tally[g, top[g]] else "N/A"
+            all_profiles[k][cid] = profile_text(int(count[g]), round(stats['depth'][g], 1), round(stats['mag'][g], 2),
+                                                round(max_mag[g], 1), top_depto)
+    return all_profiles
+
+def create_dashboard(sidecar=False):
     print("Iniciando creación de dashboard dinámico (K=2 a 10)...")
     os.makedirs(VIS_DIR, exist_ok=True)
 
     try:
         # 1. Cargar y procesar sismos
-        if not os.path.exists(LOCAL_DATA):
+        try:
+            df = load_events('enriched', columns=['time', 'latitude', 'longitude', 'mag', 'depth',
+                                                  'municipio_region', 'departamento'])
+        except FileNotFoundError:
             print(f"Error: No se encuentra {LOCAL_DATA}. Ejecuta enrich_dataset.py primero.")
             return
 
-        df = pd.read_csv(LOCAL_DATA)
-        df['time'] = pd.to_datetime(df['time'])
         df['year'] = df['time'].dt.year
         
         # 2. Calcular Clusters Dinámicos (K=2 a 10)
         # Usamos las mismas features que en el modelado oficial
-        features = ['latitude', 'longitude', 'depth', 'mag']
-        X = df[features].copy()
-        scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(X)
+        X = df[FEATURES].copy()
 
         print("Pre-calculando segmentaciones sismotectónicas...")
-        for k in range(2, 11):
-            kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-            df[f'cluster_k{k}'] = kmeans.fit_predict(X_scaled)
+        for k, model in get_kmeans_range(X, range(2, 11)).items():
+            df[f'cluster_k{k}'] = model['labels']
+
+        # Orden año -> cluster (K inicial): en el navegador cada filtro de años/zona es un tramo contiguo
+        df = df.sort_values(['year', f'cluster_k{K_INICIAL}'], kind='stable').reset_index(drop=True)
+        buckets = year_buckets(df['year'], {k: df[f'cluster_k{k}'] for k in range(2, 11)})
 
-        # Preparar datos para JS (incluyendo todos los clusters)
+        # Preparar datos para JS: payload binario columnar (incluyendo todos los clusters)
         cluster_cols = [f'cluster_k{k}' for k in range(2, 11)]
-        seismic_data = df[['latitude', 'longitude', 'mag', 'depth', 'year', 'municipio_region', 'departamento'] + cluster_cols].to_dict(orient='records')
+        payload_header, payload_data = build_payload(df, cluster_cols)
+        if sidecar:
+            tmp_path = f"{OUTPUT_PAYLOAD}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(payload_data)
+            os.replace(tmp_path, OUTPUT_PAYLOAD)
+            payload_js = payload_script(payload_header, payload_data, os.path.basename(OUTPUT_PAYLOAD))
+        else:
+            payload_js = payload_script(payload_header, payload_data)
+        print(f"Payload de eventos: {len(payload_data) / 1e6:.2f} MB ({len(df)} sismos)")
         
         # Estadísticas básicas
         yearly_counts = df['year'].value_counts().sort_index().to_dict()
@@ -49,11 +168,8 @@ def create_dashboard():
         years_counts = list(yearly_counts.values())
 
         # Fallas geológicas
-        print("Cargando fallas geológicas...")
-        gdf_fallas = gpd.read_file(GEOJSON_FAULT_PATH)
-        gdf_fallas = gdf_fallas[['NombreFall', 'geometry']].copy()
-        gdf_fallas['geometry'] = gdf_fallas['geometry'].simplify(0.01)
-        faults_json = gdf_fallas.to_json()
+        print("Cargando fallas geológicas (caché multirresolución)...")
+        faults_js = faults_script(load_faults_compact())
 
         # 4. Paleta de colores Premium (10 colores)
         colors = [
@@ -61,83 +177,9 @@ def create_dashboard():
             "#e67e22", "#9b59b6", "#16a085", "#d35400", "#c0392b"
         ]
 
-        # 5. Generar perfiles automáticos por cluster para cada K
+        # 5. Generar perfiles automáticos por cluster para cada K (una sola pasada agrupada)
         print("Generando perfiles automáticos de clusters...")
-        all_profiles = {}
-        for k in range(2, 11):
-            col = f'cluster_k{k}'
-            profiles = {}
-            for cid in range(k):
-                sub = df[df[col] == cid]
-                avg_depth = round(sub['depth'].mean(), 1)
-                avg_mag   = round(sub['mag'].mean(), 2)
-                max_mag   = round(sub['mag'].max(), 1)
-                count     = len(sub)
-                top_depto = sub['departamento'].value_counts().index[0] if len(sub) else "N/A"
-
-                # Clasificación por profundidad
-                if avg_depth < 70:
-                    seis_type = "Cortical Superficial"
-                    depth_icon = "⬆️"
-                elif avg_depth < 150:
-                    seis_type = "Intermedia"
-                    depth_icon = "↕️"
-                else:
-                    seis_type = "Profunda (Nido)"
-                    depth_icon = "⬇️"
-
-                # Nivel de riesgo basado en mag y densidad
-                risk_score = (avg_mag * 0.6) + (min(count / 200, 1) * 0.4 * 7)
-                if risk_score >= 4.5 or max_mag >= 6.5:
-                    risk = "Alto"
-                    risk_icon = "🔴"
-                elif risk_score >= 3.5:
-                    risk = "Moderado"
-                    risk_icon = "🟡"
-                else:
-                    risk = "Bajo"
-                    risk_icon = "🟢"
-
-                # Criterios de Agrupación y Nombres de Grupo
-                if avg_depth < 70:
-                    group_name = "Grupo Superficial (Más Percibidos)"
-                    criteria = "Sismos cercanos a la superficie. Se agrupan aquí porque su impacto se siente con fuerza y ruido."
-                    citizen_name = f"🔴 Zona de Riesgo {risk} (Superficial)"
-                    impact_text = (f"Estos sismos ocurren a solo {avg_depth:.0f} km de profundidad. "
-                                   f"Se agrupan en esta zona porque son los que más 'sacuden' las casas. "
-                                   f"Con magnitudes de hasta {max_mag} ML, pueden dañar paredes y techos sin refuerzo.")
-                elif avg_depth < 150:
-                    group_name = "Grupo Intermedio (Moderados)"
-                    criteria = "Sismos a profundidad media. Se agrupan aquí porque su energía se dispersa antes de llegar arriba."
-                    citizen_name = f"🟡 Zona de Profundidad Moderada"
-                    impact_text = (f"Ocurren a unos {avg_depth:.0f} km de profundidad. "
-                                   f"Se agrupan aquí porque se sienten más como un balanceo que como un golpe seco. "
-                                   f"Tienen un impacto moderado en las estructuras.")
-                else:
-                    group_name = "Grupo Profundo (Nidos Sísmicos)"
-                    criteria = "Sismos a gran profundidad. Se agrupan aquí por su origen profundo, usualmente en nidos sísmicos."
-                    citizen_name = f"🟢 Zona Profunda (Menor Riesgo)"
-                    impact_text = (f"Son sismos muy profundos (a más de {avg_depth:.0f} km). "
-                                   f"Se agrupan aquí porque rara vez causan daños, aunque se registren magnitudes de {max_mag} ML. "
-                                   f"Se sienten como vibraciones largas y suaves.")
-
-                profiles[cid] = {
-                    "count": int(count),
-                    "avg_depth": float(avg_depth),
-                    "avg_mag": float(avg_mag),
-                    "max_mag": float(max_mag),
-                    "top_depto": top_depto,
-                    "seis_type": seis_type,
-                    "depth_icon": depth_icon,
-                    "risk": risk,
-                    "risk_icon": risk_icon,
-                    "name": f"{risk_icon} {seis_type} — {risk} Riesgo",
-                    "citizen_name": citizen_name,
-                    "impact_text": impact_text,
-                    "group_name": group_name,
-                    "grouping_criteria": criteria
-                }
-            all_profiles[k] = profiles
+        all_profiles = cluster_profiles(df)
 
         # 5. Generar el HTML
         html_template = f"""
@@ -338,10 +380,12 @@ def create_dashboard():
 </div>
 
 <script>
-    const seismicPoints = {json.dumps(seismic_data)};
-    const faultsGeoJSON = {faults_json};
+    {payload_js}
+    let data = null;  // Columnas de sismos en arreglos tipados (ver loadPayload)
+    {faults_js}
     const colors = {json.dumps(colors)};
     const allProfiles = {json.dumps(all_profiles)};
+    const yearBuckets = {json.dumps(buckets)};
     let currentK = 7;
     let yearFrom = {min(years)};
     let yearTo = {max(years)};
@@ -354,12 +398,203 @@ def create_dashboard():
     }}).addTo(map);
 
     // Capa de Fallas (Más visibles)
-    L.geoJSON(faultsGeoJSON, {{
+    addFaultsLayer(map, {{
         style: {{ color: "#d63031", weight: 1.5, opacity: 0.45 }},
         onEachFeature: (f, l) => {{ if(f.properties.NombreFall) l.bindPopup(`<b>FALLA GEOLÓGICA:</b> ${{f.properties.NombreFall}}`); }}
-    }}).addTo(map);
+    }});
 
-    let markerLayer = L.layerGroup().addTo(map);
+    // Índice año -> cluster: con los eventos ordenados por (año, cluster) cada filtro es una lista de tramos
+    let order = null;        // Permutación de eventos ordenada por (año, cluster de indexedK)
+    let bucketStart = null;  // Inicio de cada tramo (año, cluster) en `order`
+    let indexedK = null;
+    let projected = null;    // Coordenadas Web Mercator (0-1) de cada evento
+
+    function ensureIndex() {{
+        if (indexedK === currentK) return;
+        // Ordenamiento por conteo: O(n) con los conteos por tramo precalculados
+        const k = currentK, counts = yearBuckets.counts[k];
+        bucketStart = new Uint32Array(counts.length + 1);
+        for (let b = 0; b < counts.length; b++) bucketStart[b + 1] = bucketStart[b] + counts[b];
+        const next = bucketStart.slice(0, counts.length);
+        const labels = data[`cluster_k${{k}}`];
+        order = new Uint32Array(data.n);
+        for (let i = 0; i < data.n; i++) order[next[(data.year[i] - yearBuckets.first_year) * k + labels[i]]++] = i;
+        indexedK = k;
+        pointLayer.setOrder();
+    }}
+
+    function activeSlices() {{
+        // Tramos [inicio, fin) de `order` que cumplen el filtro actual de años y zona
+        const k = currentK, y0 = yearFrom - yearBuckets.first_year, y1 = yearTo - yearBuckets.first_year;
+        if (currentClusterFilter === null) return [[bucketStart[y0 * k], bucketStart[(y1 + 1) * k]]];
+        const slices = [];
+        for (let y = y0; y <= y1; y++) {{
+            const b = y * k + currentClusterFilter;
+            if (bucketStart[b + 1] > bucketStart[b]) slices.push([bucketStart[b], bucketStart[b + 1]]);
+        }}
+        return slices;
+    }}
+
+    function projectEvents() {{
+        projected = new Float32Array(2 * data.n);
+        for (let i = 0; i < data.n; i++) {{
+            const s = Math.sin(data.latitude[i] * Math.PI / 180);
+            projected[2 * i] = (data.longitude[i] + 180) / 360;
+            projected[2 * i + 1] = 0.5 - Math.log((1 + s) / (1 - s)) / (4 * Math.PI);
+        }}
+    }}
+
+    // Capa única de sismos: WebGL (canvas 2D si no hay WebGL) en lugar de un marcador por evento.
+    // El buffer sigue el orden de `order`, así cada tramo del filtro es un solo drawArrays.
+    const POINT_VS = `
+        attribute vec2 a_pos; attribute float a_radius; attribute float a_color;
+        uniform vec2 u_origin; uniform float u_scale; uniform vec2 u_size; uniform float u_ratio;
+        uniform vec3 u_colors[10];
+        varying vec3 v_rgb; varying float v_border;
+        void main() {{
+            vec2 px = (a_pos - u_origin) * u_scale;
+            gl_Position = vec4(px.x / u_size.x * 2.0 - 1.0, 1.0 - px.y / u_size.y * 2.0, 0.0, 1.0);
+            gl_PointSize = 2.0 * (a_radius + 0.4) * u_ratio;
+            v_rgb = u_colors[int(a_color)];
+            v_border = 0.4 / (a_radius + 0.4);
+        }}`;
+    const POINT_FS = `
+        precision mediump float;
+        varying vec3 v_rgb; varying float v_border;
+        void main() {{
+            float d = length(gl_PointCoord - 0.5) * 2.0;
+            if (d > 1.0) discard;
+            gl_FragColor = d > 1.0 - v_border ? vec4(1.0, 1.0, 1.0, 0.8) : vec4(v_rgb, 0.9);
+        }}`;
+
+    const PointLayer = L.Layer.extend({{
+        onAdd: function(map) {{
+            this._canvas = L.DomUtil.create('canvas', 'leaflet-zoom-hide');
+            this._canvas.style.pointerEvents = 'none';
+            map.getPanes().overlayPane.appendChild(this._canvas);
+            this._gl = this._canvas.getContext('webgl', {{ premultipliedAlpha: false, antialias: false }});
+            if (this._gl) this._initGL();
+            else this._ctx = this._canvas.getContext('2d');
+            map.on('move zoom resize', this.redraw, this);
+        }},
+
+        onRemove: function(map) {{
+            map.off('move zoom resize', this.redraw, this);
+            L.DomUtil.remove(this._canvas);
+        }},
+
+        _initGL: function() {{
+            const gl = this._gl, program = gl.createProgram();
+            [[gl.VERTEX_SHADER, POINT_VS], [gl.FRAGMENT_SHADER, POINT_FS]].forEach(([type, src]) => {{
+                const shader = gl.createShader(type);
+                gl.shaderSource(shader, src);
+                gl.compileShader(shader);
+                gl.attachShader(program, shader);
+            }});
+            gl.linkProgram(program);
+            gl.useProgram(program);
+            this._buffer = gl.createBuffer();
+            this._uniforms = {{}};
+            ['u_origin', 'u_scale', 'u_size', 'u_ratio', 'u_colors'].forEach(u => this._uniforms[u] = gl.getUniformLocation(program, u));
+            gl.uniform3fv(this._uniforms.u_colors, colors.flatMap(c => [1, 3, 5].map(j => parseInt(c.substr(j, 2), 16) / 255)));
+            gl.bindBuffer(gl.ARRAY_BUFFER, this._buffer);
+            // Vértice intercalado: x, y (Mercator), radio (px), índice de color
+            [['a_pos', 2, 0], ['a_radius', 1, 8], ['a_color', 1, 12]].forEach(([name, size, offset]) => {{
+                const loc = gl.getAttribLocation(program, name);
+                gl.enableVertexAttribArray(loc);
+                gl.vertexAttribPointer(loc, size, gl.FLOAT, false, 16, offset);
+            }});
+            gl.enable(gl.BLEND);
+            gl.blendFunc(gl.SRC_ALPHA, gl.ONE_MINUS_SRC_ALPHA);
+        }},
+
+        setOrder: function() {{
+            if (!this._gl) return;
+            const labels = data[`cluster_k${{indexedK}}`], vertices = new Float32Array(4 * data.n);
+            for (let j = 0; j < data.n; j++) {{
+                const i = order[j];
+                vertices[4 * j] = projected[2 * i];
+                vertices[4 * j + 1] = projected[2 * i + 1];
+                vertices[4 * j + 2] = data.mag[i] * 1.4;
+                vertices[4 * j + 3] = labels[i];
+            }}
+            this._gl.bindBuffer(this._gl.ARRAY_BUFFER, this._buffer);
+            this._gl.bufferData(this._gl.ARRAY_BUFFER, vertices, this._gl.STATIC_DRAW);
+        }},
+
+        _view: function() {{
+            // Esquina superior izquierda del mapa en píxeles de mundo y escala del zoom actual
+            const map = this._map, scale = 256 * Math.pow(2, map.getZoom());
+            const origin = map.containerPointToLayerPoint([0, 0]).add(map.getPixelOrigin());
+            return {{ scale: scale, x: origin.x / scale, y: origin.y / scale }};
+        }},
+
+        redraw: function() {{
+            if (!this._map || order === null) return;
+            const map = this._map, size = map.getSize(), ratio = window.devicePixelRatio || 1;
+            const canvas = this._canvas, view = this._view();
+            L.DomUtil.setPosition(canvas, map.containerPointToLayerPoint([0, 0]));
+            if (canvas.width !== Math.round(size.x * ratio) || canvas.height !== Math.round(size.y * ratio)) {{
+                canvas.width = Math.round(size.x * ratio);
+                canvas.height = Math.round(size.y * ratio);
+                canvas.style.width = size.x + 'px';
+                canvas.style.height = size.y + 'px';
+            }}
+            const slices = activeSlices();
+            if (this._gl) {{
+                const gl = this._gl, u = this._uniforms;
+                gl.viewport(0, 0, canvas.width, canvas.height);
+                gl.clearColor(0, 0, 0, 0);
+                gl.clear(gl.COLOR_BUFFER_BIT);
+                gl.uniform2f(u.u_origin, view.x, view.y);
+                gl.uniform1f(u.u_scale, view.scale);
+                gl.uniform2f(u.u_size, size.x, size.y);
+                gl.uniform1f(u.u_ratio, ratio);
+                slices.forEach(([s, e]) => gl.drawArrays(gl.POINTS, s, e - s));
+                return;
+            }}
+            const ctx = this._ctx, labels = data[`cluster_k${{indexedK}}`];
+            ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+            ctx.clearRect(0, 0, size.x, size.y);
+            ctx.strokeStyle = 'rgba(255,255,255,0.8)';
+            ctx.lineWidth = 0.4;
+            ctx.globalAlpha = 0.9;
+            slices.forEach(([s, e]) => {{
+                for (let j = s; j < e; j++) {{
+                    const i = order[j];
+                    ctx.beginPath();
+                    ctx.arc((projected[2 * i] - view.x) * view.scale, (projected[2 * i + 1] - view.y) * view.scale,
+                            data.mag[i] * 1.4, 0, 2 * Math.PI);
+                    ctx.fillStyle = colors[labels[i]];
+                    ctx.fill();
+                    ctx.stroke();
+                }}
+            }});
+        }},
+
+        pick: function(point) {{
+            // Sismo visible más cercano al clic (dentro de su radio más un margen)
+            const view = this._view();
+            let best = null, bestDist = Infinity;
+            activeSlices().forEach(([s, e]) => {{
+                for (let j = s; j < e; j++) {{
+                    const i = order[j];
+                    const dx = (projected[2 * i] - view.x) * view.scale - point.x;
+                    const dy = (projected[2 * i + 1] - view.y) * view.scale - point.y;
+                    const dist = dx * dx + dy * dy, reach = data.mag[i] * 1.4 + 2;
+                    if (dist <= reach * reach && dist <= bestDist) {{ best = i; bestDist = dist; }}
+                }}
+            }});
+            return best;
+        }}
+    }});
+
+    const pointLayer = new PointLayer().addTo(map);
+    map.on('click', e => {{
+        if (order === null) return;
+        const hit = pointLayer.pick(e.containerPoint);
+        if (hit !== null) showDetails(hit);
+    }});
     let yearChart;
 
     function updateK(val) {{
@@ -466,14 +701,16 @@ def create_dashboard():
             return;
         }}
 
-        const clusterKey = `cluster_k${{currentK}}`;
         const colorHex = colors[currentClusterFilter];
         const prof = (allProfiles[currentK] || {{}})[currentClusterFilter] || {{}};
 
-        const munis = new Set();
-        seismicPoints.forEach(p => {{
-            if (p[clusterKey] === currentClusterFilter && p.year >= yearFrom && p.year <= yearTo) munis.add(p.municipio_region);
+        // Municipios de los tramos del filtro (solo se recorren los eventos de la zona)
+        ensureIndex();
+        const values = data.municipio_region_values, seen = new Uint8Array(values.length);
+        activeSlices().forEach(([s, e]) => {{
+            for (let j = s; j < e; j++) seen[data.municipio_region[order[j]]] = 1;
         }});
+        const munis = new Set(values.filter((_, code) => seen[code]));
 
         panel.style.borderLeftColor = colorHex;
         content.innerHTML = `
@@ -504,8 +741,17 @@ def create_dashboard():
         `;
     }}
 
-    function showDetails(p) {{
-        const clusterIdx = p[`cluster_k${{currentK}}`];
+    function eventAt(i) {{
+        return {{
+            mag: data.mag[i], depth: data.depth[i], year: data.year[i],
+            municipio_region: data.municipio_region_values[data.municipio_region[i]],
+            departamento: data.departamento_values[data.departamento[i]],
+        }};
+    }}
+
+    function showDetails(i) {{
+        const p = eventAt(i);
+        const clusterIdx = data[`cluster_k${{currentK}}`][i];
         currentClusterFilter = clusterIdx; // Sincronizar filtro al tocar punto
         renderMarkers();
         updateLegend();
@@ -552,43 +798,40 @@ def create_dashboard():
         `;
     }}
 
+    let renderPending = false;
+
     function renderMarkers() {{
-        markerLayer.clearLayers();
-        const clusterKey = `cluster_k${{currentK}}`;
+        // Los cambios del slider se agrupan: a lo sumo un redibujo por cuadro de animación
+        if (renderPending) return;
+        renderPending = true;
+        requestAnimationFrame(() => {{
+            renderPending = false;
+            drawFiltered();
+        }});
+    }}
+
+    function drawFiltered() {{
+        ensureIndex();
+        pointLayer.redraw();
+
+        // Estadísticas desde los conteos por tramo (sin recorrer los eventos)
+        const k = currentK, counts = yearBuckets.counts[k];
         let count = 0;
-        let statsDepto = {{}};
         let statsYear = {{}};
-        
-        seismicPoints.forEach(p => {{
-            const clusterIdx = p[clusterKey];
-            const yearMatch = p.year >= yearFrom && p.year <= yearTo;
-            const clusterMatch = (currentClusterFilter === null) || (clusterIdx === currentClusterFilter);
-
-            if (yearMatch && clusterMatch) {{
-                // Acumular estadísticas dinámicas
-                statsDepto[p.departamento] = (statsDepto[p.departamento] || 0) + 1;
-                statsYear[p.year] = (statsYear[p.year] || 0) + 1;
-
-                const marker = L.circleMarker([p.latitude, p.longitude], {{
-                    radius: p.mag * 1.4,
-                    fillColor: colors[clusterIdx],
-                    color: "#fff",
-                    weight: 0.4,
-                    opacity: 0.8,
-                    fillOpacity: 0.9
-                }});
-                
-                marker.on('click', () => showDetails(p));
-                markerLayer.addLayer(marker);
-                count++;
-            }}
-        }});
+        for (let y = yearFrom; y <= yearTo; y++) {{
+            const row = (y - yearBuckets.first_year) * k;
+            let c = 0;
+            if (currentClusterFilter === null) for (let j = 0; j < k; j++) c += counts[row + j];
+            else c = counts[row + currentClusterFilter];
+            if (c) statsYear[y] = c;
+            count += c;
+        }}
 
-        updateCharts(statsYear, statsDepto);
+        updateCharts(statsYear);
         document.getElementById('total-count').innerText = count;
     }}
 
-    function updateCharts(yearData, deptoData) {{
+    function updateCharts(yearData) {{
         // Actualizar Gráfico de Años (Línea de Tiempo)
         try {{
             const sortedYears = Object.keys(yearData).sort();
@@ -607,9 +850,13 @@ def create_dashboard():
         options: chartOpts
     }});
 
-    // Inicio
-    updateK(7);
-    updateRange(); 
+    // Inicio: la interfaz se dibuja cuando el payload binario está decodificado
+    loadPayload().then(decoded => {{
+        data = decoded;
+        projectEvents();
+        updateK(7);
+        updateRange();
+    }});
 </script>
 </body>
 </html>
@@ -623,4 +870,8 @@ def create_dashboard():
         print(f"Error al crear el dashboard: {e}")
 
 if __name__ == "__main__":
-    create_dashboard()
+    parser = argparse.ArgumentParser(description="Dashboard interactivo de sismicidad (K=2 a 10)")
+    parser.add_argument('--sidecar', action='store_true',
+                        help="Escribe los eventos en un .bin aparte (requiere servir la carpeta por HTTP)")
+    args = parser.parse_args()
+    create_dashboard(args.sidecar)
@@ -1,81 +1,160 @@
+import argparse
+import os
+
+import numpy as np
 import pandas as pd
 import plotly.express as px
-import os
+import plotly.graph_objects as go
 
-# Cargar el dataset
-path = 'data/earthquakes_raw.csv'
+from map_render import datetime_column, frames_script, lookup_column, numeric_column
+from seismic_data import DOC_DIR, load_events
 
-def create_interactive_map():
-    try:
-        df = pd.read_csv(path)
-        
-        # Preprocesamiento de tiempo
-        df['time'] = pd.to_datetime(df['time'])
-        df['year_month'] = df['time'].dt.strftime('%Y-%m')
-        df = df.sort_values('time')
-        
-        print("Generando mapa interactivo con línea de tiempo...")
-        
-        # Crear la animación con Plotly
-        fig = px.scatter_mapbox(
-            df, 
-            lat="latitude", 
-            lon="longitude", 
-            size="mag", 
-            color="mag",
-            hover_name="place", 
-            hover_data={
-                "mag": True, 
-                "depth": True, 
-                "time": True,
-                "latitude": False,
-                "longitude": False
-            },
-            animation_frame="year_month",
-            color_continuous_scale=px.colors.sequential.Reds,
-            size_max=15, 
-            zoom=4.5,
-            center={"lat": 4.5709, "lon": -74.2973}, # Centro de Colombia
-            mapbox_style="carto-positron",
-            title="Sismos en Colombia y Alrededores (2010-2026)",
-            labels={'mag': 'Magnitud', 'depth': 'Profundidad (km)', 'year_month': 'Año-Mes'}
-        )
-        
-        # Ajustar el diseño
-        fig.update_layout(
-            margin={"r":0,"t":50,"l":0,"b":0},
-            updatemenus=[{
-                "buttons": [
-                    {
-                        "args": [None, {"frame": {"duration": 500, "redraw": True}, "fromcurrent": True}],
-                        "label": "Reproducir",
-                        "method": "animate"
-                    },
-                    {
-                        "args": [[None], {"frame": {"duration": 0, "redraw": True}, "mode": "immediate", "transition": {"duration": 0}}],
-                        "label": "Pausar",
-                        "method": "animate"
-                    }
-                ],
-                "direction": "left",
-                "pad": {"r": 10, "t": 87},
-                "showactive": False,
-                "type": "buttons",
-                "x": 0.1,
-                "xanchor": "right",
-                "y": 0,
-                "yanchor": "top"
-            }]
+# ----------------------------------------
+# MAPA ANIMADO POR MES
+# ----------------------------------------
+# Con `animation_frame` Plotly serializa una traza completa por cada mes (~190 cuadros entre
+# 2010 y 2026): el HTML crece con cuadros x puntos y la reproducción se entrecorta.
+# En el modo por defecto ('delta') los sismos se incrustan una sola vez, ordenados por tiempo,
+# y cada cuadro es solo un rango de índices [inicio, fin) que el navegador dibuja con
+# subarreglos de las mismas columnas (`map_render.frames_script`); la estela (`--trail`)
+# reutiliza esos arreglos con el rango de los meses anteriores.
+CENTRO_COLOMBIA = {"lat": 4.5709, "lon": -74.2973}
+TITULO = "Sismos en Colombia y Alrededores (2010-2026)"
+TAMANO_MAXIMO = 15
+DURACION_CUADRO_MS = 500
+
+def month_frames(times):
+    """Inicio de cada mes (todos los del rango, también los vacíos) en eventos ordenados por tiempo."""
+    times = pd.Series(times)
+    month_index = (times.dt.year * 12 + times.dt.month - 1).to_numpy()
+    first, last = int(month_index[0]), int(month_index[-1])
+    starts = np.searchsorted(month_index, np.arange(first, last + 2))
+    labels = [f"{m // 12}-{m % 12 + 1:02d}" for m in range(first, last + 1)]
+    return starts, labels
+
+def _buttons(play_args, pause_args, method):
+    return [{
+        "buttons": [
+            {"args": play_args, "label": "Reproducir", "method": method},
+            {"args": pause_args, "label": "Pausar", "method": method},
+        ],
+        "direction": "left",
+        "pad": {"r": 10, "t": 87},
+        "showactive": False,
+        "type": "buttons",
+        "x": 0.1,
+        "xanchor": "right",
+        "y": 0,
+        "yanchor": "top"
+    }]
+
+def plotly_frames_figure(df):
+    """Forma anterior: un cuadro de Plotly (traza completa) por mes."""
+    df = df.assign(year_month=df['time'].dt.strftime('%Y-%m'))
+    fig = px.scatter_map(
+        df,
+        lat="latitude",
+        lon="longitude",
+        size="mag",
+        color="mag",
+        hover_name="place",
+        hover_data={
+            "mag": True,
+            "depth": True,
+            "time": True,
+            "latitude": False,
+            "longitude": False
+        },
+        animation_frame="year_month",
+        color_continuous_scale=px.colors.sequential.Reds,
+        size_max=TAMANO_MAXIMO,
+        zoom=4.5,
+        center=CENTRO_COLOMBIA,
+        map_style="carto-positron",
+        title=TITULO,
+        labels={'mag': 'Magnitud', 'depth': 'Profundidad (km)', 'year_month': 'Año-Mes'}
+    )
+    fig.update_layout(
+        margin={"r":0,"t":50,"l":0,"b":0},
+        updatemenus=_buttons(
+            [None, {"frame": {"duration": DURACION_CUADRO_MS, "redraw": True}, "fromcurrent": True}],
+            [[None], {"frame": {"duration": 0, "redraw": True}, "mode": "immediate", "transition": {"duration": 0}}],
+            "animate",
         )
-        
+    )
+    return fig, None
+
+def delta_frames_figure(df, trail=0):
+    """
+    Eventos incrustados una vez y cuadros como rangos de índices (ver `frames_script`).
+    `trail`: meses anteriores que quedan visibles como estela (negativo = todos, acumulado).
+    """
+    starts, labels = month_frames(df['time'])
+    mag = df['mag'].fillna(0)
+    marker = dict(
+        color=[], size=[], sizemode='area', sizeref=2 * mag.max() / TAMANO_MAXIMO ** 2,
+        colorscale=px.colors.sequential.Reds, cmin=mag.min(), cmax=mag.max(),
+    )
+    hovertemplate = ("<b>%{customdata[0]}</b><br>Magnitud: %{customdata[1]:.1f}"
+                     "<br>Profundidad (km): %{customdata[2]:.1f}<br>%{customdata[3]}<extra></extra>")
+
+    fig = go.Figure([
+        # 0: estela, 1: mes actual (ambas se llenan en el navegador)
+        go.Scattermap(lat=[], lon=[], mode='markers', marker={**marker, 'opacity': 0.25},
+                      hovertemplate=hovertemplate, showlegend=False, name='Estela'),
+        go.Scattermap(lat=[], lon=[], mode='markers',
+                      marker={**marker, 'opacity': 0.8, 'showscale': True, 'colorbar': {'title': 'Magnitud'}},
+                      hovertemplate=hovertemplate, showlegend=False, name='Sismos'),
+    ])
+    fig.update_layout(
+        title=TITULO,
+        map=dict(style="carto-positron", center=CENTRO_COLOMBIA, zoom=4.5),
+        margin={"r":0,"t":50,"l":0,"b":0},
+        updatemenus=_buttons(['play'], ['pause'], "skip"),
+        sliders=[{
+            "active": 0,
+            "currentvalue": {"prefix": "Año-Mes="},
+            "pad": {"b": 10, "t": 60},
+            "len": 0.9,
+            "x": 0.1,
+            "y": 0,
+            "steps": [{"label": label, "value": str(i), "method": "skip"} for i, label in enumerate(labels)],
+        }],
+    )
+
+    points = {'lat': numeric_column(df['latitude']), 'lon': numeric_column(df['longitude']),
+              'mag': numeric_column(mag)}
+    columns = [lookup_column(df['place']), numeric_column(mag), numeric_column(df['depth']),
+               datetime_column(df['time'])]
+    script = frames_script(points, columns, starts, labels, trail, DURACION_CUADRO_MS)
+    return fig, script
+
+def create_interactive_map(mode='delta', trail=0):
+    try:
+        df = load_events('raw', columns=['time', 'latitude', 'longitude', 'mag', 'depth', 'place'])
+        df = df.sort_values('time', kind='stable').reset_index(drop=True)
+
+        print(f"Generando mapa interactivo con línea de tiempo (modo {mode})...")
+        if mode == 'plotly':
+            fig, script = plotly_frames_figure(df)
+        else:
+            fig, script = delta_frames_figure(df, trail)
+
         # Guardar en la carpeta de documentación
-        output_file = 'documentacion/mapa_sismos.html'
-        fig.write_html(output_file)
-        
-        print(f"Mapa interactivo generado exitosamente: {output_file}")
-        
+        output_file = os.path.join(DOC_DIR, 'mapa_sismos.html')
+        fig.write_html(output_file, post_script=script)
+
+        print(f"Mapa interactivo generado exitosamente: {output_file} "
+              f"({os.path.getsize(output_file) / 1e6:.2f} MB)")
+
     except Exception as e:
         print(f"Error al generar el mapa: {e}")
 
 if __name__ == "__main__":
-    create_interactive_map()
+    parser = argparse.ArgumentParser(description="Mapa interactivo de sismos animado por mes")
+    parser.add_argument('--mode', choices=['delta', 'plotly'], default='delta',
+                        help="delta: eventos una vez + rangos por cuadro; plotly: un cuadro de Plotly por mes")
+    parser.add_argument('--trail', type=int, default=0,
+                        help="Meses anteriores visibles como estela (-1 = acumulado desde el inicio)")
+    args = parser.parse_args()
+    create_interactive_map(args.mode, args.trail)
@@ -0,0 +1,175 @@
+import base64
+import json
+
+import numpy as np
+import pandas as pd
+
+# ----------------------------------------
+# PAYLOAD BINARIO COLUMNAR PARA EL DASHBOARD
+# ----------------------------------------
+# En vez de un JSON con una fila (y todos los nombres de campo) por sismo, los eventos viajan
+# como columnas en un único buffer binario:
+#   - latitud/longitud cuantizadas a 1e-4° y codificadas como diferencias (zigzag + varint);
+#   - magnitud en centésimas (Int16), profundidad en metros (Int32), año (Uint16);
+#   - etiquetas de cluster de cada K como Uint8Array;
+#   - municipio/departamento como códigos de diccionario más la lista de valores únicos.
+# Un encabezado JSON pequeño describe cada columna (tipo, offset, longitud). El buffer se
+# incrusta en base64 o se escribe como archivo aparte que la página descarga al abrir.
+ESCALA_COORDENADAS = 10_000
+ESCALA_MAGNITUD = 100
+ESCALA_PROFUNDIDAD = 1000
+_ALINEACION = 8
+
+def zigzag_varint(values):
+    """Enteros con signo -> bytes LEB128 de su codificación zigzag (vectorizado)."""
+    values = np.asarray(values, dtype='int64')
+    z = ((values << 1) ^ (values >> 63)).astype('uint64')
+    n_bytes = np.maximum(1, (np.floor(np.log2(np.maximum(z, 1).astype('float64'))).astype('int64') // 7) + 1)
+    width = int(n_bytes.max()) if len(z) else 1
+    shifts = (7 * np.arange(width)).astype('uint64')
+    groups = ((z[:, None] >> shifts[None, :]) & np.uint64(0x7F)).astype('uint8')
+    position = np.arange(width)[None, :]
+    groups[position < n_bytes[:, None] - 1] |= 0x80
+    return groups[position < n_bytes[:, None]]
+
+def delta_varint(values, scale):
+    """Valores reales -> enteros cuantizados a 1/scale -> diferencias consecutivas en varint."""
+    quantized = np.round(np.asarray(values, dtype='float64') * scale).astype('int64')
+    return zigzag_varint(np.diff(quantized, prepend=0))
+
+def dictionary_encode(values):
+    """Códigos (Uint8/Uint16) y lista de valores únicos; los nulos se guardan como null."""
+    codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=False)
+    dtype = 'uint8' if len(uniques) <= 1 << 8 else 'uint16' if len(uniques) <= 1 << 16 else 'uint32'
+    return codes.astype(dtype), [None if pd.isna(v) else str(v) for v in uniques]
+
+_JS_TYPES = {'uint8': 'Uint8Array', 'uint16': 'Uint16Array', 'uint32': 'Uint32Array',
+             'int16': 'Int16Array', 'int32': 'Int32Array', 'float32': 'Float32Array'}
+
+class PayloadWriter:
+    """Acumula columnas alineadas en un buffer y su descripción para el encabezado."""
+    def __init__(self, n):
+        self.n = int(n)
+        self.columns = {}
+        self.parts = []
+        self.size = 0
+
+    def _append(self, raw):
+        self.parts.append(raw)
+        offset = self.size
+        self.size += len(raw)
+        padding = -self.size % _ALINEACION
+        if padding:
+            self.parts.append(b'\0' * padding)
+            self.size += padding
+        return offset
+
+    def typed(self, name, values, dtype, scale=None):
+        array = np.ascontiguousarray(np.asarray(values).astype(dtype))
+        column = {'kind': 'typed', 'type': _JS_TYPES[dtype], 'offset': self._append(array.tobytes())}
+        if scale:
+            column['scale'] = scale
+        self.columns[name] = column
+
+    def delta(self, name, values, scale):
+        raw = delta_varint(values, scale).tobytes()
+        self.columns[name] = {'kind': 'delta', 'scale': scale, 'offset': self._append(raw), 'bytes': len(raw)}
+
+    def dictionary(self, name, values):
+        codes, uniques = dictionary_encode(values)
+        self.typed(name, codes, codes.dtype.name)
+        self.columns[name].update(kind='dict', values=uniques)
+
+    def header(self):
+        return {'n': self.n, 'columns': self.columns}
+
+    def to_bytes(self):
+        return b''.join(self.parts)
+
+def build_payload(df, cluster_cols, string_cols=('municipio_region', 'departamento')):
+    """Encabezado y buffer binario de los eventos del dashboard."""
+    writer = PayloadWriter(len(df))
+    writer.delta('latitude', df['latitude'], ESCALA_COORDENADAS)
+    writer.delta('longitude', df['longitude'], ESCALA_COORDENADAS)
+    writer.typed('mag', np.round(df['mag'].fillna(0) * ESCALA_MAGNITUD), 'int16', ESCALA_MAGNITUD)
+    writer.typed('depth', np.round(df['depth'].fillna(0) * ESCALA_PROFUNDIDAD), 'int32', ESCALA_PROFUNDIDAD)
+    writer.typed('year', df['year'], 'uint16')
+    for col in cluster_cols:
+        writer.typed(col, df[col], 'uint8')
+    for col in string_cols:
+        writer.dictionary(col, df[col])
+    return writer.header(), writer.to_bytes()
+
+def year_buckets(years, labels_by_k):
+    """
+    Conteos por (año, cluster) de cada K en orden año-mayor, con todos los años del rango
+    (también los vacíos). Con los eventos ordenados por año, su suma acumulada da el inicio de
+    cada tramo año/cluster: el navegador ordena por conteo y filtra por tramos contiguos.
+    """
+    years = np.asarray(years, dtype='int64')
+    first = int(years.min())
+    n_years = int(years.max()) - first + 1
+    counts = {}
+    for k, labels in labels_by_k.items():
+        cells = (years - first) * k + np.asarray(labels, dtype='int64')
+        counts[k] = np.bincount(cells, minlength=n_years * k).tolist()
+    return {'first_year': first, 'n_years': n_years, 'counts': counts}
+
+def payload_script(header, data, sidecar_url=None):
+    """
+    JavaScript que define `loadPayload()`: promesa con las columnas decodificadas en arreglos
+    tipados. Con `sidecar_url` el buffer se descarga de ese archivo; si no, va en base64.
+    """
+    if sidecar_url:
+        source = f"fetch({json.dumps(sidecar_url)}).then(response => response.arrayBuffer())"
+    else:
+        source = f"Promise.resolve(base64Buffer('{base64.b64encode(data).decode('ascii')}'))"
+    header_json = json.dumps(header, ensure_ascii=False).replace('</', '<\\/')
+    return f"""
+    const payloadHeader = {header_json};
+
+    function base64Buffer(b64) {{
+        const raw = atob(b64);
+        const bytes = new Uint8Array(raw.length);
+        for (let i = 0; i < raw.length; i++) bytes[i] = raw.charCodeAt(i);
+        return bytes.buffer;
+    }}
+
+    function decodeDelta(bytes, n, scale) {{
+        const out = new Float64Array(n);
+        // Aritmética de 32 bits: las diferencias de coordenadas (±3.6e6 a 1e-4°) caben de sobra
+        let pos = 0, acc = 0;
+        for (let i = 0; i < n; i++) {{
+            let v = 0, shift = 0, b;
+            do {{ b = bytes[pos++]; v |= (b & 0x7f) << shift; shift += 7; }} while (b & 0x80);
+            acc += (v >>> 1) ^ -(v & 1);
+            out[i] = acc / scale;
+        }}
+        return out;
+    }}
+
+    function decodePayload(buffer, header) {{
+        const data = {{ n: header.n }};
+        for (const [name, col] of Object.entries(header.columns)) {{
+            if (col.kind === 'delta') {{
+                data[name] = decodeDelta(new Uint8Array(buffer, col.offset, col.bytes), header.n, col.scale);
+                continue;
+            }}
+            const raw = new window[col.type](buffer, col.offset, header.n);
+            if (col.scale) {{
+                const scaled = new Float64Array(header.n);
+                for (let i = 0; i < header.n; i++) scaled[i] = raw[i] / col.scale;
+                data[name] = scaled;
+            }} else {{
+                data[name] = raw;
+            }}
+            if (col.kind === 'dict') data[name + '_values'] = col.values;
+        }}
+        return data;
+    }}
+
+    function loadPayload() {{
+        return {source}
+            .then(buffer => decodePayload(buffer, payloadHeader));
+    }}
+"""
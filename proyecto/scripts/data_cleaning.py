@@ -1,63 +1,168 @@
+import argparse
 import pandas as pd
 import os
 
+from event_store import (
+    EXPORT_CSV, STAGE_CSV, apply_schema, export_csv, record_csv_export, save_stage, write_stage_chunks,
+)
+from region_tagger import tag_events
+from seismic_data import CSV_DTYPES, WORLD_GEOJSON, event_columns, load_events
+
 # Configuración de rutas
-RAW_DATA_PATH = r"c:\Users\Arnold's\Documents\Repositorios Machine Learning\proyecto\data\earthquakes_raw.csv"
-CLEAN_DATA_PATH = r"c:\Users\Arnold's\Documents\Repositorios Machine Learning\proyecto\data\earthquakes_cleaned.csv"
+RAW_DATA_PATH = STAGE_CSV['raw']
+CLEAN_DATA_PATH = STAGE_CSV['cleaned']
+
+PAIS_OBJETIVO = 'Colombia'
+# Polígonos administrativos opcionales: (ruta GeoJSON, columna con el nombre, columna destino)
+ADMIN_POLYGONS = []
+
+# Columnas a eliminar (Métricas de error instrumental y baja completitud)
+COLUMNS_TO_DROP = [
+    'nst',             # Number of seismic stations (60% nulos)
+    'horizontalError', # Errores instrumentales
+    'magError',        # Errores instrumentales
+    'dmin',            # Distancia a la estación más cercana
+    'magNst',          # Estaciones para magnitud
+    'depthError',      # Errores instrumentales
+    'gap',             # Gap azimutal
+    'rms'              # Root Mean Square error
+]
+
+# Límites aproximados de Colombia
+LAT_MIN, LAT_MAX = -4.5, 13.5
+LON_MIN, LON_MAX = -82.0, -66.5
+
+# Filtros de calidad opcionales (None = desactivado)
+MAG_MINIMA = None
+TIPOS_EVENTO = None  # p. ej. ('earthquake',)
+
+# Filas por bloque en el modo por bloques
+FILAS_POR_BLOQUE = 200_000
+
+def _apply(df, name, mask, report):
+    # Aplica un predicado y acumula filas de entrada/salida en el reporte
+    entrada, salida = report.setdefault(name, [0, 0])
+    report[name] = [entrada + len(df), salida + int(mask.sum())]
+    return df[mask]
+
+def filter_events(df, report):
+    """Predicados de limpieza en orden (coordenadas, calidad y país); `report` acumula filas por predicado."""
+    df = _apply(df, 'bbox', (
+        (df['latitude'] >= LAT_MIN) & (df['latitude'] <= LAT_MAX) &
+        (df['longitude'] >= LON_MIN) & (df['longitude'] <= LON_MAX)
+    ).to_numpy(), report)
+
+    if MAG_MINIMA is not None:
+        df = _apply(df, 'magnitud', (df['mag'] >= MAG_MINIMA).to_numpy(), report)
+    if TIPOS_EVENTO is not None:
+        df = _apply(df, 'tipo_evento', df['type'].isin(TIPOS_EVENTO).to_numpy(), report)
+
+    # Filtro adicional por país: punto en polígono sobre world.geojson (los sismos costa
+    # afuera se asignan al país más cercano y quedan marcados con en_tierra=False)
+    if os.path.exists(WORLD_GEOJSON):
+        df = tag_events(df.copy(), WORLD_GEOJSON)
+        df = _apply(df, 'pais', (df['pais'] == PAIS_OBJETIVO).to_numpy(), report)
+        for path, name_column, column in ADMIN_POLYGONS:
+            if os.path.exists(path):
+                df = tag_events(df.copy(), path, name_column, column, land_column=None)
+    else:
+        # Sin polígonos disponibles: etiqueta de lugar (asegurar que mencione Colombia)
+        df = _apply(df, 'place', df['place'].astype(str).str.contains(PAIS_OBJETIVO, case=False).to_numpy(), report)
+    return df.copy()
+
+def print_report(report):
+    print("Filas por predicado (entrada -> salida):")
+    for name, (entrada, salida) in report.items():
+        print(f"   {name:<12} {entrada:>10} -> {salida:>10}  (-{entrada - salida})")
 
 def clean_data():
     print("--- Iniciando Limpieza de Datos (Fase 3) ---")
-    if not os.path.exists(RAW_DATA_PATH):
+    try:
+        all_columns = event_columns('raw')
+    except FileNotFoundError:
         print(f"Error: No se encuentra el archivo {RAW_DATA_PATH}")
         return
 
-    df = pd.read_csv(RAW_DATA_PATH)
-    initial_shape = df.shape
-    
-    # Columnas a eliminar (Métricas de error instrumental y baja completitud)
-    columns_to_drop = [
-        'nst',             # Number of seismic stations (60% nulos)
-        'horizontalError', # Errores instrumentales
-        'magError',        # Errores instrumentales
-        'dmin',            # Distancia a la estación más cercana
-        'magNst',          # Estaciones para magnitud
-        'depthError',      # Errores instrumentales
-        'gap',             # Gap azimutal
-        'rms'              # Root Mean Square error
-    ]
-    
-    # Eliminar solo las columnas que existan en el dataframe
-    existing_drops = [col for col in columns_to_drop if col in df.columns]
-    df_cleaned = df.drop(columns=existing_drops)
-    
+    # Eliminar solo las columnas que existan: las descartadas ni siquiera se leen
+    existing_drops = [col for col in COLUMNS_TO_DROP if col in all_columns]
+    df_cleaned = load_events('raw', columns=[col for col in all_columns if col not in existing_drops])
+    initial_shape = (len(df_cleaned), len(all_columns))
+
     # --- FILTRADO GEOGRÁFICO (SOLO COLOMBIA) ---
     print("Filtrando sismos fuera del territorio colombiano...")
-    
-    # Límites aproximados de Colombia
-    lat_min, lat_max = -4.5, 13.5
-    lon_min, lon_max = -82.0, -66.5
-    
-    # Filtro por coordenadas
-    df_colombia = df_cleaned[
-        (df_cleaned['latitude'] >= lat_min) & (df_cleaned['latitude'] <= lat_max) &
-        (df_cleaned['longitude'] >= lon_min) & (df_cleaned['longitude'] <= lon_max)
-    ].copy()
-    
-    # Filtro adicional por etiqueta de lugar (asegurar que mencione Colombia)
-    df_colombia = df_colombia[df_colombia['place'].str.contains('Colombia', case=False, na=False)]
-    
+    if not os.path.exists(WORLD_GEOJSON):
+        print(f"Advertencia: no se encontró {WORLD_GEOJSON}; se filtra por el texto de 'place'.")
+    report = {}
+    df_colombia = filter_events(df_cleaned, report)
+
     final_shape = df_colombia.shape
     deleted_count = initial_shape[0] - final_shape[0]
     deleted_percent = (deleted_count / initial_shape[0]) * 100
-    
+
     print(f"Registros iniciales: {initial_shape[0]}")
     print(f"Registros eliminados (fuera de Colombia): {deleted_count} ({deleted_percent:.2f}%)")
     print(f"Registros finales: {final_shape[0]}")
     print(f"Columnas eliminadas: {len(existing_drops)}")
-    
+    print_report(report)
+
     # Guardar dataset limpio
-    df_colombia.to_csv(CLEAN_DATA_PATH, index=False)
+    save_stage(df_colombia, 'cleaned')
     print(f"Dataset filtrado y limpio guardado en: {CLEAN_DATA_PATH}")
 
+def clean_data_streaming(input_path=RAW_DATA_PATH, output_path=CLEAN_DATA_PATH, chunksize=FILAS_POR_BLOQUE):
+    """
+    Limpieza por bloques para catálogos que no caben en memoria.
+
+    Solo se leen las columnas conservadas; cada bloque pasa por los mismos predicados que
+    `clean_data` y se escribe de inmediato (almacén columnar y CSV), así que la memoria
+    máxima depende de `chunksize` y no del tamaño del archivo.
+    """
+    print("--- Iniciando Limpieza de Datos por bloques (Fase 3) ---")
+    if not os.path.exists(input_path):
+        print(f"Error: No se encuentra el archivo {input_path}")
+        return
+
+    header = pd.read_csv(input_path, nrows=0).columns
+    keep = [col for col in header if col not in COLUMNS_TO_DROP]
+    dtypes = {col: dtype for col, dtype in CSV_DTYPES.items() if col in keep}
+    if not os.path.exists(WORLD_GEOJSON):
+        print(f"Advertencia: no se encontró {WORLD_GEOJSON}; se filtra por el texto de 'place'.")
+
+    report = {}
+    tmp_csv = f"{output_path}.tmp"
+
+    def cleaned_chunks():
+        first = True
+        for i, chunk in enumerate(pd.read_csv(input_path, usecols=keep, dtype=dtypes, chunksize=chunksize)):
+            chunk = apply_schema(filter_events(chunk, report))
+            if EXPORT_CSV:
+                export_csv(chunk, tmp_csv, mode='w' if first else 'a', header=first)
+            first = False
+            print(f"   Bloque {i + 1}: {report['bbox'][0]} filas leídas")
+            yield chunk
+
+    total = write_stage_chunks(cleaned_chunks(), 'cleaned')
+    if EXPORT_CSV and os.path.exists(tmp_csv):
+        os.replace(tmp_csv, output_path)
+        record_csv_export('cleaned', output_path)
+
+    leidas = report['bbox'][0] if report else 0
+    print(f"Registros iniciales: {leidas}")
+    print(f"Registros finales: {total}")
+    print(f"Columnas eliminadas: {len(header) - len(keep)}")
+    print_report(report)
+    print(f"Dataset filtrado y limpio guardado en: {output_path}")
+
 if __name__ == "__main__":
-    clean_data()
+    parser = argparse.ArgumentParser(description="Limpieza del catálogo sísmico")
+    parser.add_argument('--stream', action='store_true',
+                        help="Limpieza por bloques con memoria constante (catálogos grandes)")
+    parser.add_argument('--input', default=RAW_DATA_PATH, help="CSV de entrada para el modo por bloques")
+    parser.add_argument('--output', default=CLEAN_DATA_PATH, help="CSV de salida para el modo por bloques")
+    parser.add_argument('--chunksize', type=int, default=FILAS_POR_BLOQUE, help="Filas por bloque")
+    args = parser.parse_args()
+
+    if args.stream:
+        clean_data_streaming(args.input, args.output, args.chunksize)
+    else:
+        clean_data()
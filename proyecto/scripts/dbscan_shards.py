@@ -0,0 +1,199 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.sparse.csgraph import connected_components
+from sklearn.cluster import DBSCAN
+from threadpoolctl import threadpool_limits
+
+from cell_list import build_cells, core_graph, neighbor_counts, synthetic_catalog
+from dbscan_sweep import R_TIERRA_KM
+
+# ----------------------------------------
+# DBSCAN GLOBAL POR TESELAS (SHARDS) CON HALO
+# ----------------------------------------
+# El catálogo se parte en teselas lat/lon; cada tesela recibe sus eventos más un halo con
+# los eventos a menos de eps de su borde, así que todos los vecinos de sus eventos propios
+# están en la tesela. Dos fases en el pool de procesos:
+#   1. conteo de vecinos de los eventos propios -> máscara global de puntos núcleo;
+#   2. clusters locales (componentes entre núcleos) y aristas borde -> núcleo.
+# Un núcleo del halo aparece en dos teselas: union-find une los clusters locales que lo
+# comparten. Cada proceso solo recibe los eventos de su tesela (memoria acotada por tesela).
+TAMANO_TESELA_GRADOS = 10.0
+
+def _halo_width(lat_max, eps):
+    # Máxima diferencia de longitud (grados) a distancia eps de un punto con |lat| <= lat_max
+    cos_max = np.cos(np.radians(np.minimum(lat_max, 90.0)))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where((cos_max > np.sin(eps)) & (eps < np.pi / 2),
+                        np.degrees(np.arcsin(np.minimum(np.sin(eps) / cos_max, 1.0))), 360.0)
+
+def plan_tiles(lat, lon, eps_km, tile_deg=TAMANO_TESELA_GRADOS):
+    """
+    Reparte los eventos en teselas: lista de (índices globales, máscara de eventos propios).
+
+    Las franjas de latitud miden al menos eps y cada franja tiene columnas al menos tan anchas
+    como su halo (más anchas hacia los polos), de modo que el halo solo alcanza las 3×3
+    teselas vecinas. Solo se devuelven teselas con eventos propios.
+    """
+    lat = np.asarray(lat, dtype='float64')
+    lon = np.asarray(lon, dtype='float64')
+    eps = eps_km / R_TIERRA_KM
+    eps_deg = np.degrees(eps)
+    n_bands = max(1, int(np.floor(180.0 / max(tile_deg, eps_deg))))
+    height = 180.0 / n_bands
+    lower = -90.0 + height * np.arange(n_bands)
+    upper = lower + height
+    halo = _halo_width(np.maximum(np.abs(lower - eps_deg), np.abs(upper + eps_deg)), eps)
+    n_cols = np.maximum(1, np.floor(360.0 / np.maximum(tile_deg, halo * (1 + 1e-9)))).astype('int64')
+    band_offset = np.concatenate([[0], np.cumsum(n_cols)])
+
+    band = np.clip(((lat + 90.0) / height).astype('int64'), 0, n_bands - 1)
+    lon_norm = (lon + 180.0) / 360.0
+    owner = band_offset[band] + np.floor(lon_norm * n_cols[band]).astype('int64') % n_cols[band]
+
+    points, tiles = [np.arange(len(lat))], [owner]
+    for dr in (-1, 0, 1):
+        target = np.clip(band + dr, 0, n_bands - 1)
+        valid = (band + dr >= 0) & (band + dr < n_bands)
+        valid &= (lat >= lower[target] - eps_deg) & (lat <= upper[target] + eps_deg)
+        cols = n_cols[target]
+        width = 360.0 / cols
+        for dc in (-1, 0, 1):
+            col = (np.floor(lon_norm * cols).astype('int64') + dc) % cols
+            # Distancia en longitud (circular) del evento al intervalo de la tesela
+            center = (col + 0.5) * width - 180.0
+            delta = np.abs((lon - center + 180.0) % 360.0 - 180.0)
+            near = valid & ((cols == 1) | (delta - width / 2 <= halo[target]))
+            points.append(np.flatnonzero(near))
+            tiles.append(band_offset[target[near]] + col[near])
+
+    points, tiles = np.concatenate(points), np.concatenate(tiles)
+    pairs = np.unique(tiles * len(lat) + points)
+    tiles, points = pairs // len(lat), pairs % len(lat)
+    split = np.flatnonzero(np.diff(tiles)) + 1
+    plan = []
+    for tile_points, tile in zip(np.split(points, split), tiles[np.concatenate([[0], split])]):
+        own = owner[tile_points] == tile
+        if own.any():
+            plan.append((tile_points, own))
+    return plan
+
+def _init_worker():
+    threadpool_limits(1)
+
+def _tile_counts(lat, lon, own, eps_km):
+    counts = neighbor_counts(lat, lon, eps_km, build_cells(lat, lon, eps_km))
+    return counts[own]
+
+def _tile_clusters(lat, lon, counts, eps_km, min_samples):
+    """Componentes locales de los núcleos de la tesela y aristas borde -> núcleo (índices locales)."""
+    graph, core = core_graph(lat, lon, eps_km, min_samples, counts=counts)
+    # Las estrellas entre núcleos son simétricas; las aristas de borde van en un solo sentido
+    _, comp = connected_components(graph, directed=True, connection='strong')
+    core_idx = np.flatnonzero(core)
+    coo = graph.tocoo()
+    border = ~core[coo.row]
+    return core_idx, comp[core_idx], coo.row[border], coo.col[border]
+
+def union_find(n, a, b):
+    """Raíz (menor nodo) de cada uno de los `n` nodos tras unir los pares (a, b); vectorizado."""
+    parent = np.arange(n)
+    a, b = np.asarray(a, dtype='int64'), np.asarray(b, dtype='int64')
+    while True:
+        # Compresión de caminos completa y enganche de la raíz mayor a la menor
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+        ra, rb = parent[a], parent[b]
+        differ = ra != rb
+        if not differ.any():
+            return parent
+        np.minimum.at(parent, np.maximum(ra[differ], rb[differ]), np.minimum(ra[differ], rb[differ]))
+
+def sharded_dbscan(lat, lon, eps_km, min_samples, tile_deg=TAMANO_TESELA_GRADOS, workers=None):
+    """
+    DBSCAN haversine por teselas en paralelo. Devuelve (etiquetas, conteo de vecinos) con las
+    mismas etiquetas que DBSCAN de sklearn sobre el catálogo completo.
+    """
+    lat = np.asarray(lat, dtype='float64')
+    lon = np.asarray(lon, dtype='float64')
+    n = len(lat)
+    labels = np.full(n, -1, dtype='int64')
+    counts = np.zeros(n, dtype='int64')
+    if n == 0:
+        return labels, counts
+
+    # Teselas más pobladas primero para equilibrar el pool
+    plan = sorted(plan_tiles(lat, lon, eps_km, tile_deg), key=lambda tile: -len(tile[0]))
+    workers = workers or min(len(plan), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(_tile_counts, lat[idx], lon[idx], own, eps_km) for idx, own in plan]
+        for (idx, own), future in zip(plan, futures):
+            counts[idx[own]] = future.result()
+
+        futures = [pool.submit(_tile_clusters, lat[idx], lon[idx], counts[idx], eps_km, min_samples)
+                   for idx, _ in plan]
+        members, nodes, border_rows, border_cols = [], [], [], []
+        offset = 0
+        for (idx, _), future in zip(plan, futures):
+            core_idx, comp, b_rows, b_cols = future.result()
+            members.append(idx[core_idx])
+            nodes.append(comp + offset)
+            offset += comp.max() + 1 if len(comp) else 0
+            border_rows.append(idx[b_rows])
+            border_cols.append(idx[b_cols])
+
+    core = counts >= min_samples
+    if not core.any():
+        return labels, counts
+
+    # Un núcleo presente en varias teselas une sus clusters locales
+    members, nodes = np.concatenate(members), np.concatenate(nodes)
+    by_point = np.argsort(members, kind='stable')
+    members, nodes = members[by_point], nodes[by_point]
+    same = members[1:] == members[:-1]
+    root = union_find(offset, nodes[1:][same], nodes[:-1][same])
+
+    first = np.flatnonzero(np.concatenate([[True], ~same]))
+    cluster = np.full(n, -1, dtype='int64')
+    cluster[members[first]] = root[nodes[first]]
+
+    # Numeración de sklearn: clusters en el orden de su menor punto núcleo
+    core_idx = np.flatnonzero(core)
+    _, order = np.unique(cluster[core_idx], return_index=True)
+    rank = np.empty(offset, dtype='int64')
+    rank[cluster[core_idx[np.sort(order)]]] = np.arange(len(order))
+    labels[core_idx] = rank[cluster[core_idx]]
+
+    border_rows, border_cols = np.concatenate(border_rows), np.concatenate(border_cols)
+    if len(border_rows):
+        no_label = np.iinfo('int64').max
+        border_labels = np.full(n, no_label)
+        np.minimum.at(border_labels, border_rows, labels[border_cols])
+        has = border_labels != no_label
+        labels[has] = border_labels[has]
+    return labels, counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verificación del DBSCAN por teselas frente a sklearn")
+    parser.add_argument('--size', type=int, default=100_000, help="Eventos del catálogo sintético")
+    parser.add_argument('--eps-km', type=float, default=50, help="Radio de vecindad (km)")
+    parser.add_argument('--min-samples', type=int, default=15, help="Mínimo de sismos para un punto núcleo")
+    parser.add_argument('--tile-deg', type=float, default=TAMANO_TESELA_GRADOS, help="Tamaño de tesela (grados)")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos del pool")
+    args = parser.parse_args()
+
+    lat, lon = synthetic_catalog(args.size)
+    t0 = time.perf_counter()
+    labels, _ = sharded_dbscan(lat, lon, args.eps_km, args.min_samples, args.tile_deg, args.workers)
+    t_shards = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    ref = DBSCAN(eps=args.eps_km / R_TIERRA_KM, min_samples=args.min_samples, metric='haversine',
+                 algorithm='ball_tree').fit_predict(np.radians(np.column_stack([lat, lon])))
+    t_ref = time.perf_counter() - t0
+    print(f"Teselas: {t_shards:.2f}s | sklearn: {t_ref:.2f}s | etiquetas distintas: {(labels != ref).sum()}")
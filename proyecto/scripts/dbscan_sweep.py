@@ -0,0 +1,125 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from sklearn.cluster import DBSCAN
+from sklearn.neighbors import NearestNeighbors
+from threadpoolctl import threadpool_limits
+
+# ----------------------------------------
+# BARRIDO DE PARÁMETROS DBSCAN SOBRE UN ÚNICO GRAFO DE VECINOS
+# ----------------------------------------
+# La búsqueda de vecinos (lo costoso) se hace una sola vez con el radio máximo del barrido.
+# Para cada eps menor se recorta el grafo conservando las aristas con distancia <= eps y los
+# clusters se expanden sobre ese grafo disperso: con DBSCAN(metric='precomputed') o con
+# `dbscan_from_graph`, que da las mismas etiquetas en operaciones vectorizadas O(aristas).
+# Las distancias 0 (sismos con las mismas coordenadas) se guardan como ceros explícitos:
+# para DBSCAN una entrada almacenada es un vecino, así que el recorte no debe eliminarlas.
+R_TIERRA_KM = 6371.0
+
+_WORKER_GRAPH = None
+
+def radius_graph(lat, lon, max_eps_km):
+    """Grafo disperso (CSR) de distancias haversine en radianes entre eventos a menos de `max_eps_km`."""
+    coords = np.radians(np.column_stack([lat, lon]).astype('float64'))
+    nn = NearestNeighbors(radius=max_eps_km / R_TIERRA_KM, metric='haversine', algorithm='ball_tree').fit(coords)
+    graph = nn.radius_neighbors_graph(mode='distance').tocsr()
+    # Columnas ordenadas una sola vez: los subgrafos recortados heredan el orden
+    graph.sort_indices()
+    return graph
+
+def _select_edges(n, rows, cols, data, keep):
+    # Subgrafo CSR con las aristas `keep` (filas ya ordenadas): sin pasar por COO ni reordenar
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(rows[keep], minlength=n))])
+    return sparse.csr_matrix((data[keep], cols[keep], indptr), shape=(n, n))
+
+def threshold_graph(graph, eps_rad):
+    """Vista del grafo con las aristas de distancia <= eps (conserva los ceros explícitos)."""
+    rows = np.repeat(np.arange(graph.shape[0]), np.diff(graph.indptr))
+    return _select_edges(graph.shape[0], rows, graph.indices, graph.data, graph.data <= eps_rad)
+
+def dbscan_from_graph(graph, min_samples, core=None):
+    """
+    Etiquetas DBSCAN a partir del grafo de vecinos (CSR), idénticas a las de sklearn:
+    - núcleo: vecinos + el propio punto >= min_samples;
+    - clusters: componentes conexas del subgrafo núcleo-núcleo, numeradas por el menor índice
+      de sus puntos núcleo (el orden en que sklearn las descubre);
+    - borde: la menor etiqueta entre sus vecinos núcleo (el primer cluster que lo alcanza).
+
+    Si se pasa `core` (máscara de núcleos ya calculada), el grafo puede omitir las aristas
+    hacia puntos que no son núcleo.
+    """
+    n = graph.shape[0]
+    rows = np.repeat(np.arange(n), np.diff(graph.indptr))
+    cols = graph.indices
+    off_diag = rows != cols
+
+    if core is None:
+        core = np.bincount(rows[off_diag], minlength=n) + 1 >= min_samples
+    labels = np.full(n, -1, dtype='int64')
+    if not core.any():
+        return labels
+
+    both = off_diag & core[rows] & core[cols]
+    core_graph = _select_edges(n, rows, cols, np.ones(len(cols), dtype='int8'), both)
+    # El grafo es simétrico: las componentes fuertes son las conexas y se evita la traspuesta
+    _, comp = connected_components(core_graph, directed=True, connection='strong')
+    core_idx = np.flatnonzero(core)
+    _, first = np.unique(comp[core_idx], return_index=True)
+    rank = np.empty(comp.max() + 1, dtype='int64')
+    rank[comp[core_idx[np.sort(first)]]] = np.arange(len(first))
+    labels[core_idx] = rank[comp[core_idx]]
+
+    to_core = off_diag & ~core[rows] & core[cols]
+    if to_core.any():
+        no_label = np.iinfo('int64').max
+        border_labels = np.full(n, no_label)
+        np.minimum.at(border_labels, rows[to_core], labels[cols[to_core]])
+        has = border_labels != no_label
+        labels[has] = border_labels[has]
+    return labels
+
+def _init_worker(graph):
+    global _WORKER_GRAPH
+    _WORKER_GRAPH = graph
+    threadpool_limits(1)
+
+def _run_combo(eps_km, min_samples, engine):
+    graph = threshold_graph(_WORKER_GRAPH, eps_km / R_TIERRA_KM)
+    if engine == 'sklearn':
+        labels = DBSCAN(eps=eps_km / R_TIERRA_KM, min_samples=min_samples, metric='precomputed').fit_predict(graph)
+    else:
+        labels = dbscan_from_graph(graph, min_samples)
+    return eps_km, min_samples, labels
+
+def summarize_labels(labels):
+    clustered = labels[labels >= 0]
+    sizes = np.bincount(clustered) if len(clustered) else np.zeros(0, dtype='int64')
+    return {
+        'hotspots': int((sizes > 0).sum()),
+        'ruido_pct': round(100.0 * (labels == -1).mean(), 2) if len(labels) else 0.0,
+        'mayor_hotspot': int(sizes.max()) if len(sizes) else 0,
+    }
+
+def sweep_dbscan(lat, lon, eps_values_km, min_samples_values, workers=None, engine='graph', return_labels=False):
+    """
+    Ejecuta DBSCAN para cada combinación (eps, min_samples) reutilizando un grafo de vecinos
+    construido con el eps máximo. `engine` = 'graph' (vectorizado) o 'sklearn' (precomputed).
+    Devuelve la tabla comparativa (y las etiquetas si se piden).
+    """
+    graph = radius_graph(lat, lon, max(eps_values_km))
+    combos = [(eps, ms) for eps in sorted(eps_values_km) for ms in sorted(min_samples_values)]
+    workers = workers or min(len(combos), os.cpu_count() or 1)
+
+    rows, labels_by_combo = [], {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(graph,)) as pool:
+        eps_list, ms_list = zip(*combos)
+        for eps, ms, labels in pool.map(_run_combo, eps_list, ms_list, [engine] * len(combos)):
+            rows.append({'eps_km': eps, 'min_samples': ms, **summarize_labels(labels)})
+            if return_labels:
+                labels_by_combo[(eps, ms)] = labels
+    table = pd.DataFrame(rows)
+    return (table, labels_by_combo) if return_labels else table
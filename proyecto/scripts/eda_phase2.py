@@ -6,14 +6,15 @@ import plotly.express as px
 import plotly.graph_objects as go
 import os
 
+from seismic_data import DOC_DIR, VIS_DIR, load_events
+
 # Configuración
-path_raw = 'data/earthquakes_raw.csv'
-output_dir = 'documentacion/visualizaciones'
+output_dir = VIS_DIR
 os.makedirs(output_dir, exist_ok=True)
 
 def run_eda_phase2():
     print("Iniciando Análisis Exploratorio de Datos (Fase 2)...")
-    df = pd.read_csv(path_raw)
+    df = load_events('raw')
     
     # 1. Conteo de registros
     total_registros = len(df)
@@ -64,7 +65,7 @@ def run_eda_phase2():
                                 size="mag", color_continuous_scale=px.colors.cyclical.IceFire, 
                                 size_max=15, zoom=4, mapbox_style="carto-positron",
                                 title="Distribución Sísmica por Profundidad")
-    fig_depth.write_html(f'documentacion/mapa_profundidad.html')
+    fig_depth.write_html(os.path.join(DOC_DIR, 'mapa_profundidad.html'))
     
     # 5.3 Mapa Interactivo: Lat vs Lon (Color por Magnitud)
     print("Generando Mapa: Color por Magnitud...")
@@ -72,11 +73,11 @@ def run_eda_phase2():
                                 size="mag", color_continuous_scale=px.colors.sequential.YlOrRd, 
                                 size_max=15, zoom=4, mapbox_style="carto-positron",
                                 title="Distribución Sísmica por Magnitud")
-    fig_mag.write_html(f'documentacion/mapa_magnitud.html')
+    fig_mag.write_html(os.path.join(DOC_DIR, 'mapa_magnitud.html'))
     
     # Guardar resultados en CSV para el reporte
-    desc_stats.to_csv('documentacion/metricas_descriptivas.csv')
-    corr_pearson.to_csv('documentacion/correlacion_pearson.csv')
+    desc_stats.to_csv(os.path.join(DOC_DIR, 'metricas_descriptivas.csv'))
+    corr_pearson.to_csv(os.path.join(DOC_DIR, 'correlacion_pearson.csv'))
     
     print("\n--- Ejecución completada con éxito ---")
     print(f"Visualizaciones guardadas en: {output_dir}")
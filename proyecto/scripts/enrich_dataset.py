@@ -1,13 +1,18 @@
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 
+from event_store import STAGE_CSV, save_stage
+from fault_index import get_fault_index, nearest_fault_distance
+from grid_index import RESOLUCION_ZONA, add_density_columns, column_name
+from place_resolver import load_place_index, resolve_places
+from seismic_data import FAULTS_GEOJSON, VIS_DIR, load_events
+
 # Configuración
-input_path = 'data/earthquakes_cleaned.csv'
-output_path = 'data/earthquakes_enriched.csv'
-viz_dir = 'documentacion/visualizaciones'
+input_path = STAGE_CSV['cleaned']
+output_path = STAGE_CSV['enriched']
+viz_dir = VIS_DIR
 os.makedirs(viz_dir, exist_ok=True)
 
 # Coordenadas aproximadas de fallas geológicas principales en Colombia
@@ -20,6 +25,10 @@ FALLAS_COLOMBIA = [
     {"nombre": "Falla de Murindo", "lat": 6.8, "lon": -76.8}
 ]
 
+RADIO_INFLUENCIA_KM = 100  # Umbral de influencia de una falla
+# Máximo de celdas (eventos x fallas) de la matriz de distancias por bloque: acota la memoria
+MAX_CELDAS_BLOQUE = 5_000_000
+
 def haversine(lat1, lon1, lat2, lon2):
     R = 6371  # Radio de la Tierra en km
     phi1, phi2 = np.radians(lat1), np.radians(lat2)
@@ -28,66 +37,47 @@ def haversine(lat1, lon1, lat2, lon2):
     a = np.sin(dphi / 2)**2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2)**2
     return 2 * R * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
 
-def get_municipality(place):
-    if pd.isna(place): return "Desconocido"
-    parts = place.split(', ')
-    if len(parts) > 1:
-        sub_parts = parts[0].split(' of ')
-        return sub_parts[-1]
-    return place
-
-import unicodedata
+def fault_proximity(lat, lon, fallas=FALLAS_COLOMBIA, radius_km=RADIO_INFLUENCIA_KM,
+                    max_cells=MAX_CELDAS_BLOQUE):
+    """
+    Distancias evento-falla en bloques de una matriz N x F (una sola pasada de NumPy).
 
-def normalize_text(text):
-    if not isinstance(text, str): return ""
-    # Eliminar acentos y convertir a minúsculas
-    text = unicodedata.normalize('NFD', text).encode('ascii', 'ignore').decode('utf-8')
-    return text.strip().lower()
-
-# Cargar tablas de referencia oficiales
-print("Cargando base de datos oficial de municipios y departamentos...")
-try:
-    df_deptos_ref = pd.read_csv('data/TBL_DEPARTAMENTOS.csv', header=None, names=['id_depto', 'departamento'], encoding='latin1')
-    df_mun_ref = pd.read_csv('data/TBL_MUNICIPIOS.csv', header=None, names=['id_mun', 'municipio', 'id_depto'], encoding='latin1')
-    
-    # Limpiar espacios
-    df_deptos_ref['departamento'] = df_deptos_ref['departamento'].str.strip()
-    df_mun_ref['municipio'] = df_mun_ref['municipio'].str.strip()
-    
-    # Crear un diccionario de búsqueda: municipio_normalizado -> departamento
-    df_ref = df_mun_ref.merge(df_deptos_ref, on='id_depto')
-    df_ref['municipio_norm'] = df_ref['municipio'].apply(normalize_text)
-    
-    LOOKUP_GEOGRAFICO = dict(zip(df_ref['municipio_norm'], df_ref['departamento']))
-except Exception as e:
-    print(f"Advertencia: No se pudo cargar la base de datos oficial ({e}). Usando fallback.")
-    LOOKUP_GEOGRAFICO = {}
+    Devuelve, por evento, el índice de la falla más cercana, su distancia en km y el
+    número de fallas dentro de `radius_km`.
+    """
+    lat = np.asarray(lat, dtype='float64')
+    lon = np.asarray(lon, dtype='float64')
+    f_lat = np.array([f['lat'] for f in fallas], dtype='float64')
+    f_lon = np.array([f['lon'] for f in fallas], dtype='float64')
 
-def get_department(municipality):
-    m_norm = normalize_text(municipality)
-    
-    # 1. Intentar match exacto en la base oficial
-    if m_norm in LOOKUP_GEOGRAFICO:
-        return LOOKUP_GEOGRAFICO[m_norm].title()
-    
-    # 2. Fallback inteligente para etiquetas genéricas
-    if "northern colombia" in m_norm: return "Norte de Colombia"
-    if "off the coast" in m_norm or "offshore" in m_norm: return "Océano Pacífico"
-    if "boundary" in m_norm: return "Zona Fronteriza"
-    if "mountain" in m_norm: return "Zona Montañosa"
-    if "near the" in m_norm: return municipality.replace("near the ", "").capitalize()
-    if "near" in m_norm: return municipality.replace("near ", "").capitalize()
-    
-    return municipality # Si no hay match, dejar el nombre original del lugar
+    n = len(lat)
+    nearest = np.empty(n, dtype='int64')
+    distance = np.empty(n, dtype='float64')
+    within = np.empty(n, dtype='int64')
+    chunk = max(1, max_cells // max(len(fallas), 1))
+    for start in range(0, n, chunk):
+        end = min(start + chunk, n)
+        d = haversine(lat[start:end, None], lon[start:end, None], f_lat[None, :], f_lon[None, :])
+        idx = d.argmin(axis=1)
+        nearest[start:end] = idx
+        distance[start:end] = d[np.arange(end - start), idx]
+        within[start:end] = (d < radius_km).sum(axis=1)
+    return nearest, distance, within
 
 def enrich_data():
     print("Cargando datos...")
-    df = pd.read_csv(input_path)
+    df = load_events('cleaned')
     
     # 1. Extraer Municipio/Región y Departamento
     print("Extrayendo municipios y departamentos...")
-    df['municipio_region'] = df['place'].apply(get_municipality)
-    df['departamento'] = df['municipio_region'].apply(get_department)
+    # Cargar índice de referencia oficial (municipio -> departamento + trigramas)
+    try:
+        index = load_place_index()
+    except Exception as e:
+        print(f"Advertencia: No se pudo cargar la base de datos oficial ({e}). Usando fallback.")
+        index = {'lookup': {}, 'trigrams': {}}
+    df['municipio_region'], df['departamento'] = resolve_places(df['place'], index)
+    print(f"   {df['place'].nunique()} lugares únicos resueltos para {len(df)} eventos.")
     
     # 2. Magnitud vs Profundidad (Interacción)
     # Una métrica que combine ambos. Por ejemplo: mag / log1p(depth) 
@@ -97,24 +87,36 @@ def enrich_data():
     safe_depth = np.maximum(df['depth'], 0.1)
     df['mag_depth_ratio'] = df['mag'] / np.log1p(safe_depth)
     
-    # 3. Sismos por Zona (Frecuencia en un radio de 0.5 grados ~55km)
+    # 3. Sismos por Zona (conteos en grilla de 0.05°, 0.1°, 0.5° y 1°, y en un radio de 50 km)
     print("Calculando densidad de sismos por zona...")
     # Usamos un agrupamiento por grid simple para aproximar zonas
     df['grid_lat'] = df['latitude'].round(1)
     df['grid_lon'] = df['longitude'].round(1)
-    zona_counts = df.groupby(['grid_lat', 'grid_lon']).size().reset_index(name='sismos_por_zona')
-    df = df.merge(zona_counts, on=['grid_lat', 'grid_lon'], how='left')
+    df = add_density_columns(df)
+    df = df.rename(columns={column_name(RESOLUCION_ZONA): 'sismos_por_zona'})
     
     # 4. Proximidad a Fallas Geológicas
     print("Identificando proximidad a fallas...")
-    def check_fault_proximity(row):
-        for falla in FALLAS_COLOMBIA:
-            dist = haversine(row['latitude'], row['longitude'], falla['lat'], falla['lon'])
-            if dist < 100: # Umbral de 100km de influencia
-                return f"Cerca de {falla['nombre']}"
-        return "Sin falla principal cercana"
-    
-    df['proximidad_falla'] = df.apply(check_fault_proximity, axis=1)
+    nearest, distance, within = fault_proximity(df['latitude'].to_numpy(), df['longitude'].to_numpy())
+    nombres = np.array([f['nombre'] for f in FALLAS_COLOMBIA])
+    df['falla_cercana'] = nombres[nearest]
+    df['distancia_falla_km'] = distance.round(2)
+    df['fallas_en_radio'] = within
+    df['proximidad_falla'] = np.where(
+        distance < RADIO_INFLUENCIA_KM,
+        np.char.add('Cerca de ', df['falla_cercana'].to_numpy().astype(str)),
+        'Sin falla principal cercana'
+    )
+
+    # 4b. Distancia a la traza real de falla más cercana (Atlas Geológico 2020)
+    if os.path.exists(FAULTS_GEOJSON):
+        print("Calculando distancia a las trazas reales de falla...")
+        owner, dist_real = nearest_fault_distance(df['latitude'].to_numpy(), df['longitude'].to_numpy())
+        nombres_reales = np.array(get_fault_index()['names'])
+        df['falla_real_cercana'] = nombres_reales[owner]
+        df['distancia_falla_real_km'] = dist_real.round(2)
+    else:
+        print(f"Advertencia: no se encontró {FAULTS_GEOJSON}; se omite la distancia a trazas reales.")
     
     # 5. Generar Boxplots
     print("Generando visualizaciones comparativas...")
@@ -147,7 +149,7 @@ def enrich_data():
     plt.close()
 
     # 6. Guardar Dataset
-    df.to_csv(output_path, index=False)
+    save_stage(df, 'enriched')
     print(f"Dataset enriquecido guardado en: {output_path}")
 
 if __name__ == "__main__":
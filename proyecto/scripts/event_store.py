@@ -0,0 +1,294 @@
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# ----------------------------------------
+# ALMACÉN COLUMNAR DE EVENTOS (PARQUET PARTICIONADO POR AÑO)
+# ----------------------------------------
+# Cada etapa del pipeline (raw, cleaned, enriched, clustered, kmeans, classified) es una tabla:
+#   data/store/<etapa>/year=YYYY/part-0.parquet
+# Los tipos se declaran una sola vez aquí, de modo que ninguna etapa vuelve a parsear
+# texto: coordenadas en float32, cadenas repetitivas como categorías y `time` ya convertido.
+# La partición agrupa las filas por año; la columna ORDER_COLUMN guarda la posición original
+# de cada fila y `read_stage` la restablece (el CSV exportado sale en el mismo orden de siempre).
+# Las rutas se resuelven respecto a la carpeta del proyecto, no al directorio de trabajo.
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(PROJECT_DIR, 'data')
+STORE_DIR = os.path.join(DATA_DIR, 'store')
+
+STAGES = ('raw', 'cleaned', 'enriched', 'clustered', 'kmeans', 'classified')
+
+# Ruta CSV equivalente de cada etapa (se sigue exportando para los reportes y la revisión manual)
+STAGE_CSV = {
+    'raw': os.path.join(DATA_DIR, 'earthquakes_raw.csv'),
+    'cleaned': os.path.join(DATA_DIR, 'earthquakes_cleaned.csv'),
+    'enriched': os.path.join(DATA_DIR, 'earthquakes_enriched.csv'),
+    'clustered': os.path.join(DATA_DIR, 'earthquakes_clustered.csv'),
+    'kmeans': os.path.join(DATA_DIR, 'earthquakes_kmeans.csv'),
+    'classified': os.path.join(DATA_DIR, 'earthquakes_classified.csv'),
+}
+
+# Exportar también el CSV de cada etapa al guardar
+EXPORT_CSV = True
+# Tamaño/mtime del CSV exportado junto con la tabla (el prefijo '_' lo oculta a pyarrow)
+CSV_EXPORT_META = '_csv_export.json'
+
+FLOAT32_COLUMNS = ['latitude', 'longitude']
+DATETIME_COLUMNS = ['time', 'updated']
+CATEGORY_COLUMNS = [
+    'place', 'departamento', 'municipio_region',
+    'proximidad_falla', 'falla_cercana', 'falla_real_cercana',
+    'magType', 'net', 'type', 'status', 'locationSource', 'magSource',
+    'nivel_riesgo', 'zona_asignada', 'es_zona_segura', 'pais',
+]
+
+# Posición de cada fila en la tabla escrita (no se expone a los scripts)
+ORDER_COLUMN = '_orden'
+
+PARTITIONING = ds.partitioning(pa.schema([('year', pa.int16())]), flavor='hive')
+
+def apply_schema(df):
+    """Convierte un DataFrame (p. ej. leído de CSV) a los tipos declarados del almacén."""
+    df = df.copy()
+    for col in FLOAT32_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('float32')
+    for col in DATETIME_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.DatetimeTZDtype):
+            df[col] = pd.to_datetime(df[col], utc=True, format='ISO8601')
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
+
+def stage_path(stage, store_dir=STORE_DIR):
+    return os.path.join(store_dir, stage)
+
+def stage_exists(stage, store_dir=STORE_DIR):
+    return os.path.isdir(stage_path(stage, store_dir))
+
+def write_stage(df, stage, store_dir=STORE_DIR):
+    """Reescribe la tabla de una etapa, un archivo Parquet por año de `time`."""
+    df = apply_schema(df)
+    df[ORDER_COLUMN] = np.arange(len(df), dtype='int64')
+    final_dir = stage_path(stage, store_dir)
+    tmp_dir = f"{final_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    years = df['time'].dt.year
+    for year, part in df.groupby(years, sort=True):
+        part_dir = os.path.join(tmp_dir, f"year={int(year)}")
+        os.makedirs(part_dir, exist_ok=True)
+        table = pa.Table.from_pandas(part, preserve_index=False)
+        pq.write_table(table, os.path.join(part_dir, 'part-0.parquet'))
+    os.makedirs(tmp_dir, exist_ok=True)
+    _swap_in(tmp_dir, final_dir)
+
+def _swap_in(tmp_dir, final_dir):
+    # Intercambio de directorios: los lectores nunca ven una tabla a medio escribir
+    old_dir = f"{final_dir}.old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.isdir(final_dir):
+        os.replace(final_dir, old_dir)
+    os.replace(tmp_dir, final_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+def _stable_schema(schema):
+    # Índices de diccionario de ancho fijo: todos los bloques de una etapa comparten esquema
+    fields = []
+    for field in schema:
+        if pa.types.is_dictionary(field.type) or (pa.types.is_null(field.type) and field.name in CATEGORY_COLUMNS):
+            field = field.with_type(pa.dictionary(pa.int32(), pa.string()))
+        fields.append(field)
+    return pa.schema(fields, metadata=schema.metadata)
+
+def write_stage_chunks(chunks, stage, store_dir=STORE_DIR):
+    """
+    Escribe una etapa a partir de un iterador de DataFrames sin reunirlos en memoria
+    (un archivo por año y por bloque). Devuelve el número de filas escritas.
+    """
+    final_dir = stage_path(stage, store_dir)
+    tmp_dir = f"{final_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    schema = None
+    total = 0
+    for i, df in enumerate(chunks):
+        df = apply_schema(df)
+        df[ORDER_COLUMN] = np.arange(total, total + len(df), dtype='int64')
+        total += len(df)
+        for year, part in df.groupby(df['time'].dt.year, sort=True):
+            table = pa.Table.from_pandas(part, preserve_index=False)
+            if schema is None:
+                schema = _stable_schema(table.schema)
+            part_dir = os.path.join(tmp_dir, f"year={int(year)}")
+            os.makedirs(part_dir, exist_ok=True)
+            pq.write_table(table.cast(schema), os.path.join(part_dir, f"part-{i:05d}.parquet"))
+
+    _swap_in(tmp_dir, final_dir)
+    return total
+
+def _dataset(stage, store_dir=STORE_DIR):
+    return ds.dataset(stage_path(stage, store_dir), format='parquet', partitioning=PARTITIONING)
+
+def read_stage(stage, columns=None, years=None, where=None, store_dir=STORE_DIR):
+    """
+    Lee una etapa del almacén proyectando solo `columns` y, si se indica, solo los años `years`
+    (los archivos de los demás años ni se abren). `where` es un filtro adicional de pyarrow
+    (p. ej. ds.field('updated') > t) que se evalúa durante la lectura.
+    """
+    dataset = _dataset(stage, store_dir)
+    flt = ds.field('year').isin(list(years)) if years is not None else None
+    if where is not None:
+        flt = where if flt is None else flt & where
+    ordered = ORDER_COLUMN in dataset.schema.names
+    read_columns = None
+    if columns is not None:
+        read_columns = list(columns) + ([ORDER_COLUMN] if ordered and ORDER_COLUMN not in columns else [])
+    table = dataset.to_table(columns=read_columns, filter=flt)
+    if ordered:
+        # Las particiones agrupan por año: se vuelve al orden en que se escribió la tabla
+        table = table.sort_by(ORDER_COLUMN)
+    df = table.to_pandas()
+    return _drop_internal(df, columns)
+
+def _drop_internal(df, columns):
+    hidden = [col for col in ('year', ORDER_COLUMN) if col in df.columns and (columns is None or col not in columns)]
+    return df.drop(columns=hidden) if hidden else df
+
+def _max_order(dataset):
+    # Máximo de ORDER_COLUMN desde las estadísticas de los pies de página (sin leer los datos)
+    top = -1
+    for fragment in dataset.get_fragments():
+        meta = fragment.metadata
+        k = meta.schema.names.index(ORDER_COLUMN)
+        for i in range(meta.num_row_groups):
+            stats = meta.row_group(i).column(k).statistics
+            if stats is not None and stats.has_min_max:
+                top = max(top, int(stats.max))
+    return top
+
+def _row_order(df, dataset, years):
+    """
+    Posición de las filas de `df` al reescribir los años `years`: los eventos que ya estaban
+    (mismo `id`) conservan la suya y los nuevos van al final de la tabla, en el orden de `df`.
+    """
+    order = pd.Series(np.nan, index=df.index)
+    if 'id' in df.columns:
+        existing = dataset.to_table(columns=['id', ORDER_COLUMN], filter=ds.field('year').isin(list(years)))
+        existing = existing.to_pandas()
+        order = df['id'].astype(str).map(dict(zip(existing['id'].astype(str), existing[ORDER_COLUMN])))
+    new = order.isna().to_numpy()
+    if new.any():
+        start = _max_order(dataset) + 1
+        order[new] = np.arange(start, start + new.sum())
+    return order.astype('int64').to_numpy()
+
+def replace_years(df, stage, years, store_dir=STORE_DIR):
+    """
+    Reescribe solo las particiones `years` de una etapa con las filas de `df` (que deben ser el
+    contenido completo de esos años); el resto de la tabla no se toca.
+    """
+    dataset = _dataset(stage, store_dir)
+    schema = dataset.schema
+    schema = schema.remove(schema.get_field_index('year')) if 'year' in schema.names else schema
+    df = apply_schema(df)
+    if ORDER_COLUMN in schema.names:
+        df[ORDER_COLUMN] = _row_order(df, dataset, years)
+    df_years = df['time'].dt.year
+    for year in sorted(set(int(y) for y in years)):
+        part = df[df_years == year]
+        final_dir = os.path.join(stage_path(stage, store_dir), f"year={year}")
+        tmp_dir = f"{final_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir, exist_ok=True)
+        if len(part):
+            table = pa.Table.from_pandas(part[schema.names], preserve_index=False).cast(schema)
+            pq.write_table(table, os.path.join(tmp_dir, 'part-0.parquet'))
+            _swap_in(tmp_dir, final_dir)
+        else:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            shutil.rmtree(final_dir, ignore_errors=True)
+
+def iter_stage(stage, columns=None, batch_size=200_000, store_dir=STORE_DIR):
+    """Recorre una etapa del almacén en bloques de hasta `batch_size` filas (memoria acotada)."""
+    dataset = _dataset(stage, store_dir)
+    for batch in dataset.to_batches(columns=list(columns) if columns is not None else None, batch_size=batch_size):
+        if batch.num_rows == 0:
+            continue
+        yield _drop_internal(batch.to_pandas(), columns)
+
+def record_csv_export(stage, csv_path=None, store_dir=STORE_DIR):
+    """
+    Anota en la etapa el tamaño/mtime del CSV recién exportado. Así `csv_export_matches` sabe
+    si el CSV es la copia de esta tabla o si se editó después, sin comparar mtimes entre sí.
+    """
+    csv_path = os.path.abspath(csv_path or STAGE_CSV[stage])
+    st = os.stat(csv_path)
+    record = {'csv': csv_path, 'mtime_ns': st.st_mtime_ns, 'size': st.st_size}
+    fd, tmp_path = tempfile.mkstemp(dir=stage_path(stage, store_dir), prefix='.', suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(record, f)
+    os.replace(tmp_path, os.path.join(stage_path(stage, store_dir), CSV_EXPORT_META))
+
+def csv_export_matches(stage, csv_path=None, store_dir=STORE_DIR):
+    """
+    True si `csv_path` sigue siendo la exportación anotada de la etapa, False si se modificó
+    después y None si no hay anotación para ese archivo (escrito por otra vía).
+    """
+    csv_path = os.path.abspath(csv_path or STAGE_CSV[stage])
+    try:
+        with open(os.path.join(stage_path(stage, store_dir), CSV_EXPORT_META), 'r', encoding='utf-8') as f:
+            record = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if record.get('csv') != csv_path:
+        return None
+    st = os.stat(csv_path)
+    return record['mtime_ns'] == st.st_mtime_ns and record['size'] == st.st_size
+
+def _usgs_time_text(values):
+    # 2010-12-14T19:00:02.590Z (milisegundos, UTC), como en el CSV que entrega USGS
+    utc = values.dt.tz_convert('UTC').dt.tz_localize(None) if isinstance(values.dtype, pd.DatetimeTZDtype) else values
+    text = np.datetime_as_string(utc.to_numpy(dtype='datetime64[ms]'), unit='ms')
+    return pd.Series(np.char.add(text, 'Z'), index=values.index).where(values.notna())
+
+def export_csv(df, path, **kwargs):
+    """
+    Escribe `df` como CSV (sin índice) con las columnas de fecha en el formato ISO de USGS,
+    el mismo del catálogo original, en lugar del texto por defecto de pandas ('... +00:00').
+    """
+    times = {col: _usgs_time_text(df[col]) for col in DATETIME_COLUMNS
+             if col in df.columns and pd.api.types.is_datetime64_any_dtype(df[col])}
+    (df.assign(**times) if times else df).to_csv(path, index=False, **kwargs)
+
+def save_stage(df, stage, csv_path=None, store_dir=STORE_DIR):
+    """Guarda una etapa como CSV (si EXPORT_CSV está activo) y en el almacén."""
+    if EXPORT_CSV:
+        export_csv(df, csv_path or STAGE_CSV[stage])
+    write_stage(df, stage, store_dir)
+    if EXPORT_CSV:
+        record_csv_export(stage, csv_path, store_dir)
+
+def store_columns(stage, store_dir=STORE_DIR):
+    """Columnas de una etapa del almacén, sin leer los datos."""
+    return [name for name in _dataset(stage, store_dir).schema.names if name not in ('year', ORDER_COLUMN)]
+
+def stage_years(stage, store_dir=STORE_DIR):
+    """Años con partición en una etapa, sin leer los datos."""
+    return sorted(int(name.split('=', 1)[1]) for name in os.listdir(stage_path(stage, store_dir))
+                  if name.startswith('year=') and not name.endswith(('.tmp', '.old')))
+
+def store_mtime(stage, store_dir=STORE_DIR):
+    """Fecha de modificación más reciente de los archivos de una etapa."""
+    root = stage_path(stage, store_dir)
+    mtimes = [os.path.getmtime(os.path.join(d, f)) for d, _, files in os.walk(root) for f in files]
+    return max(mtimes, default=os.path.getmtime(root))
@@ -1,11 +1,8 @@
-import pandas as pd
-
-# Cargar el dataset guardado anteriormente
-path = 'data/earthquakes_raw.csv'
+from seismic_data import load_events
 
 def explore_data():
     try:
-        df = pd.read_csv(path)
+        df = load_events('raw')
         
         print("--- Información General del Dataset ---")
         print(f"Total de registros: {df.shape[0]}")
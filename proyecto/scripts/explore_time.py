@@ -1,14 +1,9 @@
-import pandas as pd
-
-# Cargar el dataset guardado anteriormente
-path = 'data/earthquakes_raw.csv'
+from seismic_data import load_events
 
 def explore_time():
     try:
-        df = pd.read_csv(path)
-        
-        # Convertir la columna time a datetime
-        df['time'] = pd.to_datetime(df['time'])
+        # Solo se necesita la columna time (ya convertida a datetime)
+        df = load_events('raw', columns=['time'])
         
         print("--- Análisis de la Dimensión Temporal ---")
         print(f"Fecha del primer sismo registrado: {df['time'].min()}")
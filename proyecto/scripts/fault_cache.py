@@ -0,0 +1,170 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from fault_index import FAULT_NAME_COLUMN
+from seismic_data import CACHE_DIR, FAULTS_GEOJSON, file_hash, write_atomic, write_json_atomic
+
+# ----------------------------------------
+# CACHÉ DE LA RED DE FALLAS (ATLAS GEOLÓGICO 2020)
+# ----------------------------------------
+# Leer el GeoJSON del Atlas con gpd.read_file tarda segundos y los reportes HTML además lo
+# simplificaban en cada ejecución. La red se procesa una sola vez por versión del archivo y
+# se guarda en dos formas:
+#   - GeoDataFrame completo en Feather (GeoArrow) para los mapas de matplotlib;
+#   - red compacta para Leaflet: varios niveles pre-simplificados, coordenadas cuantizadas a
+#     1e-4° como diferencias enteras por tramo y nombres como diccionario. El navegador
+#     decodifica solo el nivel que corresponde al zoom (`addFaultsLayer`).
+ESCALA_COORDENADAS = 10_000
+# (tolerancia de simplificación en grados, zoom mínimo de Leaflet que usa ese nivel): cada
+# tolerancia queda por debajo de un píxel del zoom en que empieza a usarse y el nivel más fino
+# es la simplificación de 0.01° que ya usaban los HTML
+NIVELES_SIMPLIFICACION = [(0.05, 0), (0.02, 5), (0.01, 7)]
+
+_MEMO = {}
+
+def _cache_files(path):
+    """Rutas (feather, json compacto) de la versión actual del archivo; sha1 solo si cambió mtime/tamaño."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    meta_path = os.path.join(CACHE_DIR, 'fallas.meta.json')
+    st = os.stat(path)
+    signature = {'source': os.path.abspath(path), 'mtime_ns': st.st_mtime_ns, 'size': st.st_size}
+
+    meta = {}
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    if not all(meta.get(k) == v for k, v in signature.items()):
+        meta = {**signature, 'sha1': file_hash(path)}
+        write_json_atomic(meta_path, meta, indent=2)
+    version = meta['sha1'][:16]
+    # La red compacta depende también de los niveles y la cuantización
+    settings = hashlib.sha1(json.dumps([NIVELES_SIMPLIFICACION, ESCALA_COORDENADAS]).encode()).hexdigest()[:8]
+    return (os.path.join(CACHE_DIR, f"fallas_{version}.feather"),
+            os.path.join(CACHE_DIR, f"fallas_compactas_{version}_{settings}.json"))
+
+def _quantized_parts(geometries, tolerance, scale=ESCALA_COORDENADAS):
+    """Tramos simplificados de cada geometría como listas planas [x0, y0, dx1, dy1, ...] enteras."""
+    simplified = shapely.simplify(geometries, tolerance, preserve_topology=True)
+    parts = shapely.get_parts(simplified)
+    owner = np.repeat(np.arange(len(simplified)), shapely.get_num_geometries(simplified))
+    coords, part_idx = shapely.get_coordinates(parts, return_index=True)
+    q = np.round(coords * scale).astype('int64')
+
+    # Puntos repetidos tras cuantizar no aportan nada
+    new_part = np.concatenate([[True], part_idx[1:] != part_idx[:-1]])
+    keep = new_part | np.concatenate([[True], np.any(q[1:] != q[:-1], axis=1)])
+    q, part_idx, new_part = q[keep], part_idx[keep], new_part[keep]
+    delta = q.copy()
+    delta[1:][~new_part[1:]] = q[1:][~new_part[1:]] - q[:-1][~new_part[1:]]
+
+    features = [[] for _ in range(len(geometries))]
+    starts = np.flatnonzero(new_part)
+    for start, end in zip(starts, np.append(starts[1:], len(q))):
+        if end - start >= 2:
+            features[owner[part_idx[start]]].append(delta[start:end].ravel().tolist())
+    return features
+
+def compact_faults(gdf, levels=NIVELES_SIMPLIFICACION, scale=ESCALA_COORDENADAS):
+    """Red de fallas para la web: nombres únicos y, por nivel, [código de nombre, tramos] por falla."""
+    names = gdf[FAULT_NAME_COLUMN] if FAULT_NAME_COLUMN in gdf.columns else pd.Series([None] * len(gdf))
+    name_codes, uniques = pd.factorize(names, use_na_sentinel=False)
+
+    compact = {'scale': scale, 'names': [None if pd.isna(v) else str(v) for v in uniques], 'levels': []}
+    geometries = np.asarray(gdf.geometry.values)
+    for tolerance, min_zoom in levels:
+        parts = _quantized_parts(geometries, tolerance, scale)
+        features = [[int(code), lines] for code, lines in zip(name_codes, parts) if lines]
+        compact['levels'].append({'tolerance': tolerance, 'min_zoom': min_zoom, 'features': features})
+    return compact
+
+def build_fault_cache(path=FAULTS_GEOJSON, force=False):
+    """Genera (si falta o cambió el GeoJSON) el Feather y la red compacta; devuelve sus rutas."""
+    # Varios procesos pueden construirla a la vez con la caché fría: cada uno escribe su propio
+    # temporal y el último os.replace deja una copia completa e idéntica
+    feather_path, compact_path = _cache_files(path)
+    if force or not os.path.exists(feather_path):
+        gdf = gpd.read_file(path)
+        gdf = gdf[gdf.geometry.notna()].reset_index(drop=True)
+        write_atomic(feather_path, gdf.to_feather)
+    if force or not os.path.exists(compact_path):
+        gdf = gpd.read_feather(feather_path)
+        write_json_atomic(compact_path, compact_faults(gdf), ensure_ascii=False, separators=(',', ':'))
+    return feather_path, compact_path
+
+def load_faults(path=FAULTS_GEOJSON):
+    """GeoDataFrame de fallas a resolución completa, desde la caché Feather."""
+    feather_path, _ = build_fault_cache(path)
+    if feather_path not in _MEMO:
+        _MEMO[feather_path] = gpd.read_feather(feather_path)
+    return _MEMO[feather_path].copy()
+
+def load_faults_compact(path=FAULTS_GEOJSON):
+    """Texto JSON de la red compacta (se incrusta tal cual en los HTML)."""
+    _, compact_path = build_fault_cache(path)
+    with open(compact_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def faults_script(compact_json):
+    """
+    JavaScript con la red compacta y `addFaultsLayer(map, options)`: capa L.geoJSON que cambia
+    al nivel de simplificación del zoom actual (cada nivel se decodifica la primera vez que se usa).
+    """
+    compact_json = compact_json.replace('</', '<\\/')
+    return f"""
+    const faultsCompact = {compact_json};
+
+    function faultsGeoJSON(level) {{
+        const scale = faultsCompact.scale;
+        return {{
+            type: 'FeatureCollection',
+            features: faultsCompact.levels[level].features.map(([code, parts]) => ({{
+                type: 'Feature',
+                properties: {{ {FAULT_NAME_COLUMN}: faultsCompact.names[code] }},
+                geometry: {{ type: 'MultiLineString', coordinates: parts.map(part => {{
+                    const line = [];
+                    let x = 0, y = 0;
+                    for (let i = 0; i < part.length; i += 2) {{
+                        x += part[i]; y += part[i + 1];
+                        line.push([x / scale, y / scale]);
+                    }}
+                    return line;
+                }}) }}
+            }}))
+        }};
+    }}
+
+    function addFaultsLayer(map, options) {{
+        const layers = {{}};
+        let current = null;
+        function update() {{
+            let level = 0;
+            faultsCompact.levels.forEach((l, i) => {{ if (map.getZoom() >= l.min_zoom) level = i; }});
+            if (level === current) return;
+            if (current !== null) map.removeLayer(layers[current]);
+            layers[level] = layers[level] || L.geoJSON(faultsGeoJSON(level), options);
+            layers[level].addTo(map);
+            current = level;
+        }}
+        map.on('zoomend', update);
+        update();
+    }}
+"""
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Construye la caché de la red de fallas (Feather + niveles web)")
+    parser.add_argument('--force', action='store_true', help="Regenera aunque el GeoJSON no haya cambiado")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    feather_path, compact_path = build_fault_cache(force=args.force)
+    print(f"Caché de fallas lista en {time.perf_counter() - t0:.2f}s:")
+    print(f"  {feather_path} ({os.path.getsize(feather_path) / 1e6:.2f} MB)")
+    print(f"  {compact_path} ({os.path.getsize(compact_path) / 1e6:.2f} MB)")
@@ -0,0 +1,145 @@
+import json
+import os
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from shapely import STRtree
+
+from seismic_data import CACHE_DIR, FAULTS_GEOJSON, file_hash, write_atomic, write_json_atomic
+
+# ----------------------------------------
+# ÍNDICE ESPACIAL DE SEGMENTOS DE FALLA (ATLAS GEOLÓGICO 2020)
+# ----------------------------------------
+# Cada falla del GeoJSON se descompone en segmentos rectos. Un STRtree sobre los segmentos
+# reduce la búsqueda a unos pocos candidatos por evento (O(N log S) en lugar de O(N x S)),
+# y la distancia final se calcula sobre la esfera entre el punto y el arco del segmento.
+R_TIERRA_KM = 6371.0
+FAULT_NAME_COLUMN = 'NombreFall'
+
+# Más allá de esta distancia (en grados) no se buscan candidatos adicionales:
+# se usa directamente el segmento más cercano en coordenadas geográficas
+MAX_BUSQUEDA_GRADOS = 5.0
+EVENTOS_POR_BLOQUE = 100_000
+
+_INDEX_MEMO = {}
+
+def _segments_from_geometries(geometries):
+    # Extrae los segmentos (A -> B) de cada LineString/MultiLineString y la falla a la que pertenecen
+    parts = shapely.get_parts(np.asarray(geometries))
+    part_owner = np.repeat(np.arange(len(geometries)), shapely.get_num_geometries(np.asarray(geometries)))
+    coords, coord_part = shapely.get_coordinates(parts, return_index=True)
+    same_part = coord_part[:-1] == coord_part[1:]
+    a = coords[:-1][same_part]
+    b = coords[1:][same_part]
+    owner = part_owner[coord_part[:-1][same_part]]
+    return a, b, owner
+
+def load_fault_segments(path=FAULTS_GEOJSON):
+    """Segmentos de falla (en grados) y nombres, cacheados en disco por versión del archivo."""
+    version = file_hash(path)
+    cache_npz = os.path.join(CACHE_DIR, f"fallas_segmentos_{version[:16]}.npz")
+    cache_names = os.path.join(CACHE_DIR, f"fallas_nombres_{version[:16]}.json")
+
+    if os.path.exists(cache_npz) and os.path.exists(cache_names):
+        data = np.load(cache_npz)
+        with open(cache_names, 'r', encoding='utf-8') as f:
+            names = json.load(f)
+        return version, data['a'], data['b'], data['owner'], names
+
+    gdf = gpd.read_file(path)
+    gdf = gdf[gdf.geometry.notna()]
+    if FAULT_NAME_COLUMN in gdf.columns:
+        names = gdf[FAULT_NAME_COLUMN].fillna('Falla sin nombre').astype(str).tolist()
+    else:
+        names = [f"Falla {i}" for i in range(len(gdf))]
+    a, b, owner = _segments_from_geometries(gdf.geometry.values)
+
+    write_atomic(cache_npz, lambda tmp_path: np.savez(tmp_path, a=a, b=b, owner=owner))
+    write_json_atomic(cache_names, names, ensure_ascii=False)
+    return version, a, b, owner, names
+
+def get_fault_index(path=FAULTS_GEOJSON):
+    """Índice STRtree de segmentos; se construye una sola vez por versión del archivo de fallas."""
+    st = os.stat(path)
+    signature = (st.st_mtime_ns, st.st_size)
+    index = _INDEX_MEMO.get(path)
+    if index is None or index['signature'] != signature:
+        version, a, b, owner, names = load_fault_segments(path)
+        tree = STRtree(shapely.linestrings(np.stack([a, b], axis=1)))
+        index = {'signature': signature, 'version': version, 'tree': tree,
+                 'a': a, 'b': b, 'owner': owner, 'names': names}
+        _INDEX_MEMO[path] = index
+    return index
+
+def _unit_vectors(lon, lat):
+    lon, lat = np.radians(lon), np.radians(lat)
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+def _angle(u, v):
+    return np.arctan2(np.linalg.norm(np.cross(u, v), axis=-1), np.einsum('ij,ij->i', u, v))
+
+def point_arc_distance_km(p_lon, p_lat, a, b):
+    """Distancia sobre la esfera entre puntos y arcos de círculo máximo A-B (vectorizada por pares)."""
+    p = _unit_vectors(p_lon, p_lat)
+    va = _unit_vectors(a[:, 0], a[:, 1])
+    vb = _unit_vectors(b[:, 0], b[:, 1])
+
+    d_ends = np.minimum(_angle(p, va), _angle(p, vb))
+    n = np.cross(va, vb)
+    n_norm = np.linalg.norm(n, axis=-1)
+    valid = n_norm > 1e-12
+    n_hat = np.zeros_like(n)
+    n_hat[valid] = n[valid] / n_norm[valid, None]
+
+    # Proyección del punto sobre el círculo máximo; solo cuenta si cae dentro del arco
+    sin_gc = np.einsum('ij,ij->i', p, n_hat)
+    c = p - sin_gc[:, None] * n_hat
+    inside = (valid
+              & (np.einsum('ij,ij->i', np.cross(va, c), n) >= 0)
+              & (np.einsum('ij,ij->i', np.cross(c, vb), n) >= 0))
+    d_gc = np.arcsin(np.clip(np.abs(sin_gc), 0.0, 1.0))
+    return np.where(inside, np.minimum(d_gc, d_ends), d_ends) * R_TIERRA_KM
+
+def nearest_fault_distance(lat, lon, path=FAULTS_GEOJSON, chunk_size=EVENTOS_POR_BLOQUE):
+    """
+    Falla real más cercana (índice en `names`) y distancia en km a su segmento más próximo.
+
+    1. El STRtree devuelve el segmento más cercano en grados (d0).
+    2. Un grado de longitud mide cos(lat) veces un grado de latitud, así que el segmento más
+       cercano en km está dentro de d0 / cos(lat): solo esos candidatos se evalúan sobre la esfera.
+    """
+    index = get_fault_index(path)
+    tree, a, b, owner = index['tree'], index['a'], index['b'], index['owner']
+    lat = np.asarray(lat, dtype='float64')
+    lon = np.asarray(lon, dtype='float64')
+
+    n = len(lat)
+    best_seg = np.empty(n, dtype='int64')
+    best_dist = np.empty(n, dtype='float64')
+    for start in range(0, n, chunk_size):
+        end = min(start + chunk_size, n)
+        pts = shapely.points(lon[start:end], lat[start:end])
+        (pt_idx, seg_idx), d0 = tree.query_nearest(pts, return_distance=True, all_matches=False)
+        d0_full = np.empty(end - start)
+        d0_full[pt_idx] = d0
+        seg0 = np.empty(end - start, dtype='int64')
+        seg0[pt_idx] = seg_idx
+
+        cos_lat = np.clip(np.cos(np.radians(np.abs(lat[start:end]) + np.minimum(d0_full, 90))), 0.05, 1.0)
+        radius = np.minimum(d0_full / cos_lat * 1.01 + 1e-9, MAX_BUSQUEDA_GRADOS)
+        cand_pt, cand_seg = tree.query(pts, predicate='dwithin', distance=radius)
+
+        # Siempre incluir el candidato inicial (necesario cuando d0 supera el radio máximo)
+        cand_pt = np.concatenate([cand_pt, np.arange(end - start)])
+        cand_seg = np.concatenate([cand_seg, seg0])
+        g = start + cand_pt
+        dist = point_arc_distance_km(lon[g], lat[g], a[cand_seg], b[cand_seg])
+
+        order = np.lexsort((dist, cand_pt))
+        first = np.r_[True, cand_pt[order][1:] != cand_pt[order][:-1]]
+        sel = order[first]
+        best_seg[start + cand_pt[sel]] = cand_seg[sel]
+        best_dist[start + cand_pt[sel]] = dist[sel]
+
+    return owner[best_seg], best_dist
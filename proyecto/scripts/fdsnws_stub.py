@@ -0,0 +1,152 @@
+import argparse
+import io
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+# ----------------------------------------
+# SERVIDOR FDSNWS LOCAL (DOBLE DEL ENDPOINT DE USGS)
+# ----------------------------------------
+# Atiende /fdsnws/event/1/query sobre un catálogo sintético en memoria, con la parte del
+# contrato que usa load_data: format=csv, filtros de tiempo (inclusivos), bbox, magnitud
+# mínima y `updatedafter`, orderby time / time-asc, limit y offset (base 1), 204 cuando no hay
+# resultados y 400 si la consulta pide más de LIMITE_SERVIDOR filas. Sirve para probar la
+# sincronización y el backfill (re-división de mosaicos saturados, concurrencia, límite de
+# peticiones) sin tocar el servicio real; `fail` permite inyectar errores en peticiones dadas.
+LIMITE_SERVIDOR = 20_000
+RUTA_CONSULTA = '/fdsnws/event/1/query'
+
+COLUMNAS_USGS = ['time', 'latitude', 'longitude', 'depth', 'mag', 'magType', 'net', 'id', 'updated', 'place',
+                 'type', 'status', 'locationSource', 'magSource']
+
+def _iso(times):
+    return times.dt.strftime('%Y-%m-%dT%H:%M:%S.%f').str[:-3] + 'Z'
+
+def synthetic_catalog(n, starttime='2010-01-01', endtime='2026-01-01', bbox=(-4.5, 13.5, -82, -66.5), seed=0):
+    """Catálogo aleatorio con las columnas del CSV de USGS (`time`/`updated` como datetimes UTC)."""
+    rng = np.random.default_rng(seed)
+    start, end = pd.Timestamp(starttime, tz='UTC'), pd.Timestamp(endtime, tz='UTC')
+    span_ms = int((end - start) / pd.Timedelta(milliseconds=1))
+    times = start + pd.to_timedelta(np.sort(rng.integers(0, span_ms, n)), unit='ms')
+    lat_min, lat_max, lon_min, lon_max = bbox
+    return pd.DataFrame({
+        'time': times,
+        'latitude': rng.uniform(lat_min, lat_max, n).round(4),
+        'longitude': rng.uniform(lon_min, lon_max, n).round(4),
+        'depth': rng.uniform(0, 200, n).round(3),
+        'mag': rng.uniform(1.5, 6.5, n).round(1),
+        'magType': 'mb', 'net': 'us',
+        'id': [f"st{i:08d}" for i in range(n)],
+        'updated': times + pd.to_timedelta(rng.integers(60_000, 86_400_000, n), unit='ms'),
+        'place': [f"{i % 50} km N of Lugar {i % 97}, Colombia" for i in range(n)],
+        'type': 'earthquake', 'status': 'reviewed', 'locationSource': 'us', 'magSource': 'us',
+    })
+
+def query_catalog(catalog, params, server_limit=LIMITE_SERVIDOR):
+    """(estado HTTP, texto) de la respuesta de fdsnws a `params` (valores ya decodificados)."""
+    if params.get('format', 'csv') != 'csv':
+        return 400, 'Solo se admite format=csv'
+    mask = np.ones(len(catalog), dtype=bool)
+    if 'starttime' in params:
+        mask &= (catalog['time'] >= pd.Timestamp(params['starttime'], tz='UTC')).to_numpy()
+    if 'endtime' in params:
+        mask &= (catalog['time'] <= pd.Timestamp(params['endtime'], tz='UTC')).to_numpy()
+    if 'updatedafter' in params:
+        mask &= (catalog['updated'] > pd.Timestamp(params['updatedafter'], tz='UTC')).to_numpy()
+    for param, column, op in (('minlatitude', 'latitude', np.greater_equal), ('maxlatitude', 'latitude', np.less_equal),
+                              ('minlongitude', 'longitude', np.greater_equal),
+                              ('maxlongitude', 'longitude', np.less_equal), ('minmagnitude', 'mag', np.greater_equal)):
+        if param in params:
+            mask &= op(catalog[column].to_numpy(), float(params[param]))
+    result = catalog[mask].sort_values('time', ascending=params.get('orderby', 'time') == 'time-asc', kind='stable')
+
+    limit = int(params['limit']) if 'limit' in params else None
+    if (limit or len(result)) > server_limit:
+        return 400, f"Error 400: la consulta supera el límite de {server_limit} eventos"
+    offset = int(params.get('offset', 1))
+    result = result.iloc[offset - 1:offset - 1 + limit if limit else None]
+    if result.empty:
+        return 204, ''
+    buffer = io.StringIO()
+    result.assign(time=_iso(result['time']), updated=_iso(result['updated'])).to_csv(buffer, index=False)
+    return 200, buffer.getvalue()
+
+class FdsnwsStub:
+    """
+    Servidor HTTP en un hilo (puerto libre de 127.0.0.1 por defecto) que responde como fdsnws.
+    `fail(n, params)` se llama en cada petición (n = número de petición, desde 1) y, si devuelve
+    un código HTTP, se responde con ese error. Se usa como contexto: `with FdsnwsStub(cat) as url`.
+    """
+
+    def __init__(self, catalog, server_limit=LIMITE_SERVIDOR, fail=None, host='127.0.0.1', port=0):
+        self.catalog = catalog
+        self.server_limit = server_limit
+        self.fail = fail
+        self.requests = []
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                with stub.lock:
+                    stub.requests.append(params)
+                    n = len(stub.requests)
+                status = stub.fail(n, params) if stub.fail else None
+                if url.path != RUTA_CONSULTA:
+                    status, body = 404, 'No encontrado'
+                elif status:
+                    body = f"Error {status} (inyectado)"
+                else:
+                    status, body = query_catalog(stub.catalog, params, stub.server_limit)
+                data = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/csv; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{RUTA_CONSULTA}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self.url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor fdsnws local con un catálogo sintético")
+    parser.add_argument('--events', type=int, default=100_000, help="Eventos del catálogo sintético")
+    parser.add_argument('--port', type=int, default=8081, help="Puerto de escucha")
+    parser.add_argument('--limit', type=int, default=LIMITE_SERVIDOR, help="Máximo de filas por respuesta")
+    args = parser.parse_args()
+
+    stub = FdsnwsStub(synthetic_catalog(args.events), server_limit=args.limit, port=args.port)
+    print(f"Sirviendo {args.events} eventos en {stub.url} (Ctrl+C para terminar)")
+    print(f"Ejemplo: python scripts/load_data.py --backfill --url {stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.server.server_close()
@@ -0,0 +1,144 @@
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import geopandas as gpd
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from fault_cache import load_faults
+from seismic_data import CACHE_DIR, FAULTS_GEOJSON, WORLD_GEOJSON, write_atomic
+
+# ----------------------------------------
+# MAPAS BASE EN CACHÉ Y FIGURAS EN PARALELO
+# ----------------------------------------
+# Los mapas estáticos redibujaban en cada figura (y en cada panel de las cuadrículas) los
+# polígonos de world.geojson y las líneas de falla antes de los sismos, a 300 dpi.
+#   - `draw_basemap` rasteriza una sola vez cada combinación de extensión, capas, estilo y
+#     tamaño en píxeles (PNG transparente en data/.cache) y la pone en el eje como imagen;
+#   - `render_figures` genera figuras independientes en un pool de procesos con backend Agg.
+# `python scripts/figure_render.py` regenera en paralelo todo el conjunto de mapas estáticos.
+
+def _world():
+    return gpd.read_file(WORLD_GEOJSON)
+
+def _colombia():
+    world = _world()
+    return world[world['name'] == 'Colombia']
+
+# Capa -> (archivo de origen, que versiona la caché; función que la carga)
+CAPAS = {
+    'world': (WORLD_GEOJSON, _world),
+    'colombia': (WORLD_GEOJSON, _colombia),
+    'faults': (FAULTS_GEOJSON, load_faults),
+}
+
+# (módulo, función) de cada script que genera figuras estáticas con mapa base
+FIGURAS = [
+    ('plot_seismic_timeline', 'generate_seismic_timeline_map'),
+    ('cluster_profiling', 'profile_clusters'),
+    ('scatter_maps_v2', 'refine_visualizations'),
+    ('visualize_k_evolution', 'generate_evolution_geo_grid'),
+    ('visualize_cleaning', 'plot_comparison'),
+]
+
+_MEMO = {}
+_MISSING_WARNED = set()
+_IN_WORKER = False
+
+def _source_version(source):
+    st = os.stat(CAPAS[source][0])
+    return [source, st.st_mtime_ns, st.st_size]
+
+def basemap_image(extent, layers, size_px, dpi):
+    """
+    Imagen RGBA del mapa base que cubre exactamente `extent` (lon_min, lon_max, lat_min, lat_max).
+    `layers` es una lista de (capa de CAPAS, estilo para GeoDataFrame.plot).
+    """
+    key = json.dumps([[float(v) for v in extent], [[_source_version(src), style] for src, style in layers],
+                      [int(v) for v in size_px], dpi], sort_keys=True)
+    path = os.path.join(CACHE_DIR, f"mapa_base_{hashlib.sha1(key.encode()).hexdigest()[:16]}.png")
+    if path in _MEMO:
+        return _MEMO[path]
+
+    if not os.path.exists(path):
+        fig = Figure(figsize=(size_px[0] / dpi, size_px[1] / dpi), dpi=dpi)
+        FigureCanvasAgg(fig)
+        ax = fig.add_axes([0, 0, 1, 1])
+        ax.set_axis_off()
+        for source, style in layers:
+            gdf = CAPAS[source][1]()
+            if not gdf.empty:
+                gdf.plot(ax=ax, **style)
+        ax.set_xlim(extent[0], extent[1])
+        ax.set_ylim(extent[2], extent[3])
+        ax.set_aspect('auto')
+        write_atomic(path, lambda tmp_path: fig.savefig(tmp_path, dpi=dpi, transparent=True))
+    _MEMO[path] = plt.imread(path)
+    return _MEMO[path]
+
+def draw_basemap(ax, extent, layers, dpi, zorder=1):
+    """
+    Dibuja el mapa base rasterizado en `ax`, a la resolución con que se guardará la figura.
+    Usa la misma relación de aspecto que GeoDataFrame.plot en coordenadas geográficas.
+    Las capas cuyo archivo no existe se omiten (el pipeline las trata como entradas opcionales).
+    """
+    missing = sorted({CAPAS[source][0] for source, _ in layers if not os.path.exists(CAPAS[source][0])})
+    if missing:
+        if not _MISSING_WARNED.issuperset(missing):
+            _MISSING_WARNED.update(missing)
+            print(f"Advertencia: no se encontró {', '.join(missing)}; se dibuja el mapa sin esas capas.")
+        layers = [(source, style) for source, style in layers if CAPAS[source][0] not in missing]
+        if not layers:
+            return
+    aspect = 1 / np.cos(np.radians((extent[2] + extent[3]) / 2))
+    fig = ax.figure
+    box = ax.get_position()
+    width, height = box.width * fig.get_figwidth() * dpi, box.height * fig.get_figheight() * dpi
+    # Con aspecto fijo el eje se encoge en una dirección: rasterizar al tamaño que realmente ocupa
+    data_ratio = (extent[3] - extent[2]) * aspect / (extent[1] - extent[0])
+    if height / width > data_ratio:
+        height = width * data_ratio
+    else:
+        width = height / data_ratio
+    image = basemap_image(extent, layers, (max(1, round(width)), max(1, round(height))), dpi)
+    ax.imshow(image, extent=extent, origin='upper', interpolation='bilinear', aspect=aspect, zorder=zorder)
+
+def _init_worker():
+    global _IN_WORKER
+    _IN_WORKER = True
+    plt.switch_backend('Agg')
+
+def render_figures(jobs, workers=None):
+    """
+    Ejecuta `jobs` (lista de (función, args)), cada uno genera y guarda su propia figura, en un
+    pool de procesos. Dentro de un worker (o con un solo proceso) se ejecutan en secuencia.
+    """
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    if _IN_WORKER or workers <= 1:
+        return [func(*args) for func, args in jobs]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(func, *args) for func, args in jobs]
+        return [future.result() for future in futures]
+
+def _run_script(module, function):
+    t0 = time.perf_counter()
+    getattr(importlib.import_module(module), function)()
+    return time.perf_counter() - t0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regenera en paralelo los mapas estáticos con mapa base")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos del pool")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    elapsed = render_figures([(_run_script, figure) for figure in FIGURAS], args.workers)
+    for (module, _), seconds in zip(FIGURAS, elapsed):
+        print(f"  {module:<24} {seconds:6.2f}s")
+    print(f"Figuras regeneradas en {time.perf_counter() - t0:.2f}s")
@@ -1,15 +1,12 @@
-import pandas as pd
 import json
 import os
-import geopandas as gpd
 import markdown2
 
+from fault_cache import faults_script, load_faults_compact
+from seismic_data import PROJECT_DIR, load_events
+
 # Configuración de rutas
-DATA_DIR = 'data'
-VIS_DIR = 'documentacion/visualizaciones'
-REPORT_DIR = 'reporte_final'
-RAW_DATA = os.path.join(DATA_DIR, 'earthquakes_raw.csv')
-GEOJSON_FAULT_PATH = os.path.join(DATA_DIR, "Atlas_Geol%C3%B3gico_de_Colombia_2020%3A_Fallas_Geol%C3%B3gicas.geojson")
+REPORT_DIR = os.path.join(PROJECT_DIR, 'reporte_final')
 INPUT_MD = os.path.join(REPORT_DIR, 'REPORTE_CRISP_DM.md')
 OUTPUT_HTML = os.path.join(REPORT_DIR, 'REPORTE_FINAL_INTERACTIVO.html')
 
@@ -18,9 +15,9 @@ def generate_interactive_report():
     
     try:
         # 1. Cargar Datos Sísmicos y Geográficos
-        df = pd.read_csv(RAW_DATA)
-        df['time'] = pd.to_datetime(df['time'])
+        df = load_events('raw', columns=['time', 'latitude', 'longitude', 'mag', 'depth', 'place'])
         df['year'] = df['time'].dt.year
+        df[['latitude', 'longitude']] = df[['latitude', 'longitude']].astype('float64').round(4)
         
         seismic_data = df[['latitude', 'longitude', 'mag', 'depth', 'year', 'place']].to_dict(orient='records')
         yearly_counts = df['year'].value_counts().sort_index().to_dict()
@@ -28,9 +25,7 @@ def generate_interactive_report():
         counts = list(yearly_counts.values())
 
         print("Procesando fallas geológicas...")
-        gdf_fallas = gpd.read_file(GEOJSON_FAULT_PATH)
-        gdf_fallas['geometry'] = gdf_fallas['geometry'].simplify(0.01, preserve_topology=True)
-        faults_json = gdf_fallas.to_json()
+        faults_js = faults_script(load_faults_compact())
 
         # 2. Leer y Procesar Markdown
         print(f"Leyendo contenido desde: {INPUT_MD}")
@@ -196,7 +191,7 @@ def generate_interactive_report():
 <script>
     // 1. Datos
     const seismicPoints = {json.dumps(seismic_data)};
-    const faultsGeoJSON = {faults_json};
+    {faults_js}
     const chartLabels = {json.dumps(years)};
     const chartData = {json.dumps(counts)};
 
@@ -240,9 +235,9 @@ def generate_interactive_report():
         attribution: '&copy; CARTO'
     }}).addTo(map);
 
-    L.geoJSON(faultsGeoJSON, {{
+    addFaultsLayer(map, {{
         style: {{ color: "#ff0000", weight: 1.5, opacity: 0.6 }}
-    }}).addTo(map);
+    }});
 
     const markerLayer = L.layerGroup().addTo(map);
 
@@ -0,0 +1,54 @@
+import numpy as np
+from sklearn.neighbors import BallTree
+
+# ----------------------------------------
+# ÍNDICE DE DENSIDAD EN GRILLA (MULTI-RESOLUCIÓN)
+# ----------------------------------------
+# Cada evento se asigna a la celda más cercana de una grilla regular de `res` grados
+# (equivalente a redondear lat/lon a esa resolución). El conteo por celda se obtiene con
+# un único np.unique sobre una clave entera por evento, sin groupby ni merge de vuelta.
+R_TIERRA_KM = 6371.0
+RESOLUCIONES_GRADOS = (0.05, 0.1, 0.5, 1.0)
+RESOLUCION_ZONA = 0.1  # Resolución de la columna histórica `sismos_por_zona`
+RADIO_DENSIDAD_KM = 50
+
+# Desplazamiento para que los índices de latitud sean siempre positivos al combinarlos
+_OFFSET = 1 << 20
+
+def column_name(res):
+    """Nombre de la columna de conteo para una resolución (0.05 -> 'sismos_celda_0_05')."""
+    return f"sismos_celda_{res:g}".replace('.', '_')
+
+def cell_index(lat, lon, res):
+    """Índices enteros (fila, columna) de la celda de cada evento."""
+    i = np.round(np.asarray(lat, dtype='float64') / res).astype('int64')
+    j = np.round(np.asarray(lon, dtype='float64') / res).astype('int64')
+    return i, j
+
+def cell_keys(lat, lon, res):
+    i, j = cell_index(lat, lon, res)
+    return (i + _OFFSET) * (2 * _OFFSET) + (j + _OFFSET)
+
+def grid_counts(lat, lon, resolutions=RESOLUCIONES_GRADOS):
+    """Número de eventos en la celda de cada evento, para cada resolución: {res: array}."""
+    counts = {}
+    for res in resolutions:
+        _, inverse, n = np.unique(cell_keys(lat, lon, res), return_inverse=True, return_counts=True)
+        counts[res] = n[inverse.ravel()]
+    return counts
+
+def radius_density(lat, lon, radius_km=RADIO_DENSIDAD_KM, tree=None):
+    """Número de eventos a menos de `radius_km` (distancia haversine) de cada evento, incluido él mismo."""
+    coords = np.radians(np.column_stack([lat, lon]).astype('float64'))
+    if tree is None:
+        tree = BallTree(coords, metric='haversine')
+    return tree.query_radius(coords, r=radius_km / R_TIERRA_KM, count_only=True)
+
+def add_density_columns(df, resolutions=RESOLUCIONES_GRADOS, radius_km=RADIO_DENSIDAD_KM):
+    """Agrega al DataFrame los conteos por celda de cada resolución y la densidad en radio."""
+    lat, lon = df['latitude'].to_numpy(), df['longitude'].to_numpy()
+    for res, counts in grid_counts(lat, lon, resolutions).items():
+        df[column_name(res)] = counts
+    if radius_km:
+        df[f"sismos_radio_{radius_km:g}km"] = radius_density(lat, lon, radius_km)
+    return df
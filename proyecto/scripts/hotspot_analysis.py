@@ -1,9 +1,20 @@
-import pandas as pd
+import argparse
 import numpy as np
+import os
 from sklearn.cluster import DBSCAN
 import plotly.graph_objects as go
 import plotly.express as px
 
+from cell_list import build_cells, dbscan_cells, neighbor_counts
+from dbscan_shards import TAMANO_TESELA_GRADOS, sharded_dbscan
+from dbscan_sweep import sweep_dbscan
+from event_store import STAGE_CSV, save_stage
+from grid_index import radius_density
+from map_render import (
+    category_codes, datetime_column, hover_script, legend_script, legend_traces, lookup_column, numeric_column, points_trace,
+)
+from seismic_data import DOC_DIR, load_events
+
 # ----------------------------------------
 # CONFIGURACIÓN
 # ----------------------------------------
@@ -11,7 +22,11 @@ RADIO_KM = 50
 MIN_SISMOS = 15
 RADIO_RAD = RADIO_KM / 6371.0
 
-path = 'data/earthquakes_raw.csv'
+# Rejilla por defecto del barrido de parámetros (--sweep)
+EPS_BARRIDO_KM = [20, 30, 40, 50, 60]
+MIN_SISMOS_BARRIDO = [5, 10, 15, 20]
+
+path = STAGE_CSV['raw']
 
 def clasificar_por_densidad(count):
     if count >= 500:
@@ -25,18 +40,30 @@ def clasificar_por_densidad(count):
     else:
         return 'Zona relativamente segura'
 
-def run_analysis():
+def run_analysis(neighbors='cells', workers=None, tile_deg=TAMANO_TESELA_GRADOS):
     print("Cargando datos...")
-    df = pd.read_csv(path)
-    df['time'] = pd.to_datetime(df['time'])
+    df = load_events('raw')
 
     # ----------------------------------------
     # DBSCAN GRANULAR (50 km)
     # ----------------------------------------
     print(f"Aplicando DBSCAN (radio={RADIO_KM} km, min_sismos={MIN_SISMOS})...")
-    coords_rad = np.radians(df[['latitude', 'longitude']].values)
-    db = DBSCAN(eps=RADIO_RAD, min_samples=MIN_SISMOS, algorithm='ball_tree', metric='haversine')
-    df['cluster'] = db.fit_predict(coords_rad)
+    lat, lon = df['latitude'].to_numpy(), df['longitude'].to_numpy()
+    if neighbors == 'cells':
+        # Grilla de celdas de 50 km: una sola búsqueda de vecinos para la densidad y DBSCAN
+        cells = build_cells(lat, lon, RADIO_KM)
+        counts = neighbor_counts(lat, lon, RADIO_KM, cells)
+        df['cluster'] = dbscan_cells(lat, lon, RADIO_KM, MIN_SISMOS, cells, counts)
+    elif neighbors == 'shards':
+        # Catálogos globales: teselas con halo de 50 km en paralelo, unidas con union-find
+        df['cluster'], counts = sharded_dbscan(lat, lon, RADIO_KM, MIN_SISMOS, tile_deg, workers)
+    else:
+        coords_rad = np.radians(df[['latitude', 'longitude']].values)
+        db = DBSCAN(eps=RADIO_RAD, min_samples=MIN_SISMOS, algorithm='ball_tree', metric='haversine')
+        df['cluster'] = db.fit_predict(coords_rad)
+        counts = radius_density(lat, lon, RADIO_KM)
+    # Vecinos dentro del radio de DBSCAN (densidad local reutilizable para la puntuación de zonas)
+    df[f'sismos_radio_{RADIO_KM}km'] = counts
 
     n_clusters = len(set(df['cluster'])) - (1 if -1 in df['cluster'] else 0)
     n_noise = (df['cluster'] == -1).sum()
@@ -78,8 +105,8 @@ def run_analysis():
     # ----------------------------------------
     # GUARDAR DATASET ENRIQUECIDO
     # ----------------------------------------
-    df.to_csv('data/earthquakes_classified.csv', index=False)
-    print("Archivo guardado: data/earthquakes_classified.csv")
+    save_stage(df, 'classified')
+    print(f"Archivo guardado: {STAGE_CSV['classified']}")
 
     # ----------------------------------------
     # MAPA INTERACTIVO (ENRIQUECIDO)
@@ -93,72 +120,67 @@ def run_analysis():
 
     fig = go.Figure()
 
-    # Capa 1: puntos individuales de sismos coloreados por CLUSTER
-    for cluster_id in unique_clusters:
-        subset = df[df['cluster'] == cluster_id]
-        if len(subset) == 0:
-            continue
-            
-        color = color_map_cluster[cluster_id]
-        name = df[df['cluster'] == cluster_id]['zona_asignada'].iloc[0]
-        
-        # Preparar datos técnicos (manejando nulos)
-        nst_clean = subset['nst'].fillna(0)
-        rms_clean = subset['rms'].fillna(0)
-        
-        fig.add_trace(go.Scattermap(
-            lat=subset['latitude'],
-            lon=subset['longitude'],
-            mode='markers',
-            marker=dict(size=subset['mag'] * 2.2, color=color, opacity=0.7),
-            name=name,
-            text=subset['place'],
-            customdata=np.stack([
-                subset['mag'], 
-                subset['depth'], 
-                subset['nivel_riesgo'], 
-                subset['es_zona_segura'],
-                subset['time'].dt.strftime('%Y-%m-%d %H:%M'),
-                subset['zona_asignada'],
-                nst_clean,
-                rms_clean
-            ], axis=-1),
-            hovertemplate=(
-                "<b>%{text}</b><br><br>"
-                "<b>DATOS TÉCNICOS:</b><br>"
-                "• Magnitud: %{customdata[0]:.1f}<br>"
-                "• Profundidad: %{customdata[1]:.1f} km<br>"
-                "• Fecha/Hora: %{customdata[4]}<br>"
-                "• Estaciones (NST): %{customdata[6]:.0f}<br>"
-                "• Calidad (RMS): %{customdata[7]:.2f}<br><br>"
-                "<b>ANÁLISIS DE ZONA:</b><br>"
-                "• Pertenece a: <b>%{customdata[5]}</b><br>"
-                "• Tipo de zona: %{customdata[2]}<br>"
-                "• Clasificación: <b>%{customdata[3]}</b><extra></extra>"
-            )
-        ))
-
-    # Capa 2: centroides de cada hotspot (con información resumida)
-    for _, row in cluster_stats.iterrows():
-        color = color_map_cluster[row['cluster']]
-        fig.add_trace(go.Scattermap(
-            lat=[row['lat_centroid']],
-            lon=[row['lon_centroid']],
-            mode='markers+text',
-            marker=dict(size=15, color='black', opacity=0.8),
-            text=[row['id_zona']],
-            textposition='top center',
-            textfont=dict(size=10, color='black', family="Arial Black"),
-            showlegend=False,
-            customdata=[[row['count'], round(row['mag_promedio'], 2), round(row['mag_max'], 1), row['nivel_riesgo'], row['lugar_referencia']]],
-            hovertemplate=(
-                "<b>ZONA: %{text} (%{customdata[4]})</b><br>"
-                "Sismos detectados: %{customdata[0]}<br>"
-                "Magnitud Promedio: %{customdata[1]}<br>"
-                "Magnitud Máxima: %{customdata[2]}<br>"
-                "Nivel de Riesgo Global: <b>%{customdata[3]}</b><extra></extra>"
-            )
-        ))
+    # Capa 1: todos los sismos en una sola traza, coloreados por CLUSTER (código + escala discreta)
+    colors = [color_map_cluster[c] for c in unique_clusters]
+    fig.add_trace(points_trace(
+        df['latitude'], df['longitude'], category_codes(df['cluster'], unique_clusters), colors, df['mag'] * 2.2,
+        hovertemplate=(
+            "<b>%{customdata[0]}</b><br><br>"
+            "<b>DATOS TÉCNICOS:</b><br>"
+            "• Magnitud: %{customdata[1]:.1f}<br>"
+            "• Profundidad: %{customdata[2]:.1f} km<br>"
+            "• Fecha/Hora: %{customdata[5]}<br>"
+            "• Estaciones (NST): %{customdata[7]:.0f}<br>"
+            "• Calidad (RMS): %{customdata[8]:.2f}<br><br>"
+            "<b>ANÁLISIS DE ZONA:</b><br>"
+            "• Pertenece a: <b>%{customdata[6]}</b><br>"
+            "• Tipo de zona: %{customdata[3]}<br>"
+            "• Clasificación: <b>%{customdata[4]}</b><extra></extra>"
+        ),
+    ))
+    # Hover: textos repetidos (lugar, zona, riesgo) como códigos + valores únicos
+    hover = hover_script([
+        lookup_column(df['place']),
+        numeric_column(df['mag']),
+        numeric_column(df['depth']),
+        lookup_column(df['nivel_riesgo']),
+        lookup_column(df['es_zona_segura']),
+        datetime_column(df['time']),
+        lookup_column(df['zona_asignada']),
+        numeric_column(df['nst'], fill=0),
+        numeric_column(df['rms'], fill=0),
+    ], trace_index=0)
+
+    # Capa 2: centroides de todos los hotspots en una traza (con información resumida)
+    fig.add_trace(go.Scattermap(
+        lat=cluster_stats['lat_centroid'],
+        lon=cluster_stats['lon_centroid'],
+        mode='markers+text',
+        marker=dict(size=15, color='black', opacity=0.8),
+        text=cluster_stats['id_zona'],
+        textposition='top center',
+        textfont=dict(size=10, color='black', family="Arial Black"),
+        showlegend=False,
+        customdata=np.stack([
+            cluster_stats['count'],
+            cluster_stats['mag_promedio'].round(2),
+            cluster_stats['mag_max'].round(1),
+            cluster_stats['nivel_riesgo'],
+            cluster_stats['lugar_referencia']
+        ], axis=-1),
+        hovertemplate=(
+            "<b>ZONA: %{text} (%{customdata[4]})</b><br>"
+            "Sismos detectados: %{customdata[0]}<br>"
+            "Magnitud Promedio: %{customdata[1]}<br>"
+            "Magnitud Máxima: %{customdata[2]}<br>"
+            "Nivel de Riesgo Global: <b>%{customdata[3]}</b><extra></extra>"
+        )
+    ))
+
+    # Leyenda de zonas (trazas vacías: los puntos ya están en la capa 1 y `legend_script` los
+    # oculta/muestra al hacer clic en su zona)
+    zone_names = df.drop_duplicates('cluster').set_index('cluster')['zona_asignada']
+    fig.add_traces(legend_traces([zone_names[c] for c in unique_clusters], colors))
 
     fig.update_layout(
         map=dict(
@@ -174,11 +196,44 @@ def run_analysis():
         margin={"r": 0, "t": 60, "l": 0, "b": 0}
     )
 
-    output_file = 'documentacion/mapa_hotspots.html'
-    fig.write_html(output_file)
+    output_file = os.path.join(DOC_DIR, 'mapa_hotspots.html')
+    fig.write_html(output_file, post_script=hover + legend_script(trace_index=0))
     print(f"Mapa actualizado: {output_file}")
 
     return df, cluster_stats
 
+def run_sweep(eps_values_km=EPS_BARRIDO_KM, min_samples_values=MIN_SISMOS_BARRIDO, workers=None, engine='graph'):
+    """Compara hotspots y ruido para cada (eps, min_sismos) sobre un único grafo de vecinos."""
+    print("Cargando datos...")
+    df = load_events('raw', columns=['latitude', 'longitude'])
+    n_combos = len(eps_values_km) * len(min_samples_values)
+    print(f"Barrido DBSCAN: {n_combos} combinaciones (grafo de vecinos a {max(eps_values_km)} km)...")
+    table = sweep_dbscan(df['latitude'].to_numpy(), df['longitude'].to_numpy(),
+                         eps_values_km, min_samples_values, workers=workers, engine=engine)
+    print(table.to_string(index=False))
+
+    output_file = os.path.join(DOC_DIR, 'dbscan_barrido.csv')
+    table.to_csv(output_file, index=False)
+    print(f"Tabla comparativa guardada: {output_file}")
+    return table
+
 if __name__ == "__main__":
-    run_analysis()
+    parser = argparse.ArgumentParser(description="Hotspots sísmicos con DBSCAN")
+    parser.add_argument('--sweep', action='store_true',
+                        help="Barrido de parámetros (eps, min_sismos) en lugar del análisis completo")
+    parser.add_argument('--eps-km', type=float, nargs='+', default=EPS_BARRIDO_KM, help="Radios a evaluar (km)")
+    parser.add_argument('--min-samples', type=int, nargs='+', default=MIN_SISMOS_BARRIDO,
+                        help="Valores de min_sismos a evaluar")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos del pool (por defecto, uno por CPU)")
+    parser.add_argument('--engine', choices=['graph', 'sklearn'], default='graph',
+                        help="'graph': expansión vectorizada sobre el grafo; 'sklearn': DBSCAN(metric='precomputed')")
+    parser.add_argument('--neighbors', choices=['cells', 'shards', 'balltree'], default='cells',
+                        help="Búsqueda de vecinos del análisis completo: grilla de celdas, teselas en paralelo o BallTree")
+    parser.add_argument('--tile-deg', type=float, default=TAMANO_TESELA_GRADOS,
+                        help="Tamaño de tesela en grados (--neighbors shards)")
+    args = parser.parse_args()
+
+    if args.sweep:
+        run_sweep(args.eps_km, args.min_samples, args.workers, args.engine)
+    else:
+        run_analysis(args.neighbors, args.workers, args.tile_deg)
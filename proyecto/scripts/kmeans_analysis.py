@@ -1,15 +1,42 @@
+import argparse
+from collections import Counter
+import joblib
 import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
+import os
+import pyarrow as pa
+import pyarrow.dataset as ds
+from sklearn.cluster import MiniBatchKMeans
 from sklearn.preprocessing import StandardScaler
 import plotly.graph_objects as go
-import plotly.express as px
+
+from event_store import (
+    EXPORT_CSV, STAGE_CSV, apply_schema, export_csv, read_stage, record_csv_export, replace_years, save_stage,
+    stage_exists, stage_years, write_stage_chunks,
+)
+from map_render import (
+    category_codes, hover_script, legend_script, legend_traces, lookup_column, numeric_column, points_trace,
+)
+from model_cache import MODEL_DIR, assign_nearest, get_kmeans
+from seismic_data import DOC_DIR, iter_events, load_events, write_atomic
 
 # ----------------------------------------
 # CONFIGURACIÓN
 # ----------------------------------------
 N_CLUSTERS = 15  # Número de zonas a identificar
-path = 'data/earthquakes_raw.csv'
+path = STAGE_CSV['raw']
+
+# Modo por bloques (catálogos que no caben en memoria)
+FILAS_POR_BLOQUE = 200_000
+EPOCAS_MINIBATCH = 3
+MAX_LUGARES_POR_ZONA = 1000  # Lugares candidatos retenidos por zona para el lugar de referencia
+
+# Modo de asignación incremental: estado persistido del último ajuste completo
+ZONE_STATE_PATH = os.path.join(MODEL_DIR, 'kmeans_zonas.joblib')
+UMBRAL_DERIVA_INERCIA = 1.5   # Distancia cuadrática media de los nuevos / la del ajuste
+UMBRAL_DERIVA_TAMANOS = 0.10  # Variación total entre la distribución de tamaños actual y la del ajuste
+MIN_EVENTOS_DERIVA = 50       # Eventos asignados (acumulados) antes de evaluar la deriva de inercia
+COORDS = ['latitude', 'longitude']
 
 def clasificar_riesgo_kmeans(count):
     if count >= 400:
@@ -23,20 +50,134 @@ def clasificar_riesgo_kmeans(count):
     else:
         return 'Zona relativamente segura'
 
+def label_zones(cluster_stats):
+    """Agrega nivel_riesgo e id_zona a la tabla de estadísticas por cluster."""
+    cluster_stats['nivel_riesgo'] = cluster_stats['count'].apply(clasificar_riesgo_kmeans)
+    cluster_stats['id_zona'] = ['Zona ' + str(i+1) for i in range(len(cluster_stats))]
+    return cluster_stats
+
+def assign_zones(df, cluster_stats):
+    """Mapea el riesgo y la zona de cada evento según su cluster."""
+    riesgo_map = cluster_stats.set_index('cluster_kmeans')['nivel_riesgo'].to_dict()
+    id_zona_map = cluster_stats.set_index('cluster_kmeans')['id_zona'].to_dict()
+    
+    df['nivel_riesgo'] = df['cluster_kmeans'].map(riesgo_map)
+    df['zona_asignada'] = df['cluster_kmeans'].map(id_zona_map)
+
+    # Variable binaria de seguridad
+    df['es_zona_segura'] = df['nivel_riesgo'].apply(
+        lambda x: 'Segura' if x == 'Zona relativamente segura' or x == 'Riesgo bajo' else 'Peligrosa'
+    )
+    return df
+
+class ClusterAccumulator:
+    """
+    Estadísticas por cluster acumulables bloque a bloque y combinables entre sí
+    (conteo, suma y máximo de magnitud, suma de coordenadas y lugares más frecuentes).
+    """
+    def __init__(self, n_clusters):
+        self.count = np.zeros(n_clusters, dtype='int64')
+        self.mag_count = np.zeros(n_clusters, dtype='int64')
+        self.mag_sum = np.zeros(n_clusters)
+        self.mag_max = np.full(n_clusters, -np.inf)
+        self.lat_sum = np.zeros(n_clusters)
+        self.lon_sum = np.zeros(n_clusters)
+        self.places = [Counter() for _ in range(n_clusters)]
+
+    def update(self, labels, df, sign=1):
+        """Suma (sign=1) o descuenta (sign=-1) los eventos de `df`. Al descontar, el máximo no se recalcula."""
+        n = len(self.count)
+        labels = np.asarray(labels, dtype='int64')
+        mag = df['mag'].to_numpy(dtype='float64')
+        valid = ~np.isnan(mag)
+        self.count += sign * np.bincount(labels, minlength=n)
+        self.mag_count += sign * np.bincount(labels[valid], minlength=n)
+        self.mag_sum += sign * np.bincount(labels[valid], weights=mag[valid], minlength=n)
+        if sign > 0:
+            np.maximum.at(self.mag_max, labels[valid], mag[valid])
+        self.lat_sum += sign * np.bincount(labels, weights=df['latitude'].to_numpy(dtype='float64'), minlength=n)
+        self.lon_sum += sign * np.bincount(labels, weights=df['longitude'].to_numpy(dtype='float64'), minlength=n)
+        pairs = pd.DataFrame({'c': labels, 'p': df['place'].astype(object)}).dropna().value_counts()
+        for (c, place), cnt in pairs.items():
+            self.places[c][place] += sign * cnt
+            if self.places[c][place] <= 0:
+                del self.places[c][place]
+        self._prune()
+        return self
+
+    def merge(self, other):
+        self.count += other.count
+        self.mag_count += other.mag_count
+        self.mag_sum += other.mag_sum
+        self.mag_max = np.maximum(self.mag_max, other.mag_max)
+        self.lat_sum += other.lat_sum
+        self.lon_sum += other.lon_sum
+        for mine, theirs in zip(self.places, other.places):
+            mine.update(theirs)
+        self._prune()
+        return self
+
+    def _prune(self):
+        # Memoria acotada: solo se conservan los lugares más frecuentes de cada zona
+        for i, counter in enumerate(self.places):
+            if len(counter) > 2 * MAX_LUGARES_POR_ZONA:
+                self.places[i] = Counter(dict(counter.most_common(MAX_LUGARES_POR_ZONA)))
+
+    def to_state(self):
+        return {name: value for name, value in vars(self).items()}
+
+    @classmethod
+    def from_state(cls, state):
+        acc = cls(len(state['count']))
+        for name, value in state.items():
+            setattr(acc, name, value)
+        return acc
+
+    def to_frame(self):
+        present = np.flatnonzero(self.count > 0)
+        count = self.count[present]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.DataFrame({
+                'cluster_kmeans': present,
+                'count': self.mag_count[present],
+                'mag_promedio': self.mag_sum[present] / self.mag_count[present],
+                'mag_max': np.where(np.isinf(self.mag_max[present]), np.nan, self.mag_max[present]),
+                'lat_centroid': self.lat_sum[present] / count,
+                'lon_centroid': self.lon_sum[present] / count,
+                # Moda de `place` (en empate, el primero en orden alfabético, como Series.mode)
+                'lugar_referencia': [min(self.places[c].items(), key=lambda kv: (-kv[1], str(kv[0])))[0]
+                                     if self.places[c] else None for c in present],
+            })
+
+def _watermark(df):
+    return df['updated'].max() if 'updated' in df.columns and len(df) else None
+
+def _dump_zone_state(state):
+    # Es la única copia del scaler y los centroides: nunca se deja a medio escribir
+    write_atomic(ZONE_STATE_PATH, lambda tmp_path: joblib.dump(state, tmp_path))
+
+def save_zone_state(scaler, centers, acc, sq_dist_mean, watermark):
+    """Persiste lo necesario para asignar eventos nuevos sin reajustar el modelo."""
+    state = {
+        'scaler': scaler, 'centers': centers, 'stats': acc.to_state(),
+        'sq_dist_mean': float(sq_dist_mean), 'watermark': watermark,
+        'size_fraction': acc.count / max(acc.count.sum(), 1),
+        'asignados_desde_ajuste': 0, 'sq_dist_nuevos': 0.0, 'refit_recomendado': False,
+    }
+    _dump_zone_state(state)
+    return state
+
 def run_kmeans_analysis():
     print("Cargando datos para K-Means...")
-    df = pd.read_csv(path)
-    df['time'] = pd.to_datetime(df['time'])
+    df = load_events('raw')
 
     # 1. Preparar datos para clustering (Coordenadas)
-    X = df[['latitude', 'longitude']]
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
+    X = df[COORDS]
 
-    # 2. Aplicar K-Means
+    # 2. Aplicar K-Means (escalado + modelo desde la caché si los datos no cambiaron)
     print(f"Agrupando datos en {N_CLUSTERS} zonas usando K-Means...")
-    kmeans = KMeans(n_clusters=N_CLUSTERS, random_state=42, n_init=10)
-    df['cluster_kmeans'] = kmeans.fit_predict(X_scaled)
+    model = get_kmeans(X, N_CLUSTERS)
+    df['cluster_kmeans'] = model['labels']
 
     # 3. Calcular estadísticas por cluster
     cluster_stats = df.groupby('cluster_kmeans').agg(
@@ -48,24 +189,16 @@ def run_kmeans_analysis():
         lugar_referencia=('place', lambda x: x.mode()[0])
     ).reset_index()
 
-    cluster_stats['nivel_riesgo'] = cluster_stats['count'].apply(clasificar_riesgo_kmeans)
-    cluster_stats['id_zona'] = ['Zona ' + str(i+1) for i in range(len(cluster_stats))]
+    cluster_stats = label_zones(cluster_stats)
 
     # 4. Mapear riesgos
-    riesgo_map = cluster_stats.set_index('cluster_kmeans')['nivel_riesgo'].to_dict()
-    id_zona_map = cluster_stats.set_index('cluster_kmeans')['id_zona'].to_dict()
-    
-    df['nivel_riesgo'] = df['cluster_kmeans'].map(riesgo_map)
-    df['zona_asignada'] = df['cluster_kmeans'].map(id_zona_map)
+    df = assign_zones(df, cluster_stats)
 
-    # Variable binaria de seguridad
-    df['es_zona_segura'] = df['nivel_riesgo'].apply(
-        lambda x: 'Segura' if x == 'Zona relativamente segura' or x == 'Riesgo bajo' else 'Peligrosa'
-    )
-
-    # 5. Guardar resultados
-    df.to_csv('data/earthquakes_kmeans.csv', index=False)
-    print("Archivo guardado: data/earthquakes_kmeans.csv")
+    # 5. Guardar resultados (y el estado para el modo de asignación incremental)
+    save_stage(df, 'kmeans')
+    print(f"Archivo guardado: {STAGE_CSV['kmeans']}")
+    acc = ClusterAccumulator(N_CLUSTERS).update(model['labels'], df)
+    save_zone_state(model['scaler'], model['centers'], acc, model['inertia'] / len(df), _watermark(df))
 
     # 6. Tabla Resumen consolidada
     print("\n--- RESUMEN DE ZONAS (K-Means) ---")
@@ -84,31 +217,24 @@ def run_kmeans_analysis():
 
     fig = go.Figure()
 
-    # Capa de sismos individuales
-    for nivel, color in color_map_riesgo.items():
-        subset = df[df['nivel_riesgo'] == nivel]
-        if len(subset) == 0: continue
-        
-        fig.add_trace(go.Scattermap(
-            lat=subset['latitude'],
-            lon=subset['longitude'],
-            mode='markers',
-            marker=dict(size=subset['mag'] * 1.8, color=color, opacity=0.4),
-            name=nivel,
-            text=subset['place'],
-            customdata=np.stack([
-                subset['mag'], 
-                subset['depth'], 
-                subset['zona_asignada'],
-                subset['nivel_riesgo']
-            ], axis=-1),
-            hovertemplate=(
-                "<b>%{text}</b><br>"
-                "Zona: %{customdata[2]}<br>"
-                "Magnitud: %{customdata[0]:.1f}<br>"
-                "Nivel Riesgo: <b>%{customdata[3]}</b><extra></extra>"
-            )
-        ))
+    # Capa de sismos individuales: una sola traza coloreada por nivel de riesgo
+    niveles = list(color_map_riesgo)
+    fig.add_trace(points_trace(
+        df['latitude'], df['longitude'], category_codes(df['nivel_riesgo'], niveles),
+        list(color_map_riesgo.values()), df['mag'] * 1.8, opacity=0.4,
+        hovertemplate=(
+            "<b>%{customdata[0]}</b><br>"
+            "Zona: %{customdata[2]}<br>"
+            "Magnitud: %{customdata[1]:.1f}<br>"
+            "Nivel Riesgo: <b>%{customdata[3]}</b><extra></extra>"
+        ),
+    ))
+    hover = hover_script([
+        lookup_column(df['place']),
+        numeric_column(df['mag']),
+        lookup_column(df['zona_asignada']),
+        lookup_column(df['nivel_riesgo']),
+    ], trace_index=0)
 
     # Centros de los clusters (sin la propiedad 'line' que falló)
     fig.add_trace(go.Scattermap(
@@ -122,6 +248,12 @@ def run_kmeans_analysis():
         hovertemplate="Centroide de %{text}<extra></extra>"
     ))
 
+    # Leyenda de niveles presentes (trazas vacías: los puntos ya están en la primera capa y
+    # `legend_script` los oculta/muestra al hacer clic en su nivel)
+    presentes = [nivel for nivel in niveles if (df['nivel_riesgo'] == nivel).any()]
+    fig.add_traces(legend_traces(presentes, [color_map_riesgo[nivel] for nivel in presentes],
+                                 codes=[niveles.index(nivel) for nivel in presentes]))
+
     fig.update_layout(
         map=dict(style="carto-positron", center=dict(lat=4.57, lon=-74.30), zoom=4.5),
         title="Agrupación Geográfica de Riesgo Sísmico (K-Means Clustering)",
@@ -129,11 +261,192 @@ def run_kmeans_analysis():
         margin={"r":0,"t":50,"l":0,"b":0}
     )
 
-    output_file = 'documentacion/mapa_kmeans.html'
-    fig.write_html(output_file)
+    output_file = os.path.join(DOC_DIR, 'mapa_kmeans.html')
+    fig.write_html(output_file, post_script=hover + legend_script(trace_index=0))
     print(f"Mapa K-Means guardado: {output_file}")
 
     return df, cluster_stats
 
+def run_kmeans_streaming(batch_size=FILAS_POR_BLOQUE, epochs=EPOCAS_MINIBATCH):
+    """
+    K-Means por bloques con memoria acotada (MiniBatchKMeans.partial_fit sobre el almacén).
+
+    Pasadas: (1) escalado incremental, (2) ajuste del modelo durante `epochs` recorridos,
+    (3) etiquetas y estadísticas acumuladas por cluster, (4) escritura de la etapa 'kmeans'
+    bloque a bloque con el nivel de riesgo ya conocido.
+    """
+    coords = COORDS
+    columns = coords + ['mag', 'place', 'updated']
+
+    print("Pasada 1: escalado incremental...")
+    scaler = StandardScaler()
+    for chunk in iter_events('raw', columns=coords, batch_size=batch_size):
+        scaler.partial_fit(chunk[coords].to_numpy(dtype='float64'))
+
+    print(f"Pasada 2: MiniBatchKMeans ({N_CLUSTERS} zonas, {epochs} épocas)...")
+    kmeans = MiniBatchKMeans(n_clusters=N_CLUSTERS, random_state=42, batch_size=4096, n_init=3)
+    for epoch in range(epochs):
+        # Las filas pendientes no pasan a la época siguiente (se duplicarían)
+        pending = None
+        for chunk in iter_events('raw', columns=coords, batch_size=batch_size):
+            X_chunk = scaler.transform(chunk[coords].to_numpy(dtype='float64'))
+            # El primer partial_fit necesita al menos N_CLUSTERS filas
+            if pending is not None:
+                X_chunk = np.vstack([pending, X_chunk])
+                pending = None
+            if not hasattr(kmeans, 'cluster_centers_') and len(X_chunk) < N_CLUSTERS:
+                pending = X_chunk
+                continue
+            kmeans.partial_fit(X_chunk)
+    if not hasattr(kmeans, 'cluster_centers_'):
+        n_rows = 0 if pending is None else len(pending)
+        raise ValueError(f"La etapa 'raw' tiene {n_rows} eventos con coordenadas; "
+                         f"el modelo necesita al menos {N_CLUSTERS} (uno por zona).")
+
+    print("Pasada 3: etiquetas y estadísticas por cluster...")
+    stats = ClusterAccumulator(N_CLUSTERS)
+    sq_dist_sum, watermark = 0.0, None
+    for chunk in iter_events('raw', columns=columns, batch_size=batch_size):
+        labels, sq_dist = assign_nearest(scaler.transform(chunk[coords].to_numpy(dtype='float64')),
+                                         kmeans.cluster_centers_)
+        stats.update(labels, chunk)
+        sq_dist_sum += sq_dist.sum()
+        chunk_mark = _watermark(chunk)
+        if chunk_mark is not None and (watermark is None or chunk_mark > watermark):
+            watermark = chunk_mark
+    cluster_stats = label_zones(stats.to_frame())
+
+    print("Pasada 4: guardando eventos etiquetados...")
+    csv_path = STAGE_CSV['kmeans']
+    tmp_csv = f"{csv_path}.tmp"
+
+    def labeled_chunks():
+        first = True
+        for chunk in iter_events('raw', batch_size=batch_size):
+            chunk['cluster_kmeans'] = kmeans.predict(scaler.transform(chunk[coords].to_numpy(dtype='float64')))
+            chunk = apply_schema(assign_zones(chunk, cluster_stats))
+            if EXPORT_CSV:
+                export_csv(chunk, tmp_csv, mode='w' if first else 'a', header=first)
+            first = False
+            yield chunk
+
+    total = write_stage_chunks(labeled_chunks(), 'kmeans')
+    if EXPORT_CSV and os.path.exists(tmp_csv):
+        os.replace(tmp_csv, csv_path)
+        record_csv_export('kmeans', csv_path)
+    print(f"Archivo guardado: {csv_path} ({total} eventos)")
+    save_zone_state(scaler, kmeans.cluster_centers_, stats, sq_dist_sum / max(total, 1), watermark)
+
+    print("\n--- RESUMEN DE ZONAS (K-Means por bloques) ---")
+    resumen = cluster_stats.sort_values('count', ascending=False)
+    print(resumen[['id_zona', 'lugar_referencia', 'count', 'nivel_riesgo']].to_string(index=False))
+    return cluster_stats
+
+def _new_raw_events(watermark):
+    # Eventos creados o revisados después del último ajuste/asignación
+    if stage_exists('raw'):
+        where = ds.field('updated') > pa.scalar(watermark.to_pydatetime()) if watermark is not None else None
+        return read_stage('raw', where=where)
+    df = load_events('raw')
+    return df[df['updated'] > watermark] if watermark is not None else df
+
+def assign_new_events():
+    """
+    Asigna a su zona solo los eventos nuevos o revisados desde la última ejecución.
+
+    Usa el scaler y los centroides persistidos (centroide más cercano, sin reajustar),
+    actualiza los conteos por zona y sus niveles de riesgo, y reescribe únicamente los años
+    afectados de la etapa 'kmeans' (todos, solo si algún nivel de riesgo cambió).
+    """
+    if not os.path.exists(ZONE_STATE_PATH) or not stage_exists('kmeans'):
+        print("No hay un ajuste previo. Ejecute primero el análisis completo (sin --assign).")
+        return None
+    state = joblib.load(ZONE_STATE_PATH)
+    acc = ClusterAccumulator.from_state(state['stats'])
+    before = label_zones(acc.to_frame())
+
+    new = _new_raw_events(state['watermark'])
+    if new.empty:
+        print("Sin eventos nuevos desde la última asignación.")
+        return before
+    print(f"Asignando {len(new)} eventos nuevos o revisados...")
+
+    # Versiones anteriores de eventos revisados: se descuentan de las estadísticas. Solo se
+    # abren las particiones de los años de los eventos nuevos (más el vecino si están a un día
+    # del cambio de año, por si la revisión movió la hora de origen), no todo el catálogo
+    ids = new['id'].astype(str).tolist()
+    candidate_years = (set(new['time'].dt.year) | set((new['time'] - pd.Timedelta(days=1)).dt.year)
+                       | set((new['time'] + pd.Timedelta(days=1)).dt.year))
+    previous = read_stage('kmeans', columns=['id', 'time', 'cluster_kmeans', 'mag', 'latitude', 'longitude', 'place'],
+                          years=sorted(candidate_years & set(stage_years('kmeans'))),
+                          where=ds.field('id').isin(ids))
+    if len(previous):
+        acc.update(previous['cluster_kmeans'].to_numpy(), previous, sign=-1)
+
+    labels, sq_dist = assign_nearest(state['scaler'].transform(new[COORDS].to_numpy(dtype='float64')), state['centers'])
+    new['cluster_kmeans'] = labels
+    acc.update(labels, new)
+    cluster_stats = label_zones(acc.to_frame())
+    new = assign_zones(new, cluster_stats)
+
+    # Años a reescribir: los de los eventos nuevos y los de sus versiones anteriores
+    tiers_changed = not before[['cluster_kmeans', 'nivel_riesgo', 'id_zona']].equals(
+        cluster_stats[['cluster_kmeans', 'nivel_riesgo', 'id_zona']])
+    touched = set(new['time'].dt.year) | set(previous['time'].dt.year)
+    if tiers_changed:
+        print("Cambió el nivel de riesgo de al menos una zona: se actualizan todas las particiones.")
+        touched |= set(stage_years('kmeans'))
+    new_ids = set(ids)
+    for year in sorted(touched):
+        current = read_stage('kmeans', years=[year])
+        current = current[~current['id'].astype(str).isin(new_ids)]
+        if tiers_changed:
+            current = assign_zones(current, cluster_stats)
+        year_rows = new[new['time'].dt.year == year]
+        replace_years(pd.concat([current, year_rows], ignore_index=True), 'kmeans', [year])
+
+    # Deriva: los nuevos (acumulados desde el ajuste) quedan lejos de los centroides
+    # o cambió el reparto entre zonas
+    n_assigned = state['asignados_desde_ajuste'] + len(new)
+    sq_dist_total = state['sq_dist_nuevos'] + float(sq_dist.sum())
+    ratio = (sq_dist_total / n_assigned) / state['sq_dist_mean'] if state['sq_dist_mean'] > 0 else np.inf
+    size_fraction = acc.count / max(acc.count.sum(), 1)
+    shift = 0.5 * np.abs(size_fraction - state['size_fraction']).sum()
+    alerts = []
+    if n_assigned >= MIN_EVENTOS_DERIVA and ratio > UMBRAL_DERIVA_INERCIA:
+        alerts.append(f"inercia media de los nuevos {ratio:.2f}x la del ajuste")
+    if shift > UMBRAL_DERIVA_TAMANOS:
+        alerts.append(f"reparto entre zonas desplazado {shift:.1%}")
+
+    state.update({
+        'stats': acc.to_state(), 'watermark': max(state['watermark'], new['updated'].max())
+        if state['watermark'] is not None else new['updated'].max(),
+        'asignados_desde_ajuste': n_assigned, 'sq_dist_nuevos': sq_dist_total,
+        'refit_recomendado': state['refit_recomendado'] or bool(alerts),
+    })
+    _dump_zone_state(state)
+
+    print(f"Eventos asignados: {len(new)} ({len(previous)} revisiones)")
+    print(f"Deriva: inercia x{ratio:.2f}, variación de tamaños {shift:.1%}")
+    if state['refit_recomendado']:
+        print("AVISO: se recomienda reajustar el modelo completo (" + "; ".join(alerts or ['deriva previa']) + ").")
+    print(f"Etapa 'kmeans' actualizada en el almacén ({len(touched)} años reescritos); "
+          f"el CSV se regenera en la próxima ejecución completa.")
+    return cluster_stats
+
 if __name__ == "__main__":
-    run_kmeans_analysis()
+    parser = argparse.ArgumentParser(description="Zonificación sísmica con K-Means")
+    parser.add_argument('--stream', action='store_true',
+                        help="MiniBatchKMeans por bloques con memoria acotada (catálogos grandes)")
+    parser.add_argument('--batch-size', type=int, default=FILAS_POR_BLOQUE, help="Filas por bloque")
+    parser.add_argument('--epochs', type=int, default=EPOCAS_MINIBATCH, help="Recorridos de ajuste del modo por bloques")
+    parser.add_argument('--assign', action='store_true',
+                        help="Asigna solo los eventos nuevos con el modelo persistido (sin reajustar)")
+    args = parser.parse_args()
+
+    if args.assign:
+        assign_new_events()
+    elif args.stream:
+        run_kmeans_streaming(args.batch_size, args.epochs)
+    else:
+        run_kmeans_analysis()
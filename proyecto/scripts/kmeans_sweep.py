@@ -0,0 +1,121 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+from sklearn.metrics import silhouette_score
+from threadpoolctl import threadpool_limits
+
+# ----------------------------------------
+# BARRIDO DE K PARA KMEANS (CODO + SILHOUETTE)
+# ----------------------------------------
+# Dos estrategias:
+#   - 'parallel': cada k se ajusta desde cero (n_init reinicios) en un pool de procesos.
+#   - 'warm': secuencial; cada k parte de los centroides de k-1 dividiendo el cluster con
+#     mayor error (SSE) a lo largo de su eje principal, con un único ajuste por k.
+# La silhouette exacta es O(n²); por defecto se estima sobre una muestra de `sample_size`
+# eventos, o con la versión simplificada por centroides (O(n·k)).
+SILHOUETTE_MODES = ('exact', 'sampled', 'centroid')
+MUESTRA_SILHOUETTE = 10_000
+
+_WORKER_X = None
+
+def sampled_silhouette(X, labels, sample_size=MUESTRA_SILHOUETTE, random_state=42):
+    """Silhouette sobre una muestra aleatoria (exacta si hay menos de `sample_size` eventos)."""
+    if sample_size is None or len(X) <= sample_size:
+        return silhouette_score(X, labels)
+    return silhouette_score(X, labels, sample_size=sample_size, random_state=random_state)
+
+def centroid_silhouette(X, labels, centers):
+    """
+    Silhouette simplificada: a = distancia al centroide propio, b = distancia al centroide
+    más cercano de otro cluster. Coincide en tendencia con la exacta y cuesta O(n·k).
+    """
+    d2 = (X ** 2).sum(axis=1)[:, None] + (centers ** 2).sum(axis=1)[None, :] - 2 * X @ centers.T
+    d = np.sqrt(np.maximum(d2, 0.0))
+    rows = np.arange(len(X))
+    a = d[rows, labels]
+    d[rows, labels] = np.inf
+    b = d.min(axis=1)
+    denom = np.maximum(a, b)
+    s = np.divide(b - a, denom, out=np.zeros_like(a), where=denom > 0)
+    return float(s.mean())
+
+def silhouette(X, labels, centers, mode='sampled', sample_size=MUESTRA_SILHOUETTE, random_state=42):
+    if mode is None:
+        return np.nan
+    if mode == 'exact':
+        return silhouette_score(X, labels)
+    if mode == 'sampled':
+        return sampled_silhouette(X, labels, sample_size, random_state)
+    if mode == 'centroid':
+        return centroid_silhouette(X, labels, centers)
+    raise ValueError(f"Modo de silhouette desconocido: {mode} (use {SILHOUETTE_MODES})")
+
+def split_worst_cluster(X, labels, centers):
+    """Centroides iniciales para k+1: el cluster de mayor SSE se divide en dos sobre su eje principal."""
+    sse = np.bincount(labels, weights=((X - centers[labels]) ** 2).sum(axis=1), minlength=len(centers))
+    worst = int(sse.argmax())
+    members = X[labels == worst]
+    if len(members) < 2:
+        # Cluster degenerado: se usa como nueva semilla el punto más alejado de su centroide
+        far = X[((X - centers[labels]) ** 2).sum(axis=1).argmax()]
+        return np.vstack([centers, far])
+
+    cov = np.atleast_2d(np.cov(members, rowvar=False))
+    eigvals, eigvecs = np.linalg.eigh(cov)
+    offset = eigvecs[:, -1] * np.sqrt(max(eigvals[-1], 0.0))
+    new_centers = np.delete(centers, worst, axis=0)
+    return np.vstack([new_centers, centers[worst] - offset, centers[worst] + offset])
+
+def _init_worker(X, threads):
+    global _WORKER_X
+    _WORKER_X = X
+    threadpool_limits(threads)
+
+def _fit_k(k, n_init, random_state, sil_mode, sample_size):
+    X = _WORKER_X
+    model = KMeans(n_clusters=k, random_state=random_state, n_init=n_init).fit(X)
+    score = silhouette(X, model.labels_, model.cluster_centers_, sil_mode, sample_size, random_state)
+    return k, model, score
+
+def sweep_k(X, ks=range(2, 11), strategy='parallel', n_init=10, silhouette_mode='sampled',
+            sample_size=MUESTRA_SILHOUETTE, workers=None, random_state=42):
+    """
+    Ajusta KMeans para cada k de `ks` y devuelve (resultados, modelos):
+    resultados es un DataFrame con k, inercia y silhouette; modelos un dict k -> KMeans.
+    """
+    X = np.ascontiguousarray(X, dtype='float64')
+    ks = sorted(ks)
+    models, scores = {}, {}
+
+    if strategy == 'parallel':
+        workers = workers or min(len(ks), os.cpu_count() or 1)
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(X, threads)) as pool:
+            futures = [pool.submit(_fit_k, k, n_init, random_state, silhouette_mode, sample_size) for k in ks]
+            for future in futures:
+                k, model, score = future.result()
+                models[k], scores[k] = model, score
+                print(f"   k={k}: inercia={model.inertia_:.1f}, silhouette={score:.4f}")
+    elif strategy == 'warm':
+        prev = None
+        for k in ks:
+            if prev is not None and prev.n_clusters == k - 1:
+                init = split_worst_cluster(X, prev.labels_, prev.cluster_centers_)
+                model = KMeans(n_clusters=k, init=init, n_init=1, random_state=random_state).fit(X)
+            else:
+                model = KMeans(n_clusters=k, random_state=random_state, n_init=n_init).fit(X)
+            models[k] = prev = model
+            scores[k] = silhouette(X, model.labels_, model.cluster_centers_, silhouette_mode, sample_size, random_state)
+            print(f"   k={k}: inercia={model.inertia_:.1f}, silhouette={scores[k]:.4f}")
+    else:
+        raise ValueError(f"Estrategia desconocida: {strategy} (use 'parallel' o 'warm')")
+
+    results = pd.DataFrame({
+        'k': ks,
+        'Inertia': [models[k].inertia_ for k in ks],
+        'Silhouette': [scores[k] for k in ks],
+    })
+    return results, models
@@ -1,33 +1,430 @@
 import pandas as pd
 import os
+import io
+import json
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from event_store import DATA_DIR, STAGE_CSV, STORE_DIR, write_stage
+
+# Endpoint fdsnws de USGS
+BASE_URL = "https://earthquake.usgs.gov/fdsnws/event/1/query"
+
+# Filtros de la consulta (Colombia y alrededores)
+QUERY_PARAMS = {
+    "format": "csv",
+    "starttime": "2010-01-01",
+    "endtime": "2026-02-20",
+    "minlatitude": -4.5,
+    "maxlatitude": 13.5,
+    "minlongitude": -82,
+    "maxlongitude": -66.5,
+    "minmagnitude": 1.5,
+    "orderby": "time",
+}
+
+# Límite máximo de filas por respuesta del servidor USGS
+PAGE_SIZE = 20000
 
 # URL del dataset de terremotos (USGS)
-url = (
-    "https://earthquake.usgs.gov/fdsnws/event/1/query"
-    "?format=csv&starttime=2010-01-01&endtime=2026-02-20"
-    "&minlatitude=-4.5&maxlatitude=13.5"
-    "&minlongitude=-82&maxlongitude=-66.5"
-    "&minmagnitude=1.5&orderby=time&limit=20000"
-)
+url = f"{BASE_URL}?{urlencode(QUERY_PARAMS)}&limit={PAGE_SIZE}"
+
+RAW_DATA_PATH = STAGE_CSV['raw']
+
+# Almacén local de eventos (clave: id USGS) y estado de la sincronización
+STORE_PATH = os.path.join(DATA_DIR, 'usgs_event_store.csv')
+STATE_PATH = os.path.join(DATA_DIR, 'usgs_sync_state.json')
+# Mosaicos pendientes del backfill en curso (permite retomarlo tras un error o una interrupción)
+BACKFILL_STATE_PATH = os.path.join(DATA_DIR, 'usgs_backfill_state.json')
+# Cada cuántos segundos el backfill integra al almacén lo recibido y guarda los pendientes
+CHECKPOINT_SECONDS = 30
+
+# Margen de seguridad frente a desfases de reloj con el servidor
+SYNC_OVERLAP = timedelta(minutes=10)
+
+# Región completa del planeta para backfills globales (lat_min, lat_max, lon_min, lon_max)
+GLOBAL_BBOX = (-90.0, 90.0, -180.0, 180.0)
+
+# Por debajo de esta duración una ventana ya no se divide en el tiempo sino en el espacio
+MIN_WINDOW = timedelta(hours=1)
+MIN_TILE_DEG = 0.1
 
 def load_data():
     print("Cargando datos desde USGS...")
     try:
         df = pd.read_csv(url)
-        
+
         # Crear carpeta data si no existe
-        os.makedirs('data', exist_ok=True)
-        
+        os.makedirs(DATA_DIR, exist_ok=True)
+
         # Guardar una copia local
-        output_path = 'data/earthquakes_raw.csv'
+        output_path = RAW_DATA_PATH
         df.to_csv(output_path, index=False)
-        
+        write_stage(df, 'raw')
+
         print(f"Datos cargados exitosamente. Total de registros: {len(df)}")
+        if len(df) >= PAGE_SIZE:
+            print(f"Advertencia: la respuesta alcanzó el límite de {PAGE_SIZE} filas y puede estar truncada. "
+                  "Use --sync para descargar el catálogo completo por páginas.")
         print(f"Archivo guardado en: {output_path}")
         return df
     except Exception as e:
         print(f"Error al cargar los datos: {e}")
         return None
 
+# ----------------------------------------
+# SINCRONIZACIÓN INCREMENTAL
+# ----------------------------------------
+def fetch_page(session, params, base_url=BASE_URL, timeout=60):
+    """Descarga una página CSV del endpoint fdsnws (vacía si el servidor responde 204)."""
+    resp = session.get(base_url, params=params, timeout=timeout)
+    # Primero los errores HTTP: un 429/5xx sin cuerpo no es una página vacía
+    resp.raise_for_status()
+    if resp.status_code == 204 or not resp.text.strip():
+        return pd.DataFrame()
+    return pd.read_csv(io.StringIO(resp.text))
+
+def upsert_events(store, new_events):
+    """Inserta o reemplaza eventos por `id`, conservando la versión con `updated` más reciente."""
+    if new_events.empty:
+        return store
+    if store is None or store.empty:
+        merged = new_events
+    else:
+        merged = pd.concat([store, new_events], ignore_index=True)
+    updated = pd.to_datetime(merged['updated'], utc=True, format='ISO8601')
+    merged = merged.iloc[updated.argsort(kind='stable')]
+    merged = merged.drop_duplicates(subset='id', keep='last')
+    return merged.sort_values('time', ascending=False).reset_index(drop=True)
+
+def _write_atomic(path, write_fn):
+    # Escribir en un temporal y renombrar: una interrupción nunca deja el archivo a medias
+    tmp_path = f"{path}.tmp"
+    write_fn(tmp_path)
+    os.replace(tmp_path, path)
+
+def _read_state(state_path):
+    if not os.path.exists(state_path):
+        return {}
+    with open(state_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _write_state(state, state_path):
+    def write(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+    _write_atomic(state_path, write)
+
+def _write_store(store, store_path):
+    _write_atomic(store_path, lambda tmp_path: store.to_csv(tmp_path, index=False))
+
+def _format_time(ts):
+    return ts.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+
+def _bootstrap_store(store_path, raw_path):
+    # Primera sincronización: reutilizar el almacén (o la descarga completa existente) como punto de partida
+    if os.path.exists(store_path):
+        store = pd.read_csv(store_path)
+    elif os.path.exists(raw_path):
+        raw = pd.read_csv(raw_path)
+        if not {'id', 'updated'}.issubset(raw.columns) or raw.empty:
+            return None, None
+        store = upsert_events(None, raw)
+    else:
+        return None, None
+    if store.empty:
+        return store, None
+    last = pd.to_datetime(store['updated'], utc=True, format='ISO8601').max()
+    return store, _format_time(last)
+
+def sync_catalog(base_url=BASE_URL, store_path=STORE_PATH, state_path=STATE_PATH,
+                 raw_path=RAW_DATA_PATH, page_size=PAGE_SIZE, session=None, store_dir=STORE_DIR):
+    """
+    Sincroniza el almacén local con USGS descargando solo eventos nuevos o actualizados.
+
+    Cada página se integra al almacén y se registra en el estado antes de pedir la
+    siguiente, de modo que una ejecución interrumpida se retoma en la página pendiente.
+    """
+    print("Sincronizando catálogo USGS (modo incremental)...")
+    os.makedirs(os.path.dirname(store_path) or '.', exist_ok=True)
+    session = session or requests.Session()
+
+    state = _read_state(state_path)
+    store, seed_updated = _bootstrap_store(store_path, raw_path)
+    if seed_updated and 'last_updated' not in state:
+        state['last_updated'] = seed_updated
+        print(f"Sincronizando a partir de los {len(store)} eventos ya almacenados.")
+
+    pending = state.get('pending')
+    if pending:
+        print(f"Retomando sincronización interrumpida (offset={pending['offset']})...")
+    else:
+        # Los eventos modificados durante la descarga se recogen en la siguiente ejecución
+        started = datetime.now(timezone.utc) - SYNC_OVERLAP
+        pending = {
+            'updatedafter': state.get('last_updated'),
+            'started': _format_time(started),
+            'offset': 1,
+        }
+        state['pending'] = pending
+        _write_state(state, state_path)
+
+    params = {k: v for k, v in QUERY_PARAMS.items() if k != 'endtime'}
+    # Orden ascendente: los eventos que llegan durante la descarga se agregan al final
+    params['orderby'] = 'time-asc'
+    params['limit'] = page_size
+    if pending['updatedafter']:
+        params['updatedafter'] = pending['updatedafter']
+
+    fetched = 0
+    while True:
+        page = fetch_page(session, {**params, 'offset': pending['offset']}, base_url=base_url)
+        if not page.empty:
+            store = upsert_events(store, page)
+            _write_store(store, store_path)
+        fetched += len(page)
+        pending['offset'] += len(page)
+        _write_state(state, state_path)
+        print(f"  Página recibida: {len(page)} eventos (acumulado: {fetched})")
+        if len(page) < page_size:
+            break
+
+    state['last_updated'] = pending['started']
+    state['last_sync'] = _format_time(datetime.now(timezone.utc))
+    state.pop('pending', None)
+    _write_state(state, state_path)
+
+    if store is None:
+        print("No hay eventos en el almacén local.")
+        return None
+
+    store.to_csv(raw_path, index=False)
+    write_stage(store, 'raw', store_dir)
+    print(f"Sincronización completa. Eventos nuevos/actualizados: {fetched}")
+    print(f"Total de eventos en el almacén: {len(store)}")
+    print(f"Archivo guardado en: {raw_path}")
+    return store
+
+# ----------------------------------------
+# BACKFILL PARALELO (VENTANAS DE TIEMPO x MOSAICOS ESPACIALES)
+# ----------------------------------------
+class RateLimiter:
+    """Limita las peticiones por segundo compartidas entre todos los hilos."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_time)
+            self.next_time = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def make_session(pool_size):
+    """Sesión HTTP con un pool de conexiones del tamaño de la concurrencia y reintentos ante 429/5xx."""
+    session = requests.Session()
+    retries = Retry(total=5, backoff_factor=1.0, status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=('GET',))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def plan_tiles(starttime, endtime, bbox, window_days=365, lat_tiles=1, lon_tiles=1):
+    """Divide el rango [starttime, endtime) y el bbox en mosaicos (inicio, fin, bbox)."""
+    start, end = pd.Timestamp(starttime), pd.Timestamp(endtime)
+    lat_min, lat_max, lon_min, lon_max = bbox
+    lat_edges = [lat_min + (lat_max - lat_min) * i / lat_tiles for i in range(lat_tiles + 1)]
+    lon_edges = [lon_min + (lon_max - lon_min) * i / lon_tiles for i in range(lon_tiles + 1)]
+
+    tiles = []
+    t0 = start
+    while t0 < end:
+        t1 = min(t0 + pd.Timedelta(days=window_days), end)
+        for i in range(lat_tiles):
+            for j in range(lon_tiles):
+                tiles.append((t0, t1, (lat_edges[i], lat_edges[i + 1], lon_edges[j], lon_edges[j + 1])))
+        t0 = t1
+    return tiles
+
+def split_tile(tile):
+    """Parte un mosaico saturado en dos: primero en el tiempo y, si ya es corto, en su eje espacial más largo."""
+    t0, t1, (lat_min, lat_max, lon_min, lon_max) = tile
+    if t1 - t0 > MIN_WINDOW:
+        mid = t0 + (t1 - t0) / 2
+        return [(t0, mid, tile[2]), (mid, t1, tile[2])]
+    if max(lat_max - lat_min, lon_max - lon_min) > MIN_TILE_DEG:
+        if lat_max - lat_min >= lon_max - lon_min:
+            mid = (lat_min + lat_max) / 2
+            return [(t0, t1, (lat_min, mid, lon_min, lon_max)), (t0, t1, (mid, lat_max, lon_min, lon_max))]
+        mid = (lon_min + lon_max) / 2
+        return [(t0, t1, (lat_min, lat_max, lon_min, mid)), (t0, t1, (lat_min, lat_max, mid, lon_max))]
+    return None
+
+def _tile_to_json(tile):
+    t0, t1, bbox = tile
+    return [t0.isoformat(), t1.isoformat(), list(bbox)]
+
+def _tile_from_json(item):
+    t0, t1, bbox = item
+    return pd.Timestamp(t0), pd.Timestamp(t1), tuple(bbox)
+
+def _tile_params(tile, minmagnitude, page_size):
+    t0, t1, (lat_min, lat_max, lon_min, lon_max) = tile
+    return {
+        'format': 'csv',
+        'starttime': t0.strftime('%Y-%m-%dT%H:%M:%S'),
+        'endtime': t1.strftime('%Y-%m-%dT%H:%M:%S'),
+        'minlatitude': lat_min, 'maxlatitude': lat_max,
+        'minlongitude': lon_min, 'maxlongitude': lon_max,
+        'minmagnitude': minmagnitude,
+        'orderby': 'time-asc',
+        'limit': page_size,
+    }
+
+def backfill_catalog(starttime=QUERY_PARAMS['starttime'], endtime=QUERY_PARAMS['endtime'],
+                     bbox=None, minmagnitude=QUERY_PARAMS['minmagnitude'],
+                     window_days=365, lat_tiles=1, lon_tiles=1, workers=8, rate_limit=5.0,
+                     base_url=BASE_URL, store_path=STORE_PATH, raw_path=RAW_DATA_PATH,
+                     page_size=PAGE_SIZE, state_path=BACKFILL_STATE_PATH, store_dir=STORE_DIR):
+    """
+    Descarga histórica en paralelo: ventanas de tiempo x mosaicos del bbox sobre un pool de hilos.
+
+    Los mosaicos que alcanzan el límite de filas del servidor se subdividen y se vuelven a
+    encolar. Lo recibido se integra al almacén local por `id` cada CHECKPOINT_SECONDS (y al
+    terminar o ante una interrupción), junto con la lista de mosaicos pendientes: los que
+    fallan quedan pendientes y una nueva ejecución con la misma consulta retoma solo esos.
+    """
+    if bbox is None:
+        bbox = (QUERY_PARAMS['minlatitude'], QUERY_PARAMS['maxlatitude'],
+                QUERY_PARAMS['minlongitude'], QUERY_PARAMS['maxlongitude'])
+    query = {'starttime': str(starttime), 'endtime': str(endtime), 'bbox': list(bbox),
+             'minmagnitude': minmagnitude, 'page_size': page_size}
+    os.makedirs(os.path.dirname(store_path) or '.', exist_ok=True)
+    state = _read_state(state_path)
+    if state.get('query') == query and state.get('pending'):
+        tiles = [_tile_from_json(item) for item in state['pending']]
+        print(f"Retomando backfill interrumpido: {len(tiles)} mosaicos pendientes")
+    else:
+        tiles = plan_tiles(starttime, endtime, bbox, window_days, lat_tiles, lon_tiles)
+        state = {'query': query, 'pending': [_tile_to_json(tile) for tile in tiles]}
+        _write_state(state, state_path)
+    print(f"Backfill USGS: {len(tiles)} mosaicos iniciales, {workers} hilos, "
+          f"límite {rate_limit or 'sin límite'} peticiones/s")
+
+    session = make_session(workers)
+    limiter = RateLimiter(rate_limit)
+
+    def fetch_tile(tile):
+        limiter.wait()
+        return fetch_page(session, _tile_params(tile, minmagnitude, page_size), base_url=base_url)
+
+    store = pd.read_csv(store_path) if os.path.exists(store_path) else None
+    frames, failed = [], []
+
+    def checkpoint(outstanding):
+        # Primero el almacén y luego los pendientes: si se corta entre ambos, al retomar se
+        # repiten mosaicos ya integrados y el upsert por id los unifica
+        nonlocal store
+        if frames:
+            # Los eventos en los bordes de dos mosaicos llegan duplicados; el upsert por id los unifica
+            store = upsert_events(store, pd.concat(frames, ignore_index=True))
+            _write_store(store, store_path)
+            frames.clear()
+        state['pending'] = [_tile_to_json(tile) for tile in outstanding]
+        _write_state(state, state_path)
+
+    n_requests = n_splits = fetched = 0
+    t_start = last_checkpoint = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(fetch_tile, tile): tile for tile in tiles}
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    tile = pending.pop(future)
+                    n_requests += 1
+                    try:
+                        page = future.result()
+                    except Exception as e:
+                        failed.append(tile)
+                        print(f"Error en el mosaico {tile[0]} - {tile[1]} {tile[2]}: {e}")
+                        continue
+                    if len(page) >= page_size:
+                        children = split_tile(tile)
+                        if children:
+                            n_splits += 1
+                            for child in children:
+                                pending[pool.submit(fetch_tile, child)] = child
+                            continue
+                        print(f"Advertencia: mosaico mínimo saturado, se conservan {len(page)} filas ({tile[0]}).")
+                    if not page.empty:
+                        frames.append(page)
+                        fetched += len(page)
+                if time.perf_counter() - last_checkpoint >= CHECKPOINT_SECONDS:
+                    checkpoint(list(pending.values()) + failed)
+                    last_checkpoint = time.perf_counter()
+        except BaseException:
+            # Interrupción (p. ej. Ctrl+C): se guarda lo recibido y quedan pendientes los que faltan
+            pool.shutdown(wait=False, cancel_futures=True)
+            checkpoint(list(pending.values()) + failed)
+            raise
+    checkpoint(failed)
+
+    elapsed = time.perf_counter() - t_start
+    print(f"Peticiones: {n_requests} | Mosaicos re-divididos: {n_splits} | "
+          f"Eventos: {fetched} | Tiempo: {elapsed:.1f} s ({n_requests / max(elapsed, 1e-9):.1f} pet/s)")
+    if failed:
+        raise RuntimeError(f"{len(failed)} mosaicos fallaron; lo descargado quedó en {store_path}. "
+                           "Ejecute de nuevo el backfill con la misma consulta para retomar solo esos mosaicos.")
+    if store is None:
+        print("No se descargaron eventos.")
+        return None
+
+    store.to_csv(raw_path, index=False)
+    write_stage(store, 'raw', store_dir)
+    print(f"Total de eventos en el almacén: {len(store)}")
+    print(f"Archivo guardado en: {raw_path}")
+    return store
+
 if __name__ == "__main__":
-    load_data()
+    parser = argparse.ArgumentParser(description="Descarga del catálogo sísmico USGS")
+    parser.add_argument('--sync', action='store_true',
+                        help="Sincronización incremental y reanudable contra el almacén local")
+    parser.add_argument('--backfill', action='store_true',
+                        help="Descarga histórica en paralelo por ventanas de tiempo y mosaicos")
+    parser.add_argument('--url', default=BASE_URL, help="Endpoint fdsnws (por defecto USGS)")
+    parser.add_argument('--start', default=QUERY_PARAMS['starttime'], help="Fecha inicial del backfill")
+    parser.add_argument('--end', default=QUERY_PARAMS['endtime'], help="Fecha final del backfill")
+    parser.add_argument('--global', dest='global_bbox', action='store_true',
+                        help="Backfill del catálogo mundial en lugar del bbox de Colombia")
+    parser.add_argument('--window-days', type=int, default=365, help="Duración de cada ventana de tiempo")
+    parser.add_argument('--lat-tiles', type=int, default=1, help="Mosaicos en latitud")
+    parser.add_argument('--lon-tiles', type=int, default=1, help="Mosaicos en longitud")
+    parser.add_argument('--workers', type=int, default=8, help="Peticiones concurrentes")
+    parser.add_argument('--rate', type=float, default=5.0, help="Máximo de peticiones por segundo (0 = sin límite)")
+    args = parser.parse_args()
+
+    if args.sync:
+        sync_catalog(base_url=args.url)
+    elif args.backfill:
+        backfill_catalog(starttime=args.start, endtime=args.end,
+                         bbox=GLOBAL_BBOX if args.global_bbox else None,
+                         window_days=args.window_days, lat_tiles=args.lat_tiles, lon_tiles=args.lon_tiles,
+                         workers=args.workers, rate_limit=args.rate, base_url=args.url)
+    else:
+        load_data()
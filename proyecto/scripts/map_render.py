@@ -0,0 +1,314 @@
+import argparse
+import base64
+import json
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+# ----------------------------------------
+# MAPAS DE PUNTOS EN UNA SOLA TRAZA (WEBGL)
+# ----------------------------------------
+# En lugar de una traza Scattermap por cluster o nivel de riesgo, todos los sismos van en
+# una sola traza con color (código de categoría + escala discreta) y tamaño por punto; Plotly
+# serializa esos arreglos numpy como binario. El hover tampoco repite texto por evento: las
+# columnas de texto viajan como códigos más una tabla de valores únicos y un script posterior
+# (post_script de write_html) arma `customdata` en el navegador con Plotly.restyle, así que
+# el mismo `hovertemplate` de siempre sigue funcionando. La leyenda son trazas vacías con el
+# código de su categoría en `meta`; `legend_script` atiende sus clics y filtra la traza única,
+# de modo que ocultar una zona o un nivel de riesgo sigue ocultando sus puntos.
+TAMANOS_BENCHMARK = (10_000, 100_000, 1_000_000)
+
+def _encode(values, dtype):
+    array = np.ascontiguousarray(np.asarray(values, dtype=dtype))
+    js_type = {'float32': 'Float32Array', 'uint8': 'Uint8Array', 'uint16': 'Uint16Array',
+               'uint32': 'Uint32Array', 'int32': 'Int32Array'}[array.dtype.name]
+    return {'type': js_type, 'b64': base64.b64encode(array.tobytes()).decode('ascii')}
+
+def _code_dtype(n_values):
+    return 'uint8' if n_values <= 1 << 8 else 'uint16' if n_values <= 1 << 16 else 'uint32'
+
+def numeric_column(values, fill=None):
+    """Columna numérica del hover (float32; con `fill`, los nulos se reemplazan por ese valor)."""
+    values = pd.Series(values, dtype='float64')
+    if fill is not None:
+        values = values.fillna(fill)
+    return {'kind': 'num', 'data': _encode(values.to_numpy(), 'float32')}
+
+def lookup_column(values):
+    """Columna de texto del hover como códigos + valores únicos (cada texto se envía una sola vez)."""
+    codes, uniques = pd.factorize(pd.Series(values).astype(str), sort=False)
+    return {'kind': 'lut', 'data': _encode(codes, _code_dtype(len(uniques))), 'values': list(uniques)}
+
+def datetime_column(values):
+    """Fecha/hora del hover (minutos desde 1970, formateados como 'AAAA-MM-DD HH:MM' en el navegador)."""
+    minutes = (pd.to_datetime(pd.Series(values), utc=True) - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(minutes=1)
+    return {'kind': 'date', 'data': _encode(minutes.to_numpy(), 'int32')}
+
+def category_codes(values, categories):
+    """Código (posición en `categories`) de cada valor, para colorear con `discrete_colorscale`."""
+    return pd.Categorical(values, categories=categories).codes.astype('uint8' if len(categories) <= 256 else 'uint16')
+
+def discrete_colorscale(colors):
+    """Escala de color por tramos: el código i se pinta con colors[i] (usar cmin=-0.5, cmax=n-0.5)."""
+    n = len(colors)
+    scale = []
+    for i, color in enumerate(colors):
+        scale += [[i / n, color], [(i + 1) / n, color]]
+    return scale
+
+def points_trace(lat, lon, codes, colors, size, hovertemplate, name='Sismos', opacity=0.7):
+    """Traza única de sismos con color y tamaño por punto (el hover lo completa `hover_script`)."""
+    return go.Scattermap(
+        lat=np.asarray(lat, dtype='float32'),
+        lon=np.asarray(lon, dtype='float32'),
+        mode='markers',
+        marker=dict(
+            size=np.asarray(size, dtype='float32'), color=codes, opacity=opacity,
+            colorscale=discrete_colorscale(colors), cmin=-0.5, cmax=len(colors) - 0.5, showscale=False,
+        ),
+        name=name,
+        showlegend=False,
+        hovertemplate=hovertemplate,
+    )
+
+def legend_traces(names, colors, size=10, codes=None):
+    """
+    Trazas vacías que solo dibujan la leyenda de categorías de la traza única. `codes` es el
+    código (de `category_codes`) de cada nombre; por defecto, su posición.
+    """
+    codes = range(len(names)) if codes is None else codes
+    return [
+        go.Scattermap(lat=[None], lon=[None], mode='markers', marker=dict(size=size, color=color), name=name,
+                      meta={'categoria': int(code)})
+        for name, color, code in zip(names, colors, codes)
+    ]
+
+# Decodificación de columnas (base64 -> arreglo tipado) y filas de `customdata` en el navegador
+_DECODE_JS = """
+function decode(spec) {
+    var raw = atob(spec.b64);
+    var bytes = new Uint8Array(raw.length);
+    for (var i = 0; i < raw.length; i++) bytes[i] = raw.charCodeAt(i);
+    return new window[spec.type](bytes.buffer);
+}
+function customRows(columns) {
+    var getters = columns.map(function(col) {
+        var data = decode(col.data);
+        if (col.kind === 'lut') return function(i) { return col.values[data[i]]; };
+        if (col.kind === 'date') return function(i) {
+            return new Date(data[i] * 60000).toISOString().slice(0, 16).replace('T', ' ');
+        };
+        return function(i) { return data[i]; };
+    });
+    var n = columns.length ? decode(columns[0].data).length : 0;
+    var rows = new Array(n);
+    for (var i = 0; i < n; i++) {
+        var row = new Array(getters.length);
+        for (var k = 0; k < getters.length; k++) row[k] = getters[k](i);
+        rows[i] = row;
+    }
+    return rows;
+}
+"""
+
+def hover_script(columns, trace_index=0):
+    """
+    JavaScript para `write_html(post_script=...)`: decodifica las columnas y asigna
+    `customdata` (una fila por punto, en el orden de `columns`) a la traza `trace_index`.
+    """
+    payload = json.dumps(columns, ensure_ascii=False)
+    return """
+var gd = document.getElementById('{plot_id}');
+var columns = %s;
+%s
+var custom = customRows(columns);
+Plotly.restyle(gd, {customdata: [custom]}, [%d]);
+""" % (payload.replace('</', '<\\/'), _DECODE_JS, trace_index)
+
+def legend_script(trace_index=0):
+    """
+    JavaScript para `write_html(post_script=...)`: el clic en una entrada de `legend_traces`
+    oculta o muestra los puntos de esa categoría en la traza `trace_index` (el doble clic la
+    aísla), filtrando por el código de color. Va después de `hover_script`.
+    """
+    return """
+(function() {
+var gd = document.getElementById('{plot_id}');
+var target = %d, base = null, hidden = {};
+var TYPES = {i1: Int8Array, u1: Uint8Array, i2: Int16Array, u2: Uint16Array, i4: Int32Array, u4: Uint32Array,
+             f4: Float32Array, f8: Float64Array};
+function asArray(value) {
+    // Plotly guarda los arreglos numpy como {dtype, bdata}
+    if (!value || typeof value !== 'object' || Array.isArray(value) || ArrayBuffer.isView(value)) return value;
+    var raw = atob(value.bdata);
+    var bytes = new Uint8Array(raw.length);
+    for (var i = 0; i < raw.length; i++) bytes[i] = raw.charCodeAt(i);
+    return new TYPES[value.dtype](bytes.buffer);
+}
+function category(curve) {
+    var meta = gd.data[curve].meta;
+    return meta && meta.categoria !== undefined ? meta.categoria : null;
+}
+function legendCurves() {
+    var curves = [];
+    for (var c = 0; c < gd.data.length; c++) if (category(c) !== null) curves.push(c);
+    return curves;
+}
+function apply() {
+    if (base === null) {
+        var trace = gd.data[target];
+        base = {lat: asArray(trace.lat), lon: asArray(trace.lon), size: asArray(trace.marker.size),
+                color: asArray(trace.marker.color), custom: trace.customdata};
+    }
+    var keep = [];
+    for (var i = 0; i < base.color.length; i++) if (!hidden[base.color[i]]) keep.push(i);
+    function pick(values) {
+        if (!values || values.length === undefined) return values;
+        var out = new values.constructor(keep.length);
+        for (var j = 0; j < keep.length; j++) out[j] = values[keep[j]];
+        return out;
+    }
+    var update = {lat: [pick(base.lat)], lon: [pick(base.lon)],
+                  'marker.size': [pick(base.size)], 'marker.color': [pick(base.color)]};
+    if (base.custom) update.customdata = [pick(base.custom)];
+    Plotly.restyle(gd, update, [target]);
+    var curves = legendCurves();
+    Plotly.restyle(gd, {visible: curves.map(function(c) { return hidden[category(c)] ? 'legendonly' : true; })}, curves);
+}
+gd.on('plotly_legendclick', function(e) {
+    var code = category(e.curveNumber);
+    if (code === null) return true;
+    hidden[code] = !hidden[code];
+    apply();
+    return false;
+});
+gd.on('plotly_legenddoubleclick', function(e) {
+    var code = category(e.curveNumber);
+    if (code === null) return true;
+    // Plotly emite antes el clic simple: se deshace y se aísla la categoría (o se muestran todas)
+    hidden[code] = !hidden[code];
+    var codes = legendCurves().map(category);
+    var isolated = codes.every(function(c) { return c === code ? !hidden[c] : hidden[c]; });
+    codes.forEach(function(c) { hidden[c] = !isolated && c !== code; });
+    apply();
+    return false;
+});
+})();
+""" % trace_index
+
+def frames_script(points, columns, starts, labels, trail=0, duration=500):
+    """
+    JavaScript para `write_html(post_script=...)` de una animación sin `frames` de Plotly.
+    Los eventos llegan una sola vez, ordenados por tiempo: `points` (lat, lon, mag como columnas
+    numéricas) y `columns` del hover. El cuadro i son los índices [starts[i], starts[i + 1]) y
+    se dibuja en la traza 1 con subarreglos (sin copiar); la estela de los `trail` cuadros
+    anteriores (todos si es negativo) va en la traza 0. El slider y los botones de la figura
+    usan method='skip' y este script atiende sus eventos.
+    """
+    spec = {'points': points, 'columns': columns, 'starts': [int(v) for v in starts],
+            'labels': list(labels), 'trail': int(trail), 'duration': int(duration)}
+    payload = json.dumps(spec, ensure_ascii=False)
+    return """
+var gd = document.getElementById('{plot_id}');
+var anim = %s;
+%s
+var lat = decode(anim.points.lat.data), lon = decode(anim.points.lon.data), mag = decode(anim.points.mag.data);
+var custom = customRows(anim.columns);
+var nFrames = anim.labels.length, current = -1, timer = null;
+
+function show(f, moveSlider) {
+    current = f;
+    var start = anim.starts[f], end = anim.starts[f + 1];
+    var from = anim.trail < 0 ? 0 : anim.starts[Math.max(0, f - anim.trail)];
+    Plotly.update(gd, {
+        lat: [lat.subarray(from, start), lat.subarray(start, end)],
+        lon: [lon.subarray(from, start), lon.subarray(start, end)],
+        'marker.size': [mag.subarray(from, start), mag.subarray(start, end)],
+        'marker.color': [mag.subarray(from, start), mag.subarray(start, end)],
+        customdata: [custom.slice(from, start), custom.slice(start, end)]
+    }, moveSlider ? {'sliders[0].active': f} : {}, [0, 1]);
+}
+function stop() {
+    if (timer !== null) clearTimeout(timer);
+    timer = null;
+}
+function play() {
+    stop();
+    var next = current + 1 < nFrames ? current + 1 : 0;
+    (function step() {
+        show(next, true);
+        next += 1;
+        timer = next < nFrames ? setTimeout(step, anim.duration) : null;
+    })();
+}
+gd.on('plotly_sliderchange', function(e) {
+    var f = +e.step.value;
+    if (f !== current) { stop(); show(f, false); }
+});
+gd.on('plotly_buttonclicked', function(e) {
+    if (e.button.args[0] === 'play') play(); else stop();
+});
+show(0, false);
+""" % (payload.replace('</', '<\\/'), _DECODE_JS)
+
+# ----------------------------------------
+# BENCHMARK: UNA TRAZA POR CLUSTER FRENTE A TRAZA ÚNICA
+# ----------------------------------------
+def _synthetic_events(n, n_clusters=20, n_places=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    places = np.array([f"{i} km NE of Lugar {i % 97}, Colombia" for i in range(n_places)])
+    return pd.DataFrame({
+        'latitude': rng.uniform(-4, 13, n), 'longitude': rng.uniform(-80, -67, n),
+        'mag': rng.uniform(2, 6, n).round(1), 'depth': rng.uniform(0, 200, n).round(1),
+        'place': places[rng.integers(0, n_places, n)],
+        'cluster': rng.integers(-1, n_clusters, n),
+        'time': pd.Timestamp('2000-01-01') + pd.to_timedelta(rng.integers(0, 25 * 365 * 1440, n), unit='min'),
+    })
+
+def _legacy_figure(df, colors):
+    # Forma anterior: una traza por cluster con customdata de texto apilado
+    fig = go.Figure()
+    for cluster_id in sorted(df['cluster'].unique()):
+        subset = df[df['cluster'] == cluster_id]
+        fig.add_trace(go.Scattermap(
+            lat=subset['latitude'], lon=subset['longitude'], mode='markers',
+            marker=dict(size=subset['mag'] * 2.2, color=colors[(cluster_id + 1) % len(colors)], opacity=0.7),
+            name=f"Zona {cluster_id}", text=subset['place'],
+            customdata=np.stack([subset['mag'], subset['depth'], subset['time'].dt.strftime('%Y-%m-%d %H:%M')], axis=-1),
+            hovertemplate="<b>%{text}</b><br>Magnitud: %{customdata[0]:.1f}<br>%{customdata[2]}<extra></extra>",
+        ))
+    return fig, None
+
+def _single_figure(df, colors):
+    clusters = sorted(df['cluster'].unique())
+    fig = go.Figure(points_trace(
+        df['latitude'], df['longitude'], category_codes(df['cluster'], clusters),
+        [colors[(c + 1) % len(colors)] for c in clusters], df['mag'] * 2.2,
+        "<b>%{customdata[0]}</b><br>Magnitud: %{customdata[1]:.1f}<br>%{customdata[2]}<extra></extra>",
+    ))
+    fig.add_traces(legend_traces([f"Zona {c}" for c in clusters], [colors[(c + 1) % len(colors)] for c in clusters]))
+    script = hover_script([lookup_column(df['place']), numeric_column(df['mag']), datetime_column(df['time'])])
+    script += legend_script()
+    return fig, script
+
+def benchmark(sizes=TAMANOS_BENCHMARK):
+    """Tamaño del HTML y tiempo de construcción: una traza por cluster frente a la traza única."""
+    colors = px.colors.qualitative.Dark24
+    print(f"{'eventos':>10} {'modo':>14} {'tiempo':>9} {'HTML (MB)':>10}")
+    for n in sizes:
+        df = _synthetic_events(n)
+        for mode, build in (('por cluster', _legacy_figure), ('traza única', _single_figure)):
+            t0 = time.perf_counter()
+            fig, script = build(df, colors)
+            html = fig.to_html(include_plotlyjs='cdn', post_script=script)
+            elapsed = time.perf_counter() - t0
+            print(f"{n:>10} {mode:>14} {elapsed:>8.2f}s {len(html.encode('utf-8')) / 1e6:>10.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de mapas: una traza por cluster frente a traza única")
+    parser.add_argument('--sizes', type=int, nargs='+', default=TAMANOS_BENCHMARK, help="Número de eventos")
+    args = parser.parse_args()
+    benchmark(args.sizes)
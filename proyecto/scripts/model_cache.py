@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+
+import joblib
+import numpy as np
+import sklearn
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+
+from kmeans_sweep import sweep_k
+from seismic_data import CACHE_DIR, write_atomic
+
+# ----------------------------------------
+# CACHÉ DE MODELOS K-MEANS (DIRECCIONADA POR CONTENIDO)
+# ----------------------------------------
+# La clave de cada modelo es el hash de la matriz de features más los parámetros del
+# escalado y de KMeans (incluida la versión de scikit-learn). Si los datos no cambian,
+# cualquier script obtiene el mismo scaler, centroides y etiquetas sin volver a ajustar.
+MODEL_DIR = os.path.join(CACHE_DIR, 'models')
+FEATURES = ['latitude', 'longitude', 'depth', 'mag']
+
+_MEMO = {}
+
+def _as_matrix(X):
+    return np.ascontiguousarray(np.asarray(X, dtype='float64'))
+
+def model_key(X, k, scale=True, random_state=42, n_init=10):
+    """Hash del contenido de X (y nombres de columnas si es DataFrame) y de los parámetros del modelo."""
+    h = hashlib.sha1()
+    matrix = _as_matrix(X)
+    h.update(matrix.tobytes())
+    params = {
+        'shape': matrix.shape, 'columns': list(getattr(X, 'columns', [])),
+        'k': int(k), 'scale': bool(scale), 'random_state': random_state, 'n_init': n_init,
+        'sklearn': sklearn.__version__,
+    }
+    h.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+    return h.hexdigest()
+
+def _entry_path(key):
+    return os.path.join(MODEL_DIR, f"kmeans_{key[:24]}.joblib")
+
+def _load(key):
+    if key in _MEMO:
+        return _MEMO[key]
+    path = _entry_path(key)
+    if os.path.exists(path):
+        entry = joblib.load(path)
+        _MEMO[key] = entry
+        return entry
+    return None
+
+def _store(key, entry):
+    path = _entry_path(key)
+    write_atomic(path, lambda tmp_path: joblib.dump(entry, tmp_path))
+    _MEMO[key] = entry
+
+def _prepare(X, scale):
+    matrix = _as_matrix(X)
+    scaler = StandardScaler().fit(matrix) if scale else None
+    return scaler, scaler.transform(matrix) if scale else matrix
+
+def _entry(key, k, scaler, model):
+    return {
+        'key': key, 'k': k, 'scaler': scaler,
+        'centers': model.cluster_centers_, 'labels': model.labels_.astype('int32'),
+        'inertia': float(model.inertia_),
+    }
+
+def get_kmeans(X, k, scale=True, random_state=42, n_init=10):
+    """
+    Modelo KMeans de X (escalado con StandardScaler si `scale`), desde la caché si existe.
+
+    Devuelve un dict con 'scaler' (o None), 'centers' (en el espacio escalado), 'labels' e 'inertia'.
+    """
+    key = model_key(X, k, scale, random_state, n_init)
+    entry = _load(key)
+    if entry is None:
+        scaler, X_model = _prepare(X, scale)
+        model = KMeans(n_clusters=k, random_state=random_state, n_init=n_init).fit(X_model)
+        entry = _entry(key, k, scaler, model)
+        _store(key, entry)
+    return entry
+
+def get_kmeans_range(X, ks=range(2, 11), scale=True, random_state=42, n_init=10, workers=None):
+    """Modelos para cada k de `ks`; los que faltan en la caché se ajustan juntos en el pool de procesos."""
+    keys = {k: model_key(X, k, scale, random_state, n_init) for k in ks}
+    entries = {k: _load(key) for k, key in keys.items()}
+    missing = [k for k, entry in entries.items() if entry is None]
+    if missing:
+        print(f"Ajustando K-Means para k={missing} (sin caché)...")
+        scaler, X_model = _prepare(X, scale)
+        _, models = sweep_k(X_model, missing, strategy='parallel', n_init=n_init, silhouette_mode=None,
+                            workers=workers, random_state=random_state)
+        for k in missing:
+            entries[k] = _entry(keys[k], k, scaler, models[k])
+            _store(keys[k], entries[k])
+    return entries
+
+def scaled_features(entry, X):
+    """Aplica el escalado persistido de un modelo a una matriz de features."""
+    matrix = _as_matrix(X)
+    return entry['scaler'].transform(matrix) if entry['scaler'] is not None else matrix
+
+def assign_nearest(X_scaled, centers, chunk_size=200_000):
+    """Cluster del centroide más cercano y distancia al cuadrado, por bloques (sin reajustar el modelo)."""
+    X_scaled = _as_matrix(X_scaled)
+    centers = _as_matrix(centers)
+    c2 = (centers ** 2).sum(axis=1)
+    labels = np.empty(len(X_scaled), dtype='int32')
+    sq_dist = np.empty(len(X_scaled))
+    for start in range(0, len(X_scaled), chunk_size):
+        block = X_scaled[start:start + chunk_size]
+        d2 = (block ** 2).sum(axis=1)[:, None] + c2[None, :] - 2 * block @ centers.T
+        idx = d2.argmin(axis=1)
+        labels[start:start + chunk_size] = idx
+        sq_dist[start:start + chunk_size] = np.maximum(d2[np.arange(len(block)), idx], 0.0)
+    return labels, sq_dist
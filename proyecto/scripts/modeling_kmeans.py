@@ -1,25 +1,25 @@
+import argparse
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import silhouette_score
 import os
 
+from kmeans_sweep import MUESTRA_SILHOUETTE, SILHOUETTE_MODES, silhouette, sweep_k
+from model_cache import FEATURES, get_kmeans_range
+from seismic_data import VIS_DIR, load_events
+
 # Configuración
-DATA_PATH = 'data/earthquakes_enriched.csv'
-OUTPUT_DIR = 'documentacion/visualizaciones'
+OUTPUT_DIR = VIS_DIR
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-def perform_modeling():
+def perform_modeling(strategy='parallel', silhouette_mode='sampled', sample_size=MUESTRA_SILHOUETTE, workers=None):
     print("Cargando datos enriquecidos...")
-    df = pd.read_csv(DATA_PATH)
-    
     # Seleccionamos las features para el modelo según el consenso previo
     # Usaremos las 3 dimensiones espaciales y la magnitud
-    features = ['latitude', 'longitude', 'depth', 'mag']
-    X = df[features]
+    features = FEATURES
+    X = load_events('enriched', columns=features)
     
     # Escalado obligatorio
     print("Estandarizando datos...")
@@ -28,17 +28,22 @@ def perform_modeling():
     
     # Rangos de K a probar
     ks = range(2, 11)
-    inertias = []
-    silhouettes = []
     
-    print("\nIniciando experimentación con K = 2..10...")
-    for k in ks:
-        print(f"Procesando k={k}...")
-        kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-        labels = kmeans.fit_predict(X_scaled)
-        
-        inertias.append(kmeans.inertia_)
-        silhouettes.append(silhouette_score(X_scaled, labels))
+    print(f"\nIniciando experimentación con K = 2..10 (estrategia={strategy}, silhouette={silhouette_mode})...")
+    if strategy == 'parallel':
+        # Los modelos estándar (n_init=10) se comparten con el resto de scripts vía la caché
+        models = get_kmeans_range(X, ks, workers=workers)
+        results_df = pd.DataFrame({
+            'k': list(ks),
+            'Inertia': [models[k]['inertia'] for k in ks],
+            'Silhouette': [silhouette(X_scaled, models[k]['labels'], models[k]['centers'], silhouette_mode, sample_size)
+                           for k in ks],
+        })
+    else:
+        results_df, _ = sweep_k(X_scaled, ks, strategy=strategy, silhouette_mode=silhouette_mode,
+                                sample_size=sample_size, workers=workers)
+    inertias = results_df['Inertia']
+    silhouettes = results_df['Silhouette']
     
     # 4.2 Gráfico del Método del Codo
     plt.figure(figsize=(12, 5))
@@ -63,9 +68,16 @@ def perform_modeling():
     print(f"\nAnálisis de métricas guardado en: {OUTPUT_DIR}/elbow_silhouette_analysis.png")
     
     # Mostrar resultados en consola para el análisis
-    results_df = pd.DataFrame({'k': ks, 'Inertia': inertias, 'Silhouette': silhouettes})
     print("\nRESULTADOS DE LAS MÉTRICAS:")
     print(results_df.to_string(index=False))
 
 if __name__ == "__main__":
-    perform_modeling()
+    parser = argparse.ArgumentParser(description="Método del codo y silhouette para K = 2..10")
+    parser.add_argument('--strategy', choices=['parallel', 'warm'], default='parallel',
+                        help="parallel: ajustes independientes en procesos; warm: cada k parte de k-1")
+    parser.add_argument('--silhouette', choices=SILHOUETTE_MODES, default='sampled',
+                        help="exact (O(n²)), sampled (muestra aleatoria) o centroid (simplificada)")
+    parser.add_argument('--sample-size', type=int, default=MUESTRA_SILHOUETTE, help="Eventos de la muestra de silhouette")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos para la estrategia parallel")
+    args = parser.parse_args()
+    perform_modeling(args.strategy, args.silhouette, args.sample_size, args.workers)
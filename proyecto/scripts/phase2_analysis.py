@@ -3,9 +3,10 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import os
 
+from seismic_data import VIS_DIR, load_events
+
 # Configuración de rutas
-DATA_PATH = r"c:\Users\Arnold's\Documents\Repositorios Machine Learning\proyecto\data\earthquakes_raw.csv"
-OUTPUT_IMG = r"c:\Users\Arnold's\Documents\Repositorios Machine Learning\proyecto\documentacion\visualizaciones\matriz_correlacion.png"
+OUTPUT_IMG = os.path.join(VIS_DIR, 'matriz_correlacion.png')
 OS_DIR = os.path.dirname(OUTPUT_IMG)
 
 if not os.path.exists(OS_DIR):
@@ -13,7 +14,7 @@ if not os.path.exists(OS_DIR):
 
 def analyze_phase2():
     print("--- Cargando datos ---")
-    df = pd.read_csv(DATA_PATH)
+    df = load_events('raw')
     
     # 1. Análisis de valores nulos
     print("\n--- Análisis de Valores Nulos ---")
@@ -32,14 +33,14 @@ def analyze_phase2():
     plt.xlabel('Variable')
     plt.xticks(rotation=45)
     plt.tight_layout()
-    NULL_IMG = r"c:\Users\Arnold's\Documents\Repositorios Machine Learning\proyecto\documentacion\visualizaciones\porcentaje_nulos.png"
+    NULL_IMG = os.path.join(VIS_DIR, 'porcentaje_nulos.png')
     plt.savefig(NULL_IMG)
     print(f"Gráfico de nulos guardado en: {NULL_IMG}")
     
     # 2. Matriz de Correlación
     print("\n--- Generando Matriz de Correlación ---")
     # Seleccionar solo columnas numéricas
-    df_numeric = df.select_dtypes(include=['float64', 'int64'])
+    df_numeric = df.select_dtypes(include='number')
     corr_matrix = df_numeric.corr()
     
     plt.figure(figsize=(12, 10))
@@ -0,0 +1,315 @@
+import argparse
+import ast
+import hashlib
+import importlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# ----------------------------------------
+# ORQUESTADOR DEL PIPELINE SÍSMICO
+# ----------------------------------------
+# Cada etapa declara la función que la ejecuta y los archivos que lee y escribe; el orden
+# sale de esas declaraciones (una etapa depende de la que produce cada una de sus entradas).
+#   - Una etapa se omite si el hash de contenido de sus entradas y el de su código (el script
+#     y los módulos locales que importa) son los de su última ejecución correcta y sus salidas
+#     existen. Los hashes se recalculan solo si cambió el mtime/tamaño del archivo.
+#   - Las entradas opcionales (mapas base y fallas que el script omite si no están) entran en la
+#     huella como None cuando faltan: no detienen la etapa y aparecer después la vuelve a ejecutar.
+#   - Las etapas independientes (mapas, figuras, reportes) corren en paralelo en un pool de
+#     procesos, y se registra el tiempo de cada una.
+# El módulo no importa pandas/pyarrow (ni los módulos de datos) para que una ejecución sin
+# cambios termine en milisegundos: las rutas se declaran relativas a la carpeta del proyecto.
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(SCRIPTS_DIR)
+STATE_PATH = os.path.join(PROJECT_DIR, 'data', '.cache', 'pipeline_state.json')
+
+RAW = 'data/earthquakes_raw.csv'
+CLEANED = 'data/earthquakes_cleaned.csv'
+ENRICHED = 'data/earthquakes_enriched.csv'
+CLUSTERED = 'data/earthquakes_clustered.csv'
+WORLD = 'data/world.geojson'
+FAULTS = 'data/Atlas_Geol%C3%B3gico_de_Colombia_2020%3A_Fallas_Geol%C3%B3gicas.geojson'
+VIS = 'documentacion/visualizaciones'
+
+def _stage(name, function, inputs, outputs, source=False, optional=()):
+    return {'name': name, 'module': name, 'function': function,
+            'inputs': inputs, 'optional': list(optional), 'outputs': outputs, 'source': source}
+
+def _all_inputs(stage):
+    return stage['inputs'] + stage['optional']
+
+# Las etapas `source` (descarga de USGS) solo corren si falta su salida o si se fuerzan por nombre
+ETAPAS = [
+    _stage('load_data', 'load_data', [], [RAW], source=True),
+    _stage('data_cleaning', 'clean_data', [RAW], [CLEANED], optional=[WORLD]),
+    _stage('enrich_dataset', 'enrich_data',
+           [CLEANED, 'data/TBL_DEPARTAMENTOS.csv', 'data/TBL_MUNICIPIOS.csv'],
+           [ENRICHED, f'{VIS}/boxplots_escalas.png', f'{VIS}/comparativa_escalas_kde.png'], optional=[FAULTS]),
+    _stage('apply_k7_model', 'apply_final_model', [ENRICHED], [CLUSTERED]),
+    _stage('cluster_profiling', 'profile_clusters', [CLUSTERED],
+           ['documentacion/stats_clusters.csv', f'{VIS}/mapa_clusters_fase5.png'], optional=[WORLD]),
+    _stage('hotspot_analysis', 'run_analysis', [RAW],
+           ['data/earthquakes_classified.csv', 'documentacion/mapa_hotspots.html']),
+    _stage('kmeans_analysis', 'run_kmeans_analysis', [RAW],
+           ['data/earthquakes_kmeans.csv', 'documentacion/mapa_kmeans.html']),
+    _stage('region_analysis', 'analyze_regions', [ENRICHED],
+           [f'{VIS}/frecuencia_municipios.png', f'{VIS}/frecuencia_departamentos.png']),
+    _stage('create_map', 'create_interactive_map', [RAW], ['documentacion/mapa_sismos.html']),
+    _stage('create_interactive_dashboard', 'create_dashboard', [ENRICHED, FAULTS],
+           [f'{VIS}/dashboard_interactivo.html']),
+    _stage('generate_html_report', 'generate_interactive_report',
+           [RAW, FAULTS, 'reporte_final/REPORTE_CRISP_DM.md'], ['reporte_final/REPORTE_FINAL_INTERACTIVO.html']),
+    _stage('plot_faults', 'plot_faults', [FAULTS], [f'{VIS}/mapa_fallas_colombia.png'], optional=[WORLD]),
+    _stage('plot_seismic_timeline', 'generate_seismic_timeline_map', [RAW],
+           [f'{VIS}/mapa_timeline_sismico.png'], optional=[WORLD, FAULTS]),
+    _stage('scatter_maps_v2', 'refine_visualizations', [ENRICHED],
+           [f'{VIS}/scatter_map_depth_red.png', f'{VIS}/scatter_map_mag_red.png',
+            f'{VIS}/scatter_mag_depth_refined.png'], optional=[WORLD]),
+    _stage('visualize_k_evolution', 'generate_evolution_geo_grid', [ENRICHED],
+           [f'{VIS}/evolucion_clusters_geo.png'], optional=[WORLD, FAULTS]),
+    _stage('visualize_cleaning', 'plot_comparison', [RAW, CLEANED],
+           [f'{VIS}/comparativa_limpieza_geografica.png'], optional=[WORLD]),
+]
+
+def build_graph(stages=ETAPAS):
+    """Dependencias de cada etapa (productoras de sus entradas); dos etapas no pueden escribir el mismo archivo."""
+    producer = {}
+    for stage in stages:
+        for path in stage['outputs']:
+            if path in producer:
+                raise ValueError(f"'{path}' lo escriben '{producer[path]}' y '{stage['name']}'")
+            producer[path] = stage['name']
+    return {stage['name']: sorted({producer[p] for p in _all_inputs(stage) if p in producer}) for stage in stages}
+
+def _with_upstream(targets, graph):
+    selected, stack = set(), list(targets)
+    while stack:
+        name = stack.pop()
+        if name not in selected:
+            selected.add(name)
+            stack.extend(graph[name])
+    return selected
+
+def _abs(path):
+    return os.path.join(PROJECT_DIR, path)
+
+def _sha1(path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def content_hash(path, files):
+    """sha1 del archivo; `files` guarda (mtime, tamaño, sha1) para no releerlo si no cambió."""
+    try:
+        st = os.stat(_abs(path))
+    except FileNotFoundError:
+        return None
+    entry = files.get(path)
+    if entry and entry['mtime_ns'] == st.st_mtime_ns and entry['size'] == st.st_size:
+        return entry['sha1']
+    digest = _sha1(_abs(path))
+    files[path] = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'sha1': digest}
+    return digest
+
+def _local_imports(module, state):
+    """Módulos locales importados por `module`; se guardan en el estado por hash del archivo."""
+    digest = content_hash(f'scripts/{module}.py', state['files'])
+    cached = state['imports'].get(module)
+    if cached and cached['sha1'] == digest:
+        return cached['modules']
+    with open(os.path.join(SCRIPTS_DIR, f"{module}.py"), 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split('.')[0])
+    modules = sorted(name for name in names if os.path.exists(os.path.join(SCRIPTS_DIR, f"{name}.py")))
+    state['imports'][module] = {'sha1': digest, 'modules': modules}
+    return modules
+
+def code_hash(module, state, memo):
+    """Hash del script y de todos los módulos locales que importa (directa o indirectamente)."""
+    if module not in memo:
+        closure, stack = set(), [module]
+        while stack:
+            name = stack.pop()
+            if name not in closure:
+                closure.add(name)
+                stack.extend(_local_imports(name, state))
+        h = hashlib.sha1()
+        for name in sorted(closure):
+            h.update(f"{name}:{content_hash(f'scripts/{name}.py', state['files'])}\n".encode())
+        memo[module] = h.hexdigest()
+    return memo[module]
+
+def load_state(path=STATE_PATH):
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        state.setdefault('imports', {})
+        return state
+    return {'files': {}, 'imports': {}, 'stages': {}}
+
+def save_state(state, path=STATE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def _init_worker():
+    os.chdir(PROJECT_DIR)
+    # Backend Agg y sin pools anidados de figuras dentro de cada proceso
+    importlib.import_module('figure_render')._init_worker()
+
+def _run_stage(module, function):
+    t0 = time.perf_counter()
+    getattr(importlib.import_module(module), function)()
+    return time.perf_counter() - t0
+
+def run_pipeline(targets=None, force=False, workers=None, dry_run=False, stages=ETAPAS):
+    """
+    Ejecuta las etapas `targets` (todas por defecto) y las que producen sus entradas, en
+    paralelo cuando no dependen entre sí. Devuelve {etapa: (estado, segundos)}.
+    """
+    graph = build_graph(stages)
+    by_name = {stage['name']: stage for stage in stages}
+    unknown = set(targets or []) - set(by_name)
+    if unknown:
+        raise ValueError(f"Etapas desconocidas: {', '.join(sorted(unknown))}")
+    selected = _with_upstream(targets, graph) if targets else set(by_name)
+    waiting = [stage['name'] for stage in stages if stage['name'] in selected]
+    workers = workers or os.cpu_count() or 1
+
+    state = load_state()
+    code_memo = {}
+    results, running = {}, {}
+
+    def decide(name):
+        """Estado inmediato de la etapa (al día / bloqueada / pendiente) o None si hay que ejecutarla."""
+        stage = by_name[name]
+        deps = [results[d][0] for d in graph[name]]
+        if any(status in ('error', 'bloqueada') for status in deps):
+            return 'bloqueada', None
+        if dry_run and 'pendiente' in deps:
+            return 'pendiente', None
+        outputs_ok = all(os.path.exists(_abs(p)) for p in stage['outputs'])
+        fingerprint = {'inputs': {p: content_hash(p, state['files']) for p in _all_inputs(stage)},
+                       'code': code_hash(stage['module'], state, code_memo)}
+        missing = [p for p in stage['inputs'] if fingerprint['inputs'][p] is None]
+        if missing:
+            return 'error', f"faltan entradas: {', '.join(missing)}"
+        previous = state['stages'].get(name, {})
+        # Con etapas pedidas por nombre, --force aplica solo a ellas; sin nombres, a todas menos
+        # las fuente (no se vuelve a descargar el catálogo)
+        forced = force and (name in targets if targets else not stage['source'])
+        if not forced and outputs_ok and (stage['source'] or
+                                          all(previous.get(k) == v for k, v in fingerprint.items())):
+            return 'al día', None
+        if dry_run:
+            return 'pendiente', None
+        return None, fingerprint
+
+    t_total = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) if workers > 1 and not dry_run else None
+    try:
+        while waiting or running:
+            # Decidir (y lanzar) todas las etapas cuyas dependencias ya terminaron
+            progress = True
+            while progress:
+                progress = False
+                for name in list(waiting):
+                    if any(d not in results for d in graph[name]):
+                        continue
+                    waiting.remove(name)
+                    progress = True
+                    status, detail = decide(name)
+                    if status is not None:
+                        results[name] = (status, 0.0)
+                        if status == 'error':
+                            print(f"[{name}] {detail}")
+                        continue
+                    print(f"[{name}] ejecutando...")
+                    started = time.time()
+                    stage = by_name[name]
+                    if pool is None:
+                        try:
+                            os.chdir(PROJECT_DIR)
+                            outcome = ('ok', _run_stage(stage['module'], stage['function']))
+                        except Exception as e:
+                            outcome = ('error', str(e))
+                        _finish(name, stage, outcome, started, detail, state, results)
+                    else:
+                        future = pool.submit(_run_stage, stage['module'], stage['function'])
+                        running[future] = (name, started, detail)
+
+            if not running:
+                break
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, started, fingerprint = running.pop(future)
+                try:
+                    outcome = ('ok', future.result())
+                except Exception as e:
+                    outcome = ('error', str(e))
+                _finish(name, by_name[name], outcome, started, fingerprint, state, results)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if not dry_run:
+            save_state(state)
+
+    print(f"\n{'etapa':<30} {'estado':>10} {'tiempo':>9}")
+    for name in (stage['name'] for stage in stages):
+        if name in results:
+            status, seconds = results[name]
+            print(f"{name:<30} {status:>10} {seconds:>8.2f}s")
+    print(f"Pipeline terminado en {time.perf_counter() - t_total:.2f}s")
+    return results
+
+def _finish(name, stage, outcome, started, fingerprint, state, results):
+    """Registra el resultado; los scripts atrapan sus propios errores, así que una salida no reescrita es un fallo."""
+    status, value = outcome
+    if status == 'ok':
+        stale = [p for p in stage['outputs']
+                 if not os.path.exists(_abs(p)) or os.path.getmtime(_abs(p)) < started - 1]
+        if stale:
+            status, value = 'error', f"no generó: {', '.join(stale)}"
+    if status == 'error':
+        print(f"[{name}] ERROR: {value}")
+        state['stages'].pop(name, None)
+        results[name] = ('error', time.time() - started)
+        return
+    state['stages'][name] = {**fingerprint, 'seconds': round(value, 3),
+                             'finished': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    results[name] = ('ok', value)
+    save_state(state)
+    print(f"[{name}] listo en {value:.2f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline sísmico con dependencias (omite etapas al día)")
+    parser.add_argument('stages', nargs='*', help="Etapas a ejecutar (con las que producen sus entradas); todas por defecto")
+    parser.add_argument('--force', action='store_true', help="Ejecuta las etapas aunque estén al día")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos del pool (por defecto, uno por CPU)")
+    parser.add_argument('--dry-run', action='store_true', help="Solo muestra qué etapas se ejecutarían")
+    parser.add_argument('--list', action='store_true', help="Lista las etapas con sus entradas y salidas")
+    args = parser.parse_args()
+
+    if args.list:
+        graph = build_graph()
+        for stage in ETAPAS:
+            print(f"{stage['name']}  <- {', '.join(graph[stage['name']]) or '(fuente)'}")
+            print(f"    entradas: {', '.join(stage['inputs']) or '-'}")
+            if stage['optional']:
+                print(f"    opcionales: {', '.join(stage['optional'])}")
+            print(f"    salidas:  {', '.join(stage['outputs'])}")
+    else:
+        results = run_pipeline(args.stages, args.force, args.workers, args.dry_run)
+        sys.exit(1 if any(status == 'error' for status, _ in results.values()) else 0)
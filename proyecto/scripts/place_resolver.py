@@ -0,0 +1,139 @@
+import os
+import pickle
+import unicodedata
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from event_store import DATA_DIR
+from seismic_data import CACHE_DIR, file_hash, write_atomic
+
+# ----------------------------------------
+# RESOLUCIÓN LUGAR -> MUNICIPIO -> DEPARTAMENTO
+# ----------------------------------------
+# El texto `place` de USGS se repite muchísimo ("7 km E of Aratoca, Colombia"), así que solo
+# se resuelven los valores únicos y el resultado se proyecta de vuelta a todas las filas.
+# El índice de municipios oficiales (exacto + trigramas para coincidencias aproximadas)
+# se construye una vez y se guarda en disco junto a la huella de las tablas de referencia.
+TBL_DEPARTAMENTOS = os.path.join(DATA_DIR, 'TBL_DEPARTAMENTOS.csv')
+TBL_MUNICIPIOS = os.path.join(DATA_DIR, 'TBL_MUNICIPIOS.csv')
+
+# Similitud mínima (Jaccard de trigramas) para aceptar una coincidencia aproximada
+UMBRAL_SIMILITUD = 0.62
+
+_INDEX_MEMO = {}
+
+def normalize_text(text):
+    if not isinstance(text, str): return ""
+    # Eliminar acentos y convertir a minúsculas
+    text = unicodedata.normalize('NFD', text).encode('ascii', 'ignore').decode('utf-8')
+    return text.strip().lower()
+
+def get_municipality(place):
+    if pd.isna(place): return "Desconocido"
+    parts = place.split(', ')
+    if len(parts) > 1:
+        sub_parts = parts[0].split(' of ')
+        return sub_parts[-1]
+    return place
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def build_place_index(deptos_path=TBL_DEPARTAMENTOS, municipios_path=TBL_MUNICIPIOS):
+    """Diccionario municipio_normalizado -> departamento y su índice invertido de trigramas."""
+    df_deptos_ref = pd.read_csv(deptos_path, header=None, names=['id_depto', 'departamento'], encoding='latin1')
+    df_mun_ref = pd.read_csv(municipios_path, header=None, names=['id_mun', 'municipio', 'id_depto'], encoding='latin1')
+
+    # Limpiar espacios
+    df_deptos_ref['departamento'] = df_deptos_ref['departamento'].str.strip()
+    df_mun_ref['municipio'] = df_mun_ref['municipio'].str.strip()
+
+    df_ref = df_mun_ref.merge(df_deptos_ref, on='id_depto')
+    df_ref['municipio_norm'] = df_ref['municipio'].apply(normalize_text)
+    lookup = dict(zip(df_ref['municipio_norm'], df_ref['departamento']))
+
+    postings = {}
+    for key in lookup:
+        for gram in trigrams(key):
+            postings.setdefault(gram, []).append(key)
+    return {'lookup': lookup, 'trigrams': postings}
+
+def load_place_index(deptos_path=TBL_DEPARTAMENTOS, municipios_path=TBL_MUNICIPIOS):
+    """Índice de referencia, persistido en disco y reconstruido solo si cambian las tablas oficiales."""
+    version = file_hash(deptos_path)[:12] + file_hash(municipios_path)[:12]
+    if version in _INDEX_MEMO:
+        return _INDEX_MEMO[version]
+
+    cache_path = os.path.join(CACHE_DIR, f"indice_lugares_{version}.pkl")
+    if os.path.exists(cache_path):
+        with open(cache_path, 'rb') as f:
+            index = pickle.load(f)
+    else:
+        index = build_place_index(deptos_path, municipios_path)
+
+        def dump(tmp_path):
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(index, f)
+        write_atomic(cache_path, dump)
+    _INDEX_MEMO[version] = index
+    return index
+
+def fuzzy_match(m_norm, index, threshold=UMBRAL_SIMILITUD):
+    """Municipio oficial más parecido por trigramas, o None si ninguno supera el umbral."""
+    query = trigrams(m_norm)
+    shared = Counter()
+    for gram in query:
+        shared.update(index['trigrams'].get(gram, ()))
+    best, best_score = None, threshold
+    for key, n_shared in shared.items():
+        score = n_shared / (len(query) + len(trigrams(key)) - n_shared)
+        if score >= best_score:
+            best, best_score = key, score
+    return best
+
+def get_department(municipality, index):
+    m_norm = normalize_text(municipality)
+    lookup = index['lookup']
+
+    # 1. Intentar match exacto en la base oficial
+    if m_norm in lookup:
+        return lookup[m_norm].title()
+
+    # 2. Fallback inteligente para etiquetas genéricas
+    if "northern colombia" in m_norm: return "Norte de Colombia"
+    if "off the coast" in m_norm or "offshore" in m_norm: return "Océano Pacífico"
+    if "boundary" in m_norm: return "Zona Fronteriza"
+    if "mountain" in m_norm: return "Zona Montañosa"
+    if "near the" in m_norm: return municipality.replace("near the ", "").capitalize()
+    if "near" in m_norm: return municipality.replace("near ", "").capitalize()
+
+    # 3. Coincidencia aproximada (errores de tildes, abreviaturas, variantes de escritura)
+    candidate = fuzzy_match(m_norm, index)
+    if candidate is not None:
+        return lookup[candidate].title()
+
+    return municipality # Si no hay match, dejar el nombre original del lugar
+
+def resolve_places(places, index=None):
+    """
+    Devuelve (municipio_region, departamento) para una serie de `place`.
+
+    El costo es proporcional al número de lugares distintos, no al número de filas.
+    """
+    index = index or load_place_index()
+    codes, uniques = pd.factorize(places, use_na_sentinel=True)
+
+    municipios = [get_municipality(p) for p in uniques]
+    deptos = [get_department(m, index) for m in municipios]
+    # El código -1 (lugar nulo) se resuelve una sola vez y ocupa la última posición
+    mun_na = get_municipality(np.nan)
+    municipios.append(mun_na)
+    deptos.append(get_department(mun_na, index))
+
+    codes = np.where(codes < 0, len(uniques), codes)
+    municipio_region = pd.Series(np.asarray(municipios, dtype=object)[codes], index=places.index)
+    departamento = pd.Series(np.asarray(deptos, dtype=object)[codes], index=places.index)
+    return municipio_region, departamento
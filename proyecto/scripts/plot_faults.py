@@ -2,26 +2,31 @@ import geopandas as gpd
 import matplotlib.pyplot as plt
 import os
 
+from fault_cache import load_faults
+
 # Rutas
-geojson_path = r'data/Atlas_Geol%C3%B3gico_de_Colombia_2020%3A_Fallas_Geol%C3%B3gicas.geojson'
 world_json_path = r'data/world.geojson'
 output_path = r'documentacion/visualizaciones/mapa_fallas_colombia.png'
 os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
 def plot_faults():
-    print(f"Leyendo GeoJSON de fallas: {geojson_path}...")
+    print("Cargando fallas geológicas (caché)...")
     try:
-        # Cargamos el GeoJSON de fallas
-        gdf_fallas = gpd.read_file(geojson_path)
+        # Cargamos la red de fallas desde la caché (se genera desde el GeoJSON si hace falta)
+        gdf_fallas = load_faults()
         
         # Cargamos el GeoJSON del mundo y filtramos por Colombia
-        print(f"Leyendo bordes de Colombia: {world_json_path}...")
-        world = gpd.read_file(world_json_path)
-        
-        # Intentamos filtrar por nombre o código ISO
-        # Columnas disponibles: ['name', 'ISO3166-1-Alpha-3', 'ISO3166-1-Alpha-2', 'geometry']
-        colombia = world[(world['name'] == 'Colombia') | (world['ISO3166-1-Alpha-3'] == 'COL')]
-        
+        if os.path.exists(world_json_path):
+            print(f"Leyendo bordes de Colombia: {world_json_path}...")
+            world = gpd.read_file(world_json_path)
+
+            # Intentamos filtrar por nombre o código ISO
+            # Columnas disponibles: ['name', 'ISO3166-1-Alpha-3', 'ISO3166-1-Alpha-2', 'geometry']
+            colombia = world[(world['name'] == 'Colombia') | (world['ISO3166-1-Alpha-3'] == 'COL')]
+        else:
+            print(f"Advertencia: no se encontró {world_json_path}.")
+            colombia = gpd.GeoDataFrame()
+
         if colombia.empty:
              print("Advertencia: No se encontró el croquis de Colombia en world.geojson. Se graficará sin fondo.")
         
@@ -1,16 +1,12 @@
-import pandas as pd
-import geopandas as gpd
 import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
 import os
 import urllib.parse
 
+from figure_render import draw_basemap
+from seismic_data import VIS_DIR, load_events
+
 # Configuración de rutas
-DATA_DIR = 'data'
-VIS_DIR = 'documentacion/visualizaciones'
-RAW_DATA = os.path.join(DATA_DIR, 'earthquakes_raw.csv')
-GEOJSON_FAULT_PATH = os.path.join(DATA_DIR, "Atlas_Geol%C3%B3gico_de_Colombia_2020%3A_Fallas_Geol%C3%B3gicas.geojson")
-WORLD_GEOJSON = os.path.join(DATA_DIR, 'world.geojson')
 OUTPUT_IMAGE = os.path.join(VIS_DIR, 'mapa_timeline_sismico.png')
 
 def generate_seismic_timeline_map():
@@ -19,13 +15,9 @@ def generate_seismic_timeline_map():
 
     try:
         # 1. Cargar Datos
-        df = pd.read_csv(RAW_DATA)
-        df['time'] = pd.to_datetime(df['time'])
+        df = load_events('raw', columns=['time', 'latitude', 'longitude', 'mag'])
         df['year'] = df['time'].dt.year
         
-        gdf_fallas = gpd.read_file(GEOJSON_FAULT_PATH)
-        world = gpd.read_file(WORLD_GEOJSON)
-        colombia = world[(world['name'] == 'Colombia') | (world['ISO3166-1-Alpha-3'] == 'COL')]
 
         # 2. Configurar la Figura con GridSpec
         fig = plt.figure(figsize=(12, 14), facecolor='#f8f9fa')
@@ -34,19 +26,18 @@ def generate_seismic_timeline_map():
         # --- PANEL SUPERIOR: MAPA DE FALLAS ---
         ax0 = fig.add_subplot(gs[0])
         
-        # Fondo Regional (Países de la zona)
-        if not world.empty:
-            # Dibujamos todos los países para dar contexto regional
-            world.plot(ax=ax0, color='#e9ecef', edgecolor='#adb5bd', linewidth=0.8, zorder=1)
-            
-            # Ajustamos los límites basados en la extensión de los sismos
-            lon_min, lat_min = df['longitude'].min() - 1, df['latitude'].min() - 1
-            lon_max, lat_max = df['longitude'].max() + 1, df['latitude'].max() + 1
-            ax0.set_xlim([lon_min, lon_max])
-            ax0.set_ylim([lat_min, lat_max])
-        
-        # Fallas Geográficas - Regresamos al color rojo por solicitud del usuario
-        gdf_fallas.plot(ax=ax0, color='#ff0000', linewidth=0.8, alpha=0.7, label='Fallas Geológicas', zorder=2)
+        # Límites basados en la extensión de los sismos
+        lon_min, lat_min = df['longitude'].min() - 1, df['latitude'].min() - 1
+        lon_max, lat_max = df['longitude'].max() + 1, df['latitude'].max() + 1
+
+        # Fondo Regional (Países de la zona) y Fallas Geográficas en rojo: mapa base rasterizado en caché
+        draw_basemap(ax0, (lon_min, lon_max, lat_min, lat_max), [
+            ('world', dict(color='#e9ecef', edgecolor='#adb5bd', linewidth=0.8)),
+            ('faults', dict(color='#ff0000', linewidth=0.8, alpha=0.7)),
+        ], dpi=300)
+        ax0.set_xlim([lon_min, lon_max])
+        ax0.set_ylim([lat_min, lat_max])
+        ax0.plot([], [], color='#ff0000', linewidth=0.8, alpha=0.7, label='Fallas Geológicas')
         
         # Puntos de sismos - Usando 'viridis' (Verde-Amarillo) que resalta mucho sobre el fondo
         scatter = ax0.scatter(df['longitude'], df['latitude'], 
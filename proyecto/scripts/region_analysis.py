@@ -1,19 +1,19 @@
-import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 import os
 
+from seismic_data import VIS_DIR, load_events
+
 # Configuración de rutas
-DATA_PATH = r"c:\Users\Arnold's\Documents\Repositorios Machine Learning\proyecto\data\earthquakes_enriched.csv"
-OUTPUT_IMG = r"c:\Users\Arnold's\Documents\Repositorios Machine Learning\proyecto\documentacion\visualizaciones\frecuencia_municipios.png"
+OUTPUT_IMG = os.path.join(VIS_DIR, 'frecuencia_municipios.png')
 
 def analyze_regions():
     print("--- Cargando datos enriquecidos ---")
-    if not os.path.exists(DATA_PATH):
-        print(f"Error: No se encuentra el archivo {DATA_PATH}")
+    try:
+        df = load_events('enriched', columns=['municipio_region', 'departamento'])
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
         return
-
-    df = pd.read_csv(DATA_PATH)
     
     # 1. Gráfico por Municipio
     region_counts = df['municipio_region'].value_counts().head(20)
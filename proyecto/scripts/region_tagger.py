@@ -0,0 +1,94 @@
+import os
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from shapely import STRtree
+
+from seismic_data import WORLD_GEOJSON
+
+# ----------------------------------------
+# ETIQUETADO PAÍS / REGIÓN POR PUNTO EN POLÍGONO
+# ----------------------------------------
+# Los polígonos (países de world.geojson o divisiones administrativas) se descomponen en
+# partes simples, se indexan en un STRtree y se preparan una sola vez. Cada lote de eventos
+# se resuelve en bloque: primero se descartan los que caen fuera del rectángulo que envuelve
+# todas las geometrías y luego el árbol solo evalúa los polígonos cuyo rectángulo los contiene.
+# Los eventos en el mar (sin polígono) toman el país más cercano si está a menos de
+# `max_offshore_km`, marcados con en_tierra=False.
+COUNTRY_NAME_COLUMN = 'name'
+KM_POR_GRADO = 111.32
+DISTANCIA_MAR_KM = 100
+EVENTOS_POR_BLOQUE = 1_000_000
+
+_POLYGON_MEMO = {}
+
+def load_polygons(path=WORLD_GEOJSON, name_column=COUNTRY_NAME_COLUMN):
+    """Índice de polígonos (STRtree sobre partes preparadas) de un GeoJSON; memo por versión del archivo."""
+    st = os.stat(path)
+    key = (os.path.abspath(path), name_column)
+    signature = (st.st_mtime_ns, st.st_size)
+    index = _POLYGON_MEMO.get(key)
+    if index is None or index['signature'] != signature:
+        gdf = gpd.read_file(path)
+        gdf = gdf[gdf.geometry.notna() & ~gdf.geometry.is_empty]
+        if gdf.crs is not None and gdf.crs.to_epsg() != 4326:
+            gdf = gdf.to_crs(epsg=4326)
+        names = gdf[name_column].astype(str).to_numpy()
+
+        # Un MultiPolygon con islas lejanas tiene un rectángulo enorme: se indexa cada parte
+        geoms = gdf.geometry.values
+        parts = shapely.get_parts(np.asarray(geoms))
+        owner = np.repeat(np.arange(len(geoms)), shapely.get_num_geometries(np.asarray(geoms)))
+        shapely.prepare(parts)
+        index = {'signature': signature, 'names': names, 'parts': parts, 'owner': owner,
+                 'tree': STRtree(parts), 'bounds': shapely.total_bounds(parts)}
+        _POLYGON_MEMO[key] = index
+    return index
+
+def tag_points(lat, lon, index, max_offshore_km=DISTANCIA_MAR_KM, chunk_size=EVENTOS_POR_BLOQUE):
+    """
+    Polígono (índice en `index['names']`, -1 si ninguno) de cada punto y si cae dentro de él.
+
+    Los puntos fuera de todo polígono se asignan al más cercano dentro de `max_offshore_km`
+    (distancia aproximada en grados, suficiente para decidir si un sismo es costero).
+    """
+    lat = np.asarray(lat, dtype='float64')
+    lon = np.asarray(lon, dtype='float64')
+    n = len(lat)
+    owner = np.full(n, -1, dtype='int64')
+    on_land = np.zeros(n, dtype=bool)
+
+    # Prefiltro por el rectángulo global (ampliado con el margen costero)
+    margin = max_offshore_km / KM_POR_GRADO if max_offshore_km else 0.0
+    minx, miny, maxx, maxy = index['bounds']
+    candidates = np.flatnonzero((lon >= minx - margin) & (lon <= maxx + margin)
+                                & (lat >= miny - margin) & (lat <= maxy + margin))
+
+    tree, part_owner = index['tree'], index['owner']
+    for start in range(0, len(candidates), chunk_size):
+        sel = candidates[start:start + chunk_size]
+        pts = shapely.points(lon[sel], lat[sel])
+        pt_idx, part_idx = tree.query(pts, predicate='intersects')
+        # En fronteras un punto puede tocar dos polígonos: se conserva el primero
+        hit, first = np.unique(pt_idx, return_index=True)
+        owner[sel[hit]] = part_owner[part_idx[first]]
+        on_land[sel[hit]] = True
+
+        if margin:
+            missing = np.flatnonzero(owner[sel] < 0)
+            if len(missing):
+                near_pt, near_part = tree.query_nearest(pts[missing], max_distance=margin, all_matches=False)
+                owner[sel[missing[near_pt]]] = part_owner[near_part]
+    return owner, on_land
+
+def tag_events(df, path=WORLD_GEOJSON, name_column=COUNTRY_NAME_COLUMN, column='pais',
+               land_column='en_tierra', max_offshore_km=DISTANCIA_MAR_KM):
+    """Agrega `column` (nombre del polígono o 'Sin asignar') y `land_column` a un DataFrame de eventos."""
+    index = load_polygons(path, name_column)
+    owner, on_land = tag_points(df['latitude'].to_numpy(), df['longitude'].to_numpy(), index, max_offshore_km)
+    names = np.append(index['names'], 'Sin asignar')
+    df[column] = names[owner]  # el índice -1 apunta a 'Sin asignar'
+    if land_column:
+        df[land_column] = on_land
+    return df
@@ -1,16 +1,16 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 
+from seismic_data import VIS_DIR, load_events
+
 # Configuración de rutas
-DATA_PATH = r"c:\Users\Arnold's\Documents\Repositorios Machine Learning\proyecto\data\earthquakes_enriched.csv"
-OUTPUT_DIR = r"c:\Users\Arnold's\Documents\Repositorios Machine Learning\proyecto\documentacion\visualizaciones"
+OUTPUT_DIR = VIS_DIR
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 def perform_restructure_analysis():
     print("--- Cargando datos enriquecidos ---")
-    df = pd.read_csv(DATA_PATH)
+    df = load_events('enriched')
     
     # 1. Análisis Cuantitativo
     total_records = len(df)
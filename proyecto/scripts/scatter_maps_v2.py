@@ -1,33 +1,28 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-import geopandas as gpd
 import os
 
+from figure_render import draw_basemap, render_figures
+from seismic_data import VIS_DIR, load_events
+
 # Configuración de rutas
-DATA_PATH = r"c:\Users\Arnold's\Documents\Repositorios Machine Learning\proyecto\data\earthquakes_enriched.csv"
-GEO_PATH = r"c:\Users\Arnold's\Documents\Repositorios Machine Learning\proyecto\data\world.geojson"
-OUTPUT_DIR = r"c:\Users\Arnold's\Documents\Repositorios Machine Learning\proyecto\documentacion\visualizaciones"
+OUTPUT_DIR = VIS_DIR
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-def refine_visualizations():
-    print("--- Cargando datos y mapa base ---")
-    df = pd.read_csv(DATA_PATH)
-    
-    # Cargar mapa base (silueta del mundo)
+# Área de interés para los mapas de dispersión (Colombia y alrededores): Lon -85 a -65, Lat -5 a 15
+EXTENSION_MAPA = (-85, -65, -5, 15)
+
+def _world_background(ax):
+    # Mapa base (silueta del mundo) rasterizado en caché; si falla se usa un fondo simple
     try:
-        world = gpd.read_file(GEO_PATH)
+        draw_basemap(ax, EXTENSION_MAPA, [('world', dict(color='#f0f0f0', edgecolor='#d0d0d0'))], dpi=300)
     except Exception as e:
         print(f"Error cargando geojson: {e}. Se usará un fondo simple.")
-        world = None
 
-    # Filtrar área de interés para el gráfico de dispersión (Colombia y alrededores)
-    # Limites aproximados: Lon -85 a -65, Lat -5 a 15
-    
+def depth_map(df):
     # 1. Mapa de Dispersión: Profundidad (Alarmista)
     plt.figure(figsize=(12, 10))
-    if world is not None:
-        world.plot(ax=plt.gca(), color='#f0f0f0', edgecolor='#d0d0d0')
+    _world_background(plt.gca())
     
     sns.scatterplot(data=df, x='longitude', y='latitude', hue='depth', 
                     palette='YlOrRd', size='depth', sizes=(20, 300), 
@@ -44,10 +39,10 @@ def refine_visualizations():
     plt.savefig(os.path.join(OUTPUT_DIR, 'scatter_map_depth_red.png'), dpi=300)
     plt.close()
 
+def magnitude_map(df):
     # 2. Mapa de Dispersión: Magnitud (Alarmista)
     plt.figure(figsize=(12, 10))
-    if world is not None:
-        world.plot(ax=plt.gca(), color='#f0f0f0', edgecolor='#d0d0d0')
+    _world_background(plt.gca())
     
     sns.scatterplot(data=df, x='longitude', y='latitude', hue='mag', 
                     palette='Reds', size='mag', sizes=(20, 300), 
@@ -64,6 +59,7 @@ def refine_visualizations():
     plt.savefig(os.path.join(OUTPUT_DIR, 'scatter_map_mag_red.png'), dpi=300)
     plt.close()
 
+def magnitude_depth_scatter(df):
     # 3. Recuperar/Generar Scatter de Magnitud vs Profundidad
     plt.figure(figsize=(10, 6))
     sns.scatterplot(data=df, x='depth', y='mag', hue='mag', palette='YlOrRd', alpha=0.5)
@@ -74,6 +70,13 @@ def refine_visualizations():
     plt.savefig(os.path.join(OUTPUT_DIR, 'scatter_mag_depth_refined.png'), dpi=300)
     plt.close()
 
+def refine_visualizations():
+    print("--- Cargando datos y mapa base ---")
+    df = load_events('enriched', columns=['latitude', 'longitude', 'depth', 'mag'])
+
+    # Las tres figuras son independientes: se generan en paralelo
+    render_figures([(depth_map, (df,)), (magnitude_map, (df,)), (magnitude_depth_scatter, (df,))])
+
     print(f"\nVisualizaciones refinadas guardadas en {OUTPUT_DIR}")
 
 if __name__ == "__main__":
@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from event_store import (
+    DATA_DIR, PROJECT_DIR, STAGE_CSV, CATEGORY_COLUMNS, FLOAT32_COLUMNS,
+    apply_schema, csv_export_matches, iter_stage, read_stage, stage_exists, store_columns, store_mtime,
+)
+
+# ----------------------------------------
+# ACCESO COMPARTIDO AL CATÁLOGO SÍSMICO
+# ----------------------------------------
+# Todos los scripts cargan los sismos con `load_events(etapa, columns=[...])`:
+#   1. Memo en proceso: un driver que ejecuta varias etapas lee cada archivo una sola vez.
+#   2. Caché en disco (Parquet tipado): si el CSV de origen no cambió (mtime/tamaño y, en
+#      su defecto, hash del contenido) no se vuelve a parsear el texto.
+#   3. Si la etapa ya existe en el almacén columnar (event_store) y está al día, se lee de allí.
+DOC_DIR = os.path.join(PROJECT_DIR, 'documentacion')
+VIS_DIR = os.path.join(DOC_DIR, 'visualizaciones')
+WORLD_GEOJSON = os.path.join(DATA_DIR, 'world.geojson')
+FAULTS_GEOJSON = os.path.join(DATA_DIR, 'Atlas_Geol%C3%B3gico_de_Colombia_2020%3A_Fallas_Geol%C3%B3gicas.geojson')
+
+CACHE_DIR = os.path.join(DATA_DIR, '.cache')
+
+# Esquema declarado de las columnas del catálogo USGS al leerlo desde CSV
+CSV_DTYPES = {
+    **{col: 'float32' for col in FLOAT32_COLUMNS},
+    'depth': 'float64', 'mag': 'float64',
+    'nst': 'float64', 'gap': 'float64', 'dmin': 'float64', 'rms': 'float64',
+    'horizontalError': 'float64', 'depthError': 'float64', 'magError': 'float64', 'magNst': 'float64',
+    'id': 'string',
+    **{col: 'category' for col in CATEGORY_COLUMNS},
+}
+
+_MEMO = {}
+
+def file_hash(path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def write_atomic(path, write_fn):
+    """
+    Genera `path` con write_fn(ruta_temporal) y lo renombra con os.replace. El temporal es único
+    (mkstemp en la misma carpeta, con la misma extensión), así que varios procesos pueden
+    generar el mismo archivo de caché a la vez: todos terminan bien y queda una copia completa.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.",
+                                    suffix=os.path.splitext(path)[1])
+    os.close(fd)
+    try:
+        write_fn(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def write_json_atomic(path, data, **kwargs):
+    def write(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, **kwargs)
+    write_atomic(path, write)
+
+def _read_csv_typed(csv_path):
+    header = pd.read_csv(csv_path, nrows=0).columns
+    dtypes = {col: dtype for col, dtype in CSV_DTYPES.items() if col in header}
+    df = pd.read_csv(csv_path, dtype=dtypes)
+    return apply_schema(df)
+
+def _csv_cache_files(stage, csv_path):
+    cache_path = os.path.join(CACHE_DIR, f"{stage}.parquet")
+    meta_path = os.path.join(CACHE_DIR, f"{stage}.meta.json")
+    st = os.stat(csv_path)
+    signature = {'source': os.path.abspath(csv_path), 'mtime_ns': st.st_mtime_ns, 'size': st.st_size}
+    meta = {}
+    if os.path.exists(meta_path) and os.path.exists(cache_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    fresh = bool(meta) and all(meta.get(k) == v for k, v in signature.items())
+    return cache_path, meta_path, signature, meta, fresh
+
+def _cached_csv_path(stage, csv_path):
+    """Devuelve un Parquet tipado equivalente al CSV, regenerándolo solo si el CSV cambió."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    cache_path, meta_path, signature, meta, fresh = _csv_cache_files(stage, csv_path)
+    if fresh:
+        return cache_path
+
+    # mtime distinto: comprobar el contenido antes de volver a parsear (p. ej. tras un checkout)
+    digest = file_hash(csv_path)
+    if meta.get('sha1') != digest or meta.get('source') != signature['source']:
+        df = _read_csv_typed(csv_path)
+        write_atomic(cache_path, lambda tmp_path: df.to_parquet(tmp_path, index=False))
+
+    write_json_atomic(meta_path, {**signature, 'sha1': digest}, indent=2)
+    return cache_path
+
+def _source(stage, csv_path, build_cache=True):
+    # El almacén columnar es la fuente preferida salvo que el CSV se haya editado después.
+    # Con build_cache=False no se genera la caché Parquet (que lee el CSV completo): si no está
+    # al día se devuelve ('csv', ruta) para leer el texto por bloques.
+    if stage_exists(stage):
+        if not os.path.exists(csv_path):
+            return 'store', None
+        exported = csv_export_matches(stage, csv_path)
+        # Sin anotación de exportación (p. ej. la etapa raw) se comparan las fechas
+        if exported or (exported is None and store_mtime(stage) >= os.path.getmtime(csv_path)):
+            return 'store', None
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"No se encuentra {csv_path}. Ejecute la etapa '{stage}' primero.")
+    if not build_cache:
+        cache_path, _, _, _, fresh = _csv_cache_files(stage, csv_path)
+        return ('cache', cache_path) if fresh else ('csv', csv_path)
+    return 'cache', _cached_csv_path(stage, csv_path)
+
+def event_columns(stage='raw', csv_path=None):
+    """Columnas disponibles de una etapa, sin cargar los datos."""
+    kind, path = _source(stage, csv_path or STAGE_CSV[stage], build_cache=False)
+    if kind == 'store':
+        return store_columns(stage)
+    if kind == 'csv':
+        return list(pd.read_csv(path, nrows=0).columns)
+    return pq.read_schema(path).names
+
+def load_events(stage='raw', columns=None, csv_path=None):
+    """
+    Carga una etapa del catálogo con tipos declarados y `time` ya convertido a datetime.
+
+    `columns` limita la lectura a las columnas indicadas. Cada llamada devuelve una copia,
+    así que los scripts pueden agregar o modificar columnas sin afectar al memo.
+    """
+    csv_path = csv_path or STAGE_CSV[stage]
+    kind, path = _source(stage, csv_path)
+    version = store_mtime(stage) if kind == 'store' else os.path.getmtime(path)
+    key = (stage, csv_path, tuple(columns) if columns is not None else None)
+
+    cached = _MEMO.get(key)
+    if cached is None or cached[0] != version:
+        if kind == 'store':
+            df = read_stage(stage, columns=columns)
+        else:
+            df = pd.read_parquet(path, columns=list(columns) if columns is not None else None)
+        _MEMO[key] = (version, df)
+        cached = _MEMO[key]
+    return cached[1].copy()
+
+def iter_events(stage='raw', columns=None, batch_size=200_000, csv_path=None):
+    """
+    Recorre una etapa en bloques de DataFrames sin cargarla completa (ni pasar por el memo).
+    Lee del almacén columnar o, si no está al día, de la caché Parquet tipada del CSV; sin caché
+    vigente lee el CSV por bloques (no se arma la caché, que exigiría cargarlo completo).
+    """
+    kind, path = _source(stage, csv_path or STAGE_CSV[stage], build_cache=False)
+    if kind == 'store':
+        yield from iter_stage(stage, columns=columns, batch_size=batch_size)
+        return
+    if kind == 'csv':
+        header = pd.read_csv(path, nrows=0).columns
+        dtypes = {col: dtype for col, dtype in CSV_DTYPES.items() if col in header}
+        usecols = list(columns) if columns is not None else None
+        for chunk in pd.read_csv(path, usecols=usecols, dtype=dtypes, chunksize=batch_size):
+            yield apply_schema(chunk[usecols] if usecols is not None else chunk)
+        return
+    parquet = pq.ParquetFile(path)
+    for batch in parquet.iter_batches(batch_size=batch_size, columns=list(columns) if columns is not None else None):
+        yield batch.to_pandas()
+
+def clear_memo():
+    _MEMO.clear()
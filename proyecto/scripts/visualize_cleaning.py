@@ -1,29 +1,19 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-import geopandas as gpd
 import os
 
+from figure_render import draw_basemap
+from seismic_data import VIS_DIR, load_events
+
 # Configuración de rutas
-RAW_DATA_PATH = r"c:\Users\Arnold's\Documents\Repositorios Machine Learning\proyecto\data\earthquakes_raw.csv"
-CLEAN_DATA_PATH = r"c:\Users\Arnold's\Documents\Repositorios Machine Learning\proyecto\data\earthquakes_cleaned.csv"
-WORLD_GEOJSON = r"c:\Users\Arnold's\Documents\Repositorios Machine Learning\proyecto\data\world.geojson"
-OUTPUT_FIG = r"c:\Users\Arnold's\Documents\Repositorios Machine Learning\proyecto\documentacion\visualizaciones\comparativa_limpieza_geografica.png"
+OUTPUT_FIG = os.path.join(VIS_DIR, 'comparativa_limpieza_geografica.png')
 
 def plot_comparison():
     print("Cargando datos y mapa...")
-    df_raw = pd.read_csv(RAW_DATA_PATH)
-    df_clean = pd.read_csv(CLEAN_DATA_PATH)
+    columns = ['latitude', 'longitude', 'mag']
+    df_raw = load_events('raw', columns=columns)
+    df_clean = load_events('cleaned', columns=columns)
     
-    # Intentar cargar el mapa
-    try:
-        world = gpd.read_file(WORLD_GEOJSON)
-        # Filtrar solo la zona de interés para acelerar el dibujo si es necesario, 
-        # o simplemente usarlo de fondo.
-    except Exception as e:
-        print(f"Error cargando mapa: {e}")
-        world = None
-
     # Crear figura con dos subplots
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(18, 9), sharex=True, sharey=True)
     
@@ -32,9 +22,12 @@ def plot_comparison():
     lat_lims = [-15, 25]
 
     for ax, data, title in zip([ax1, ax2], [df_raw, df_clean], ["Antes de la Limpieza", "Después (Solo Colombia)"]):
-        # Dibujar mapa de fondo
-        if world is not None:
-            world.plot(ax=ax, color='lightgrey', edgecolor='white', alpha=0.5)
+        # Dibujar mapa de fondo (rasterizado una vez, compartido por ambos paneles)
+        try:
+            draw_basemap(ax, (lon_lims[0], lon_lims[1], lat_lims[0], lat_lims[1]),
+                         [('world', dict(color='lightgrey', edgecolor='white', alpha=0.5))], dpi=300)
+        except Exception as e:
+            print(f"Error cargando mapa: {e}")
         
         # Dibujar sismos
         sns.scatterplot(
@@ -1,55 +1,41 @@
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-import geopandas as gpd
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
 import os
 
+from model_cache import FEATURES, get_kmeans_range
+from figure_render import draw_basemap
+from seismic_data import FAULTS_GEOJSON, VIS_DIR, load_events
+
 # Configuración
-DATA_PATH = 'data/earthquakes_enriched.csv'
-WORLD_GEOJSON = 'data/world.geojson'
-FAULTS_GEOJSON = 'data/Atlas_Geol%C3%B3gico_de_Colombia_2020%3A_Fallas_Geol%C3%B3gicas.geojson'
-OUTPUT_IMG = 'documentacion/visualizaciones/evolucion_clusters_geo.png'
-os.makedirs('documentacion/visualizaciones', exist_ok=True)
+OUTPUT_IMG = os.path.join(VIS_DIR, 'evolucion_clusters_geo.png')
+os.makedirs(VIS_DIR, exist_ok=True)
 
 def generate_evolution_geo_grid():
     print("Cargando datos sísmicos...")
-    df = pd.read_csv(DATA_PATH)
-    features = ['latitude', 'longitude', 'depth', 'mag']
+    features = FEATURES
+    df = load_events('enriched', columns=features)
     X = df[features]
     
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-    
-    print("Cargando mapas base...")
-    world = gpd.read_file(WORLD_GEOJSON)
-    colombia = world[world['name'] == 'Colombia']
+    ks = range(2, 11)
+    models = get_kmeans_range(X, ks)
     
-    # Cargar fallas
-    try:
-        faults = gpd.read_file(FAULTS_GEOJSON)
-        print("Fallas cargadas con éxito.")
-    except Exception as e:
-        print(f"Error cargando fallas: {e}")
-        faults = None
+    # Mapa base (croquis de Colombia + fallas): se rasteriza una vez y se reutiliza en los 9 paneles
+    basemap = [('colombia', dict(color='#f5f6fa', edgecolor='#7f8c8d', linewidth=0.8))]
+    if os.path.exists(FAULTS_GEOJSON):
+        basemap.append(('faults', dict(color='#e17055', alpha=0.3, linewidth=0.5)))
+    else:
+        print(f"Error cargando fallas: no se encontró {FAULTS_GEOJSON}")
 
-    ks = range(2, 11)
     fig, axes = plt.subplots(3, 3, figsize=(20, 20))
     axes = axes.flatten()
     
     for i, k in enumerate(ks):
         print(f"Procesando K={k}...")
-        kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-        labels = kmeans.fit_predict(X_scaled)
-        
-        # 1. Dibujar croquis de Colombia
-        colombia.plot(ax=axes[i], color='#f5f6fa', edgecolor='#7f8c8d', linewidth=0.8)
+        labels = models[k]['labels']
         
-        # 2. Dibujar fallas geológicas
-        if faults is not None:
-            faults.plot(ax=axes[i], color='#e17055', alpha=0.3, linewidth=0.5, label='Fallas')
+        # 1-2. Croquis de Colombia y fallas geológicas (mapa base en caché)
+        draw_basemap(axes[i], (-82, -66, -4, 14), basemap, dpi=120)
         
         # 3. Dibujar sismos agrupados
         scatter = axes[i].scatter(df['longitude'], df['latitude'], c=labels, 
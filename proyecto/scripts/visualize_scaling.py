@@ -4,17 +4,17 @@ import seaborn as sns
 from sklearn.preprocessing import StandardScaler
 import os
 
+from seismic_data import VIS_DIR, load_events
+
 # Configuración básica
-DATA_PATH = 'data/earthquakes_enriched.csv'
-OUTPUT_IMG = 'documentacion/visualizaciones/comparativa_estandarizacion.png'
-os.makedirs('documentacion/visualizaciones', exist_ok=True)
+OUTPUT_IMG = os.path.join(VIS_DIR, 'comparativa_estandarizacion.png')
+os.makedirs(VIS_DIR, exist_ok=True)
 
 def generate_scaling_comparison():
     print("Iniciando análisis de estandarización...")
-    df = pd.read_csv(DATA_PATH)
     # Seleccionamos variables críticas para la comparativa (MAGNITUD VS PROFUNDIDAD)
     features = ['mag', 'depth'] 
-    data = df[features] # Usamos TODO el dataset de Colombia (1,412 registros)
+    data = load_events('enriched', columns=features) # Usamos TODO el dataset de Colombia (1,412 registros)
     
     # Estandarización
     scaler = StandardScaler()
@@ -0,0 +1,134 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import pandas as pd
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+import load_data  # noqa: E402
+from fdsnws_stub import LIMITE_SERVIDOR, FdsnwsStub, synthetic_catalog  # noqa: E402
+
+# Backfill de dos meses sobre un catálogo que supera el límite del servidor: la ventana inicial
+# y sus dos mitades se saturan y se re-dividen hasta bajar de LIMITE_SERVIDOR filas
+INICIO, FIN = '2020-01-01', '2020-03-01'
+MITAD = '2020-01-31'
+EVENTOS_BACKFILL = 45_000
+
+class LoadDataTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.paths = {
+            'store_path': os.path.join(self.tmp, 'usgs_event_store.csv'),
+            'raw_path': os.path.join(self.tmp, 'earthquakes_raw.csv'),
+            'store_dir': os.path.join(self.tmp, 'store'),
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def read_store(self):
+        return pd.read_csv(self.paths['store_path'])
+
+class BackfillTest(LoadDataTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.catalog = synthetic_catalog(EVENTOS_BACKFILL, INICIO, FIN)
+
+    def backfill(self, url):
+        return load_data.backfill_catalog(
+            starttime=INICIO, endtime=FIN, workers=4, rate_limit=0, base_url=url,
+            state_path=os.path.join(self.tmp, 'backfill_state.json'), **self.paths)
+
+    def test_split_saturated_tiles(self):
+        stub = FdsnwsStub(self.catalog)
+        with stub as url:
+            store = self.backfill(url)
+
+        # Se pidió con limit=LIMITE_SERVIDOR y las ventanas saturadas se partieron en el tiempo
+        self.assertTrue(all(int(p['limit']) == LIMITE_SERVIDOR for p in stub.requests))
+        self.assertIn(MITAD, {p['starttime'][:10] for p in stub.requests})
+        self.assertGreater(len(stub.requests), 3)
+        self.assertEqual(len(store), EVENTOS_BACKFILL)
+        self.assertFalse(store['id'].duplicated().any())
+        self.assertEqual(set(store['id']), set(self.catalog['id']))
+        self.assertEqual(len(pd.read_csv(self.paths['raw_path'])), EVENTOS_BACKFILL)
+
+    def test_resume_failed_tiles(self):
+        # La segunda mitad falla en la primera ejecución: la primera queda en el almacén
+        failing = FdsnwsStub(self.catalog, fail=lambda n, params: 400 if params['starttime'].startswith(MITAD) else None)
+        with failing as url:
+            with self.assertRaises(RuntimeError):
+                self.backfill(url)
+        partial = self.read_store()
+        self.assertGreater(len(partial), 0)
+        self.assertLess(len(partial), EVENTOS_BACKFILL)
+
+        stub = FdsnwsStub(self.catalog)
+        with stub as url:
+            store = self.backfill(url)
+        # Solo se piden la mitad pendiente y sus subdivisiones
+        self.assertTrue(all(p['starttime'] >= MITAD for p in stub.requests))
+        self.assertEqual(len(store), EVENTOS_BACKFILL)
+        self.assertFalse(store['id'].duplicated().any())
+
+class SyncTest(LoadDataTestCase):
+    PAGINA = 1000
+
+    def setUp(self):
+        super().setUp()
+        self.catalog = synthetic_catalog(2500, '2020-01-01', '2020-06-01')
+
+    def sync(self, url):
+        return load_data.sync_catalog(base_url=url, state_path=os.path.join(self.tmp, 'sync_state.json'),
+                                      page_size=self.PAGINA, **self.paths)
+
+    def test_resume_after_interruption(self):
+        # La tercera página falla: las dos primeras quedan en el almacén y el estado apunta a la siguiente
+        failing = FdsnwsStub(self.catalog, fail=lambda n, params: 503 if n == 3 else None)
+        with failing as url:
+            with self.assertRaises(requests.HTTPError):
+                self.sync(url)
+        self.assertEqual(len(self.read_store()), 2 * self.PAGINA)
+        state = load_data._read_state(os.path.join(self.tmp, 'sync_state.json'))
+        self.assertEqual(state['pending']['offset'], 2 * self.PAGINA + 1)
+
+        stub = FdsnwsStub(self.catalog)
+        with stub as url:
+            store = self.sync(url)
+        self.assertEqual(int(stub.requests[0]['offset']), 2 * self.PAGINA + 1)
+        self.assertEqual(len(store), len(self.catalog))
+        self.assertFalse(store['id'].duplicated().any())
+        self.assertNotIn('pending', load_data._read_state(os.path.join(self.tmp, 'sync_state.json')))
+
+    def test_upsert_revised_events(self):
+        with FdsnwsStub(self.catalog) as url:
+            self.sync(url)
+
+        # Revisiones de eventos existentes y eventos nuevos, posteriores a la última sincronización
+        now = pd.Timestamp.now(tz='UTC')
+        revised = self.catalog.index[:10]
+        self.catalog.loc[revised, 'updated'] = now
+        self.catalog.loc[revised, 'mag'] += 1.0
+        extra = synthetic_catalog(5, '2020-06-02', '2020-06-03', seed=1)
+        extra['id'] = [f"nuevo{i}" for i in range(5)]
+        extra['updated'] = now
+        catalog = pd.concat([self.catalog, extra], ignore_index=True)
+
+        stub = FdsnwsStub(catalog)
+        with stub as url:
+            store = self.sync(url)
+        # Solo se piden los modificados después de la sincronización anterior
+        self.assertIn('updatedafter', stub.requests[0])
+        self.assertEqual(len(store), len(catalog))
+        self.assertFalse(store['id'].duplicated().any())
+        mags = store.set_index('id')['mag']
+        expected = catalog.set_index('id')['mag']
+        self.assertTrue((mags[catalog['id'][revised]] == expected[catalog['id'][revised]]).all())
+        self.assertTrue(set(extra['id']).issubset(store['id']))
+
+if __name__ == "__main__":
+    unittest.main()